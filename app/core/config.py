@@ -20,7 +20,23 @@ class Settings(BaseSettings):
     FONT_PATH_BOLD: str = "assets/TimesNewRoman-Bold.ttf"
     TEMPLATES_DIR: str = "app/templates"
     RECEIPTS_DIR: str = "assets/receipts"
+    IMPORTS_DIR: str = "assets/imports"  # file upload + báo lỗi của job import
+    EXPORTS_DIR: str = "assets/exports"  # file kết quả của job xuất (Excel / PDF gộp theo đợt)
+    EXPORT_JOB_WORKERS: int = 2          # số job xuất chạy song song
+    EXPORT_JOB_TTL_HOURS: int = 24       # file job không ai dùng quá N giờ thì xoá
+    RECEIPT_ARCHIVE_DIR: str = "assets/receipt_archive"  # biên nhận đã gửi/lưu (không public)
+    RECEIPT_ARCHIVE_KEEP: int = 5         # giữ tối đa N bản gần nhất / hồ sơ / khổ giấy
+    RECEIPT_ARCHIVE_MAX_DAYS: int = 730   # xoá bản không dùng quá N ngày (0 = không giới hạn)
+    RECEIPT_CACHE_DIR: str = "assets/receipt_cache"  # cache PDF biên nhận (không public)
     PDF_ENGINE: str = "xhtml2pdf"  # hoặc "weasyprint"
+    PDF_WORKERS: int = 0           # số tiến trình render in gộp; 0 = theo số CPU (tối đa 4), 1 = tuần tự
+    PDF_PARALLEL_MIN: int = 100    # ít hồ sơ hơn ngưỡng này thì render tuần tự
+    SPOOL_MAX_MEMORY: int = 8 * 1024 * 1024  # file xuất lớn hơn ngưỡng (byte) -> ghi ra file tạm trên đĩa
+    RECEIPT_CACHE_MEM_MB: int = 64           # cache PDF biên nhận trong RAM (MB)
+    RECEIPT_CACHE_DISK_FILES: int = 5000     # số file tối đa ở RECEIPT_CACHE_DIR
+    CHECKLIST_CACHE_CHECK_SEC: float = 2.0   # worker kiểm tra version checklist chung (DB) tối đa mỗi N giây
+    RECEIPT_PRERENDER: bool = False          # render sẵn biên nhận A4/A5 (chạy nền) sau khi tạo/sửa hồ sơ
+    RECEIPT_PRERENDER_QUEUE: int = 200       # số hồ sơ chờ render sẵn tối đa; đầy thì bỏ qua
 
     # ======== SMTP / Email ========
     EMAIL_ENABLED: bool = True
@@ -63,6 +79,22 @@ class Settings(BaseSettings):
     def receipts_path(self) -> Path:
         return Path(self.RECEIPTS_DIR).resolve()
 
+    @property
+    def imports_path(self) -> Path:
+        return Path(self.IMPORTS_DIR).resolve()
+
+    @property
+    def exports_path(self) -> Path:
+        return Path(self.EXPORTS_DIR).resolve()
+
+    @property
+    def receipt_archive_path(self) -> Path:
+        return Path(self.RECEIPT_ARCHIVE_DIR).resolve()
+
+    @property
+    def receipt_cache_path(self) -> Path:
+        return Path(self.RECEIPT_CACHE_DIR).resolve()
+
     @property
     def font_path(self) -> Path:
         return Path(self.FONT_PATH).resolve()
@@ -1,13 +1,14 @@
 # app/db/session.py
 import os
 import logging
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.engine.url import make_url
 from sqlalchemy.exc import OperationalError
 
 from .base import Base
 from ..core.config import settings
+from ..utils.vn_text import vi_collate
 
 log = logging.getLogger("db")
 
@@ -24,13 +25,19 @@ def _make_engine(url_str: str):
         # nhưng để chắc ăn vẫn truyền xuống DBAPI connect()
         connect_args["charset"] = "utf8mb4"
 
-    return create_engine(
+    eng = create_engine(
         url_str,
         connect_args=connect_args,
         pool_pre_ping=True,
         pool_recycle=3600,
         future=True,
     )
+    if url.get_backend_name().startswith("sqlite"):
+        # SQLite không có collation tiếng Việt -> đăng ký hàm so sánh Python tên 'vi'
+        @event.listens_for(eng, "connect")
+        def _sqlite_vi_collation(dbapi_conn, _rec):
+            dbapi_conn.create_collation("vi", vi_collate)
+    return eng
 
 # engine ban đầu theo cấu hình
 engine = _make_engine(DB_URL)
@@ -60,6 +67,91 @@ def init_db():
             # không fallback -> ném lỗi để app báo fail
             raise
 
+def ensure_indexes(bind=None):
+    """
+    create_all() không thêm index mới cho bảng đã tồn tại -> tạo bổ sung các index
+    khai báo trong model (checkfirst). Lỗi từng index chỉ ghi log, không chặn khởi động.
+    """
+    bind = bind or engine
+    for table in Base.metadata.sorted_tables:
+        for idx in table.indexes:
+            try:
+                idx.create(bind=bind, checkfirst=True)
+            except Exception as e:
+                log.warning("Create index %s failed: %s", idx.name, e)
+
+_VI_COLLATION: dict = {}
+
+def vi_collation_name(bind) -> str | None:
+    """
+    Tên collation sắp xếp tiếng Việt cho engine đang dùng (dò 1 lần):
+    - MySQL 8: utf8mb4_vi_0900_ai_ci; bản cũ/MariaDB: utf8mb4_unicode_ci
+    - SQLite : 'vi' (đăng ký ở _make_engine)
+    """
+    dialect = bind.dialect.name
+    if dialect in _VI_COLLATION:
+        return _VI_COLLATION[dialect]
+    name = None
+    if dialect == "sqlite":
+        name = "vi"
+    elif dialect == "mysql":
+        try:
+            with bind.connect() as conn:
+                has_vi = conn.execute(text("SHOW COLLATION LIKE 'utf8mb4_vi_0900_ai_ci'")).first()
+            name = "utf8mb4_vi_0900_ai_ci" if has_vi else "utf8mb4_unicode_ci"
+        except Exception as e:
+            log.warning("Probe collation failed: %s", e)
+            name = "utf8mb4_unicode_ci"
+    _VI_COLLATION[dialect] = name
+    return name
+
+# (bảng, cột) đã mang sẵn collation tiếng Việt trên chính cột (MySQL) -> ORDER BY cột trần
+_VI_ON_COLUMN: set = set()
+
+def ensure_vi_sort_columns(bind, table, columns, sort_indexes=()):
+    """
+    ORDER BY cột COLLATE x (x khác collation của cột) không dùng được index -> phải filesort.
+    - MySQL : chỉ dò (information_schema) cột nào đã mang collation tiếng Việt -> sắp xếp theo cột trần.
+      Đổi collation là build lại bảng + đổi ngữ nghĩa =/LIKE -> chạy tay bằng
+      migrate_applicants_vi_collation.sql, không làm lúc khởi động.
+    - SQLite: không đổi collation cột được -> tạo index riêng với COLLATE vi cho từng bộ cột
+      trong sort_indexes (ORDER BY cột COLLATE vi dùng được index này)
+    Lỗi chỉ ghi log: khi đó sắp xếp vẫn đúng (COLLATE trong câu truy vấn), chỉ chậm hơn.
+    """
+    coll = vi_collation_name(bind)
+    if not coll:
+        return
+    dialect = bind.dialect.name
+    try:
+        if dialect == "mysql":
+            with bind.connect() as conn:
+                cur = dict(conn.execute(text(
+                    "SELECT COLUMN_NAME, COLLATION_NAME FROM information_schema.COLUMNS "
+                    "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :t"
+                ), {"t": table.name}).all())
+            done = [c for c in columns if cur.get(c) == coll]
+            _VI_ON_COLUMN.update((table.name, c) for c in done)
+            todo = [c for c in columns if c not in done]
+            if todo:
+                log.info("Columns %s(%s) not on collation %s: sorting uses COLLATE (no index); "
+                         "see migrate_applicants_vi_collation.sql", table.name, ", ".join(todo), coll)
+        elif dialect == "sqlite":
+            pk = ", ".join(c.name for c in table.primary_key.columns)
+            with bind.begin() as conn:
+                for cols in sort_indexes:
+                    name = f"ix_{table.name}_{'_'.join(cols)}_vi"
+                    expr = ", ".join(f"{c} COLLATE {coll}" for c in cols)
+                    conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table.name} ({expr}, {pk})"))
+    except Exception as e:
+        log.warning("Ensure Vietnamese sort collation on %s failed: %s", table.name, e)
+
+def vi_sort_column(col, bind):
+    """Biểu thức sắp xếp tiếng Việt cho cột: cột trần nếu cột đã mang collation, không thì COLLATE."""
+    if (col.table.name, col.name) in _VI_ON_COLUMN:
+        return col
+    coll = vi_collation_name(bind)
+    return col.collate(coll) if coll else col
+
 def get_db():
     db = SessionLocal()
     try:
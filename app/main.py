@@ -9,7 +9,8 @@ from starlette.middleware.sessions import SessionMiddleware
 from starlette.responses import JSONResponse, RedirectResponse
 
 from app.db.base import Base
-from app.db.session import engine, get_db
+from app.db.session import engine, get_db, ensure_indexes, ensure_vi_sort_columns
+from app.models.applicant import Applicant, VI_SORT_COLUMNS, VI_SORT_INDEXES
 
 from fastapi.middleware.cors import CORSMiddleware
 from app.routers import applicants_batch  
@@ -17,12 +18,22 @@ from app.routers import applicants_batch
 # Routers
 from app.routers import health, applicants, checklist, export, batch
 from app.routers import auth, admin, journal
+from app.routers import import_jobs
+from app.routers import export_jobs
 from app.routers import account  #trang thông tin tài khoản
 from urllib.parse import quote
 
 #Email
 from app.routers import applicants_email
 from app.core.config import settings  
+from app.services.search_index import ensure_search_index
+from app.services.sequence_service import backfill_sequences
+from app.services.import_jobs import recover_jobs as recover_import_jobs
+from app.services.export_jobs import recover_jobs as recover_export_jobs
+from app.services.font_registry import ensure_fonts
+from app.services.receipt_archive import gc_on_startup as gc_receipt_archive
+from app.services.receipt_cache import purge_legacy_dir as purge_legacy_receipt_cache
+from app.services.pdf_batch import shutdown_pool as shutdown_pdf_pool
 
 # Dùng chung hằng số timeout với auth.py để không lệch
 from app.routers.auth import IDLE_TIMEOUT_SEC as AUTH_IDLE_TIMEOUT_SEC
@@ -216,15 +227,39 @@ app.include_router(applicants_batch.router, prefix="/api", tags=["Applicants (ba
 app.include_router(batch.router,      prefix="/api", tags=["Batch"])
 app.include_router(export.router,     prefix="/api", tags=["Export"])
 app.include_router(journal.router,    prefix="/api", tags=["Journal"])
+app.include_router(import_jobs.router, prefix="/api", tags=["Imports"])
+app.include_router(export_jobs.router, prefix="/api", tags=["Exports"])
 
 # Alias không /api (ẩn khỏi docs)
-for r in (health.router, checklist.router, applicants.router, applicants_batch.router, batch.router, export.router, journal.router):
+for r in (health.router, checklist.router, applicants.router, applicants_batch.router, batch.router, export.router, journal.router, import_jobs.router, export_jobs.router):
     app.include_router(r, prefix="", include_in_schema=False) 
 
 # ---------------- Startup ----------------
 @app.on_event("startup")
 def startup():
     Base.metadata.create_all(bind=engine)
+    ensure_indexes(engine)
+    # Sắp xếp tiếng Việt dùng được index: MySQL dò collation cột (đổi bằng script SQL), SQLite tạo index COLLATE vi
+    ensure_vi_sort_columns(engine, Applicant.__table__, VI_SORT_COLUMNS, VI_SORT_INDEXES)
+    # Cột search_text + FULLTEXT (MySQL) / FTS5 (SQLite) cho tìm kiếm không dấu
+    ensure_search_index(engine)
+    # Bộ đếm mã hồ sơ theo (khoa, dot): seed 1 lần từ mã đang có
+    backfill_sequences(engine)
+    # Job import dở dang khi tắt server: chạy tiếp hàng đợi / đánh dấu lỗi
+    recover_import_jobs(engine)
+    # Job xuất (Excel / PDF theo đợt): job dở -> failed, job chờ -> chạy lại, dọn file hết hạn
+    recover_export_jobs(engine)
+    # Font PDF (TNR / DejaVu): dò + đăng ký 1 lần cho cả tiến trình
+    ensure_fonts()
+    # Kho biên nhận đã gửi: áp chính sách giữ lại (N bản / hồ sơ, tối đa N ngày)
+    gc_receipt_archive(engine)
+    # Cache biên nhận kiểu cũ nằm trong /static/receipts (public) -> xoá
+    purge_legacy_receipt_cache()
+
+@app.on_event("shutdown")
+def shutdown():
+    # dừng pool tiến trình in gộp PDF (nếu đã tạo)
+    shutdown_pdf_pool()
 
 @app.on_event("startup")
 def _log_routes():
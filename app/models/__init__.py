@@ -5,6 +5,11 @@ from .checklist import ChecklistItem, ChecklistVersion
 from .user import User
 from .user_models import Student, Application
 from .email_log import EmailLog  # dùng đường tương đối là gọn hơn
+from .sequence import MaHoSoSequence
+from .import_job import ImportJob
+from .export_job import ExportJob
+from .receipt_archive import ReceiptArchive
+from .cache_version import CacheVersion
 
 __all__ = [
     "Base",
@@ -16,4 +21,9 @@ __all__ = [
     "Student",
     "Application",
     "EmailLog",   
+    "MaHoSoSequence",
+    "ImportJob",
+    "ExportJob",
+    "ReceiptArchive",
+    "CacheVersion",
 ]
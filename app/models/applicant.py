@@ -1,12 +1,32 @@
 from sqlalchemy import (
-    Column, String, Date, Integer, Boolean, ForeignKey, Text, DateTime, text, func
+    Column, String, Date, Integer, Boolean, ForeignKey, Text, DateTime, text, func, event, Index
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 from sqlalchemy.ext.hybrid import hybrid_property
 from app.db.base import Base
+from app.utils.vn_text import build_search_text
+
+# Cột sắp xếp theo tiếng Việt: MySQL đặt collation lên chính cột bằng migrate_applicants_vi_collation.sql,
+# SQLite tạo index COLLATE vi lúc startup (db.session.ensure_vi_sort_columns)
+VI_SORT_COLUMNS = ("ten", "ho_dem", "nganh_nhap_hoc", "nguoi_nhan_ky_ten")
+VI_SORT_INDEXES = (("ten", "ho_dem"), ("ho_dem", "ten"), ("nganh_nhap_hoc",), ("nguoi_nhan_ky_ten",))  # SQLite
+
 
 class Applicant(Base):
     __tablename__ = "applicants"
+    __table_args__ = (
+        # phân trang keyset cho /applicants/search (ORDER BY created_at DESC, ma_so_hv DESC)
+        Index("ix_applicants_created_mssv", "created_at", "ma_so_hv"),
+        # lọc / sắp xếp phía server cho trang danh sách
+        Index("ix_applicants_khoa_dot_created", "khoa", "dot", "created_at"),
+        Index("ix_applicants_status_printed", "status", "printed"),
+        Index("ix_applicants_ngay_nhan_hs", "ngay_nhan_hs"),
+        Index("ix_applicants_nganh", "nganh_nhap_hoc"),
+        # sắp xếp trang danh sách: ORDER BY cột trần (+ ma_so_hv = PK, có sẵn cuối mỗi index InnoDB)
+        Index("ix_applicants_ten_ho_dem", "ten", "ho_dem"),
+        Index("ix_applicants_ho_dem_ten", "ho_dem", "ten"),
+        Index("ix_applicants_nguoi_nhan", "nguoi_nhan_ky_ten"),
+    )
 
     ma_so_hv  = Column(String(10), primary_key=True, index=True)
     ma_ho_so  = Column(String(64), nullable=True, index=True)
@@ -16,8 +36,9 @@ class Applicant(Base):
     ho_ten = Column(String(255), nullable=True)
 
     # Mới: tách tên
-    ho_dem = Column(String(255), nullable=True, index=True)  # họ + tên đệm
-    ten    = Column(String(100), nullable=True, index=True)  # tên (given name)
+    # index: ix_applicants_ho_dem_ten / ix_applicants_ten_ho_dem (cột đầu dùng được cho lọc 1 cột)
+    ho_dem = Column(String(255), nullable=True)  # họ + tên đệm
+    ten    = Column(String(100), nullable=True)  # tên (given name)
 
     gioi_tinh = Column(String(10), nullable=True)
     email_hoc_vien = Column(String(255), nullable=True)
@@ -38,6 +59,10 @@ class Applicant(Base):
 
     checklist_version_id = Column(Integer, ForeignKey("checklist_versions.id"), nullable=True)
 
+    # Chuỗi tìm kiếm không dấu (tên + mã HS + MSSV) — đánh FULLTEXT (MySQL) / FTS5 (SQLite)
+    # deferred: chỉ dùng để lọc ở SQL, không nạp khi đọc ORM
+    search_text = deferred(Column(String(512), nullable=True))
+
     created_at = Column(DateTime, server_default=text("CURRENT_TIMESTAMP"))
     updated_at = Column(
         DateTime,
@@ -51,7 +76,9 @@ class Applicant(Base):
         cascade="all, delete-orphan",
         primaryjoin="Applicant.ma_so_hv==ApplicantDoc.applicant_ma_so_hv",
         foreign_keys="ApplicantDoc.applicant_ma_so_hv",
-        lazy="selectin",
+        # Không nạp kèm: danh sách/tìm kiếm không dùng docs; nơi cần thì query ApplicantDoc
+        # riêng (_docs_map, _docs_by_mssv...) hoặc .options(selectinload(Applicant.docs))
+        lazy="select",
     )
 
     # ---- Hiển thị 'full_name' thống nhất (ưu tiên ho_dem + ten, fallback ho_ten cũ) ----
@@ -73,6 +100,15 @@ class Applicant(Base):
         )
 
 
+# ---- Giữ search_text đồng bộ cho mọi đường ghi qua ORM (create/update/batch-update/restore) ----
+@event.listens_for(Applicant, "before_insert")
+@event.listens_for(Applicant, "before_update")
+def _sync_search_text(mapper, connection, target: Applicant):
+    target.search_text = build_search_text(
+        target.ho_dem, target.ten, target.ho_ten, target.ma_ho_so, target.ma_so_hv
+    )
+
+
 class ApplicantDoc(Base):
     __tablename__ = "applicant_docs"
 
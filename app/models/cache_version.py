@@ -0,0 +1,20 @@
+# app/models/cache_version.py
+from sqlalchemy import Column, Integer, String, DateTime, func
+
+from app.db.base import Base
+
+
+class CacheVersion(Base):
+    """
+    Bộ đếm phiên bản dữ liệu dùng chung giữa các worker (mỗi topic 1 dòng, vd 'checklist').
+    Route ghi tăng version trong cùng transaction; worker khác so version (1 lookup theo PK)
+    để biết cache trong RAM đã cũ.
+    """
+    __tablename__ = "cache_versions"
+
+    topic = Column(String(32), primary_key=True)
+    version = Column(Integer, nullable=False, server_default="0")
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self) -> str:
+        return f"<CacheVersion(topic='{self.topic}', version={self.version})>"
@@ -0,0 +1,51 @@
+# app/models/export_job.py
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Text, func
+
+from app.db.base import Base
+
+
+class ExportJob(Base):
+    """
+    Job xuất file (Excel đợt / in PDF gộp đợt) chạy nền; file kết quả dùng lại cho các yêu cầu giống hệt.
+    status: queued -> running -> done | failed
+    fingerprint = loại + bộ lọc + dấu phiên bản dữ liệu -> cùng fingerprint thì gắn vào job sẵn có.
+    """
+    __tablename__ = "export_jobs"
+
+    id = Column(String(32), primary_key=True)            # uuid hex
+    kind = Column(String(32), nullable=False)            # "excel-dot" | "print-dot"
+    params = Column(JSON, nullable=True)                 # dot, khoa, name / a5, two_up
+    params_key = Column(String(64), nullable=False, index=True)   # sha256(kind + params)
+    fingerprint = Column(String(64), nullable=False, index=True)  # sha256(params_key + dấu dữ liệu)
+    status = Column(String(16), nullable=False, server_default="queued", index=True)
+
+    file_path = Column(String(512), nullable=True)
+    filename = Column(String(255), nullable=True)        # tên file khi tải về
+    media_type = Column(String(128), nullable=True)
+    size_bytes = Column(Integer, nullable=True)
+    row_count = Column(Integer, nullable=True)           # số hồ sơ trong file
+    error_message = Column(Text, nullable=True)
+
+    created_by = Column(String(255), nullable=True)
+    created_at = Column(DateTime, server_default=func.now())
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    last_used_at = Column(DateTime, nullable=True)       # lần gần nhất được gắn vào / tải về
+
+    def to_dict(self):
+        iso = lambda d: d.isoformat() if d else None
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "params": self.params or {},
+            "status": self.status,
+            "filename": self.filename,
+            "size_bytes": self.size_bytes,
+            "row_count": self.row_count,
+            "error_message": self.error_message,
+            "download_url": f"/exports/{self.id}/download" if self.status == "done" else None,
+            "created_by": self.created_by,
+            "created_at": iso(self.created_at),
+            "started_at": iso(self.started_at),
+            "finished_at": iso(self.finished_at),
+        }
@@ -0,0 +1,52 @@
+# app/models/import_job.py
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Text, func
+
+from app.db.base import Base
+
+
+class ImportJob(Base):
+    """
+    Job import hồ sơ chạy nền trên server (xlsx/csv).
+    status: queued -> running -> done | failed | cancelled  (cancelling = đang chờ dừng)
+    """
+    __tablename__ = "import_jobs"
+
+    id = Column(String(32), primary_key=True)            # uuid hex
+    status = Column(String(16), nullable=False, server_default="queued", index=True)
+
+    filename = Column(String(255), nullable=True)
+    file_path = Column(String(512), nullable=True)       # file upload đã lưu
+    report_path = Column(String(512), nullable=True)     # CSV các dòng lỗi / bỏ qua
+    options = Column(JSON, nullable=True)                # mapping cột, ngày nhận mặc định, checklist version
+
+    total_rows = Column(Integer, nullable=True)          # ước lượng (xlsx có dimension), CSV = None tới khi xong
+    processed = Column(Integer, nullable=False, server_default="0")
+    ok_count = Column(Integer, nullable=False, server_default="0")
+    err_count = Column(Integer, nullable=False, server_default="0")
+    skip_count = Column(Integer, nullable=False, server_default="0")
+    error_message = Column(Text, nullable=True)
+
+    created_by = Column(String(255), nullable=True)
+    created_by_id = Column(String(128), nullable=True)   # users.id người tạo -> actor_id của audit do job ghi
+    created_at = Column(DateTime, server_default=func.now())
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    def to_dict(self):
+        iso = lambda d: d.isoformat() if d else None
+        return {
+            "id": self.id,
+            "status": self.status,
+            "filename": self.filename,
+            "total_rows": self.total_rows,
+            "processed": self.processed or 0,
+            "ok": self.ok_count or 0,
+            "err": self.err_count or 0,
+            "skip": self.skip_count or 0,
+            "error_message": self.error_message,
+            "has_report": bool(self.report_path) and bool((self.err_count or 0) + (self.skip_count or 0)),
+            "created_by": self.created_by,
+            "created_at": iso(self.created_at),
+            "started_at": iso(self.started_at),
+            "finished_at": iso(self.finished_at),
+        }
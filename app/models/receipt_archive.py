@@ -0,0 +1,43 @@
+# app/models/receipt_archive.py
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, func
+
+from app.db.base import Base
+
+
+class ReceiptArchive(Base):
+    """
+    Chỉ mục biên nhận PDF đã lưu (gửi email, tải về) theo hồ sơ.
+    File nằm ở RECEIPT_ARCHIVE_DIR/<sha[:2]>/<sha[2:4]>/<sha>.pdf — cùng nội dung chỉ lưu 1 file.
+    """
+    __tablename__ = "receipt_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    applicant_ma_so_hv = Column(
+        String(10),
+        ForeignKey("applicants.ma_so_hv", ondelete="CASCADE", onupdate="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    layout = Column(String(8), nullable=False)           # "A4" | "A5"
+    sha256 = Column(String(64), nullable=False, index=True)
+    size_bytes = Column(Integer, nullable=False)
+    download_name = Column(String(255), nullable=True)   # tên file khi đính kèm / tải về
+    created_at = Column(DateTime, server_default=func.now())
+    last_used_at = Column(DateTime, server_default=func.now(), index=True)
+
+    __table_args__ = (
+        Index("ux_receipt_archive_app_sha_layout", "applicant_ma_so_hv", "sha256", "layout", unique=True),
+    )
+
+    def to_dict(self):
+        iso = lambda d: d.isoformat() if d else None
+        return {
+            "id": self.id,
+            "ma_so_hv": self.applicant_ma_so_hv,
+            "layout": self.layout,
+            "sha256": self.sha256,
+            "size_bytes": self.size_bytes,
+            "download_name": self.download_name,
+            "created_at": iso(self.created_at),
+            "last_used_at": iso(self.last_used_at),
+        }
@@ -0,0 +1,100 @@
+# app/models/sequence.py
+from __future__ import annotations
+
+import re
+
+from sqlalchemy import Column, Integer, String, event, insert, select, update, inspect as sa_inspect
+
+from app.db.base import Base
+from app.models.applicant import Applicant
+
+# 4 chữ số cuối mã hồ sơ = số thứ tự trong (khoa, dot)
+SEQ4_RE = re.compile(r"(\d{4})$")
+
+
+class MaHoSoSequence(Base):
+    """
+    Bộ đếm số thứ tự mã hồ sơ theo (khoa, dot).
+    '' = không lọc theo trường đó (giữ nguyên ngữ nghĩa _next_seq4 cũ khi khoa/dot trống).
+    """
+    __tablename__ = "ma_ho_so_sequences"
+
+    khoa = Column(String(64), primary_key=True, server_default="")
+    dot = Column(String(64), primary_key=True, server_default="")
+    last_value = Column(Integer, nullable=False, server_default="0")
+
+    def __repr__(self) -> str:
+        return f"<MaHoSoSequence(khoa='{self.khoa}', dot='{self.dot}', last={self.last_value})>"
+
+
+def seq_key(khoa, dot) -> tuple[str, str]:
+    return (str(khoa or "").strip(), str(dot or "").strip())
+
+
+def scan_max(db_or_conn, khoa: str, dot: str) -> int:
+    """Max 4 chữ số cuối của ma_ho_so trong (khoa, dot) — chỉ lấy 1 cột, không nạp ORM."""
+    q = select(Applicant.ma_ho_so).where(Applicant.ma_ho_so.isnot(None))
+    if khoa:
+        q = q.where(Applicant.khoa == khoa)
+    if dot:
+        q = q.where(Applicant.dot == dot)
+    maxn = 0
+    for (code,) in db_or_conn.execute(q):
+        m = SEQ4_RE.search(str(code or "").strip())
+        if m:
+            maxn = max(maxn, int(m.group(1)))
+    return maxn
+
+
+def insert_ignore(dialect: str):
+    stmt = insert(MaHoSoSequence.__table__)
+    if dialect == "mysql":
+        return stmt.prefix_with("IGNORE")
+    if dialect == "sqlite":
+        return stmt.prefix_with("OR IGNORE")
+    return stmt
+
+
+def bump_sequences(connection, khoa, dot, n: int) -> None:
+    """
+    Đẩy bộ đếm của đúng khoá (khoa, dot) lên >= n (chưa có thì seed).
+    Chỉ khoá 1 dòng: các khoá 'rộng' ('' = mọi khoa/đợt) không bị đụng ở đây mà được đuổi kịp
+    bằng MAX() lúc cấp số (sequence_service.next_ma_ho_so_seq) -> ghi hồ sơ không tranh nhau
+    dòng ('', '') và không có thứ tự khoá khác nhau giữa các worker.
+    """
+    k, d = seq_key(khoa, dot)
+    tbl = MaHoSoSequence.__table__
+    res = connection.execute(
+        update(tbl)
+        .where(tbl.c.khoa == k, tbl.c.dot == d, tbl.c.last_value < n)
+        .values(last_value=n)
+    )
+    if res.rowcount:
+        return
+    exists = connection.execute(
+        select(tbl.c.last_value).where(tbl.c.khoa == k, tbl.c.dot == d)
+    ).first()
+    if exists is None:
+        # khoá mới: seed từ mã hiện có để MAX() của khoá rộng không bỏ sót (khoa, dot) này
+        connection.execute(
+            insert_ignore(connection.dialect.name)
+            .values(khoa=k, dot=d, last_value=max(n, scan_max(connection, k, d)))
+        )
+        connection.execute(
+            update(tbl)
+            .where(tbl.c.khoa == k, tbl.c.dot == d, tbl.c.last_value < n)
+            .values(last_value=n)
+        )
+
+
+# ---- Mã HS nhập tay (create/update/batch) lớn hơn bộ đếm -> đẩy bộ đếm lên, tránh cấp trùng ----
+@event.listens_for(Applicant, "after_insert")
+@event.listens_for(Applicant, "after_update")
+def _observe_ma_ho_so(mapper, connection, target: Applicant):
+    st = sa_inspect(target)
+    if not (st.attrs.ma_ho_so.history.has_changes() or st.attrs.khoa.history.has_changes()
+            or st.attrs.dot.history.has_changes()):
+        return
+    m = SEQ4_RE.search(str(target.ma_ho_so or "").strip())
+    if m:
+        bump_sequences(connection, target.khoa, target.dot, int(m.group(1)))
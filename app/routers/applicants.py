@@ -1,24 +1,29 @@
 # app/routers/applicants.py
 from __future__ import annotations
 
-import io, re, os, hmac, json, hashlib
+import io, re, os, hmac, json, hashlib, base64
 from datetime import datetime, date
 from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Body, status, Request, Response
 from fastapi.responses import StreamingResponse
-from sqlalchemy import literal, or_, and_, func
-from sqlalchemy.orm import Session
+from sqlalchemy import or_, and_, func, false
+from sqlalchemy.orm import Session, load_only
 from sqlalchemy.exc import IntegrityError
 
-from app.db.session import get_db
+from app.db.session import get_db, vi_sort_column
 from app.models.applicant import Applicant, ApplicantDoc
-from app.models.checklist import ChecklistItem, ChecklistVersion
+from app.models.checklist import ChecklistVersion
 from app.routers.auth import require_roles
 from app.services.audit import write_audit
 import re
 
 from app.utils.soft_delete import exclude_deleted
+from app.services.search_index import apply_search
+from app.services.cache import TTLCache, data_version
+from app.services import stats_service
+from app.services.sequence_service import next_ma_ho_so_seq
+from app.services import checklist_cache, receipt_cache, receipt_prerender
 
 try:
     from app.schemas.applicant import ApplicantIn, ApplicantOut
@@ -74,25 +79,6 @@ def _validate_update_reason(data) -> str:
 
     return label
 
-# 🆕 Regex lấy số thứ tự 4 chữ số cuối mã hồ sơ
-SEQ4_RE = re.compile(r"(\d{4})$")
-
-def _next_seq4(db: Session, khoa: Optional[str], dot: Optional[str]) -> str:
-    q = db.query(Applicant)
-    if khoa: q = q.filter(Applicant.khoa == str(khoa).strip())
-    if dot:  q = q.filter(Applicant.dot  == str(dot).strip())
-
-    maxn = 0
-    for a in q.all():
-        m = SEQ4_RE.search(str(getattr(a, "ma_ho_so", "") or ""))
-        if m:
-            try:
-                n = int(m.group(1))
-                if n > maxn: maxn = n
-            except: pass
-    return f"{(maxn + 1):04d}"
-
-
 # ================= Helpers =================
 DATE_DMY = re.compile(r"^(\d{1,2})[\/\-](\d{1,2})[\/\-](\d{4})$")
 DATE_YMD = re.compile(r"^(\d{4})-(\d{2})-(\d{2})$")
@@ -233,6 +219,47 @@ def _display_name(ho_dem: Optional[str], ten: Optional[str], fallback_full: Opti
         return (ln + " " + fn).strip()
     return (fallback_full or "").strip()
 
+def _pick(obj, *names):
+    for n in names:
+        if hasattr(obj, n):
+            v = getattr(obj, n)
+            if v not in (None, ""):
+                return v
+    return None
+
+
+def _applicant_detail(a: Applicant) -> dict:
+    """Payload chi tiết 1 hồ sơ cho form biên nhận (dd/MM/YYYY + bản ISO)."""
+    return {
+        "id": a.ma_so_hv,
+        "applicant_id": a.ma_so_hv,
+        "ma_so_hv": a.ma_so_hv,
+        "ma_ho_so": a.ma_ho_so,
+        "ngay_nhan_hs": _to_dmy(a.ngay_nhan_hs),
+        "ngay_nhan_hs_iso": _to_iso(a.ngay_nhan_hs),
+        "ho_ten": a.ho_ten,
+        "ho_dem": getattr(a, "ho_dem", None),
+        "ten": getattr(a, "ten", None),
+        "full_name": _display_name(getattr(a, "ho_dem", None), getattr(a, "ten", None), getattr(a, "ho_ten", None)),
+        "email_hoc_vien": getattr(a, "email_hoc_vien", None),
+        "ngay_sinh": _to_dmy(a.ngay_sinh),
+        "ngay_sinh_iso": _to_iso(a.ngay_sinh),
+        "so_dt": a.so_dt,
+        "nganh_nhap_hoc": _pick(a, "nganh_nhap_hoc", "nganh"),
+        "dot": _pick(a, "dot", "dot_tuyen"),
+        "khoa": _pick(a, "khoa", "khoa_hoc", "khoahoc", "nien_khoa"),
+        "da_tn_truoc_do": a.da_tn_truoc_do,
+        "ghi_chu": a.ghi_chu,
+        "nguoi_nhan_ky_ten": _pick(a, "nguoi_nhan_ky_ten", "nguoi_nhan", "nguoi_ky"),
+        "status": getattr(a, "status", None),
+        "printed": getattr(a, "printed", None),
+        "checklist_version_id": getattr(a, "checklist_version_id", None),
+        # 🆕 giới tính
+        "gioi_tinh": getattr(a, "gioi_tinh", None),
+        # 🆕 dân tộc
+        "dan_toc": getattr(a, "dan_toc", None),
+    }
+
 # ================= GET by code =================
 @router.get("/by-code/{key}")
 def get_by_code(
@@ -288,43 +315,7 @@ def get_by_code(
         ApplicantDoc.applicant_ma_so_hv == a.ma_so_hv
     ).all()
 
-    def pick(obj, *names):
-        for n in names:
-            if hasattr(obj, n):
-                v = getattr(obj, n)
-                if v not in (None, ""):
-                    return v
-        return None
-
-    applicant_payload = {
-        "id": a.ma_so_hv,
-        "applicant_id": a.ma_so_hv,
-        "ma_so_hv": a.ma_so_hv,
-        "ma_ho_so": a.ma_ho_so,
-        "ngay_nhan_hs": _to_dmy(a.ngay_nhan_hs),
-        "ngay_nhan_hs_iso": _to_iso(a.ngay_nhan_hs),
-        "ho_ten": a.ho_ten,
-        "ho_dem": getattr(a, "ho_dem", None),
-        "ten": getattr(a, "ten", None),
-        "full_name": _display_name(getattr(a, "ho_dem", None), getattr(a, "ten", None), getattr(a, "ho_ten", None)),
-        "email_hoc_vien": getattr(a, "email_hoc_vien", None),
-        "ngay_sinh": _to_dmy(a.ngay_sinh),
-        "ngay_sinh_iso": _to_iso(a.ngay_sinh),
-        "so_dt": a.so_dt,
-        "nganh_nhap_hoc": pick(a, "nganh_nhap_hoc", "nganh"),
-        "dot": pick(a, "dot", "dot_tuyen"),
-        "khoa": pick(a, "khoa", "khoa_hoc", "khoahoc", "nien_khoa"),
-        "da_tn_truoc_do": a.da_tn_truoc_do,
-        "ghi_chu": a.ghi_chu,
-        "nguoi_nhan_ky_ten": pick(a, "nguoi_nhan_ky_ten", "nguoi_nhan", "nguoi_ky"),
-        "status": getattr(a, "status", None),
-        "printed": getattr(a, "printed", None),
-        "checklist_version_id": getattr(a, "checklist_version_id", None),
-        # 🆕 giới tính
-        "gioi_tinh": getattr(a, "gioi_tinh", None),
-        # 🆕 dân tộc
-        "dan_toc": getattr(a, "dan_toc", None),
-    }
+    applicant_payload = _applicant_detail(a)
 
     write_audit(db, action="READ", target_type="Applicant", target_id=a.ma_so_hv, status="SUCCESS", request=request)
     db.commit()
@@ -372,12 +363,7 @@ def get_by_mshv(
     # Lấy danh mục checklist của version hiện tại (nếu có)
     checklist_items = []
     if getattr(a, "checklist_version_id", None):
-        q = db.query(ChecklistItem).filter(ChecklistItem.version_id == a.checklist_version_id)
-        if hasattr(ChecklistItem, "order_no"):
-            q = q.order_by(getattr(ChecklistItem, "order_no").asc())
-        else:
-            q = q.order_by(ChecklistItem.id.asc())
-        items = q.all()
+        items = checklist_cache.items_for_version(db, a.checklist_version_id)
 
         for it in items:
             cnt = docs_map.get(it.code, 0)
@@ -478,6 +464,85 @@ def get_by_mshv(
         "docs": [{"code": d.code, "so_luong": int(d.so_luong or 0)} for d in docs],
     }
 
+# ================= Lookup (1 lượt: hồ sơ + docs + checklist) =================
+def _lookup_applicant(db: Session, k: str) -> tuple[Optional[Applicant], str]:
+    """10 chữ số -> tra PK ma_so_hv; còn lại -> tra chính xác ma_ho_so (index). Không LIKE."""
+    if MSSV_REGEX.fullmatch(k):
+        a = db.get(Applicant, k)
+        if a:
+            return a, "mssv"
+    variants = list(dict.fromkeys([k, k.upper()]))
+    a = (
+        db.query(Applicant)
+        .filter(Applicant.ma_ho_so.in_(variants))
+        .order_by(Applicant.created_at.desc())
+        .first()
+    )
+    return a, "ma_ho_so"
+
+
+def _checklist_for(db: Session, a: Applicant, docs_map: dict[str, int]) -> dict:
+    """Checklist theo version của hồ sơ (NULL -> version đang active), đã ghép số lượng đã nộp."""
+    vid = getattr(a, "checklist_version_id", None)
+    v = checklist_cache.get_version(db, vid) if vid else checklist_cache.active_version(db, fallback_latest=False)
+    rows = checklist_cache.items_for_version(db, v.id) if v else []
+    items = []
+    for it in rows:
+        cnt = docs_map.get(it.code, 0)
+        items.append({
+            "code": it.code,
+            "display_name": it.display_name or it.code,
+            "order_no": getattr(it, "order_no", 0),
+            "so_luong": cnt,
+            "done": cnt > 0,
+        })
+    return {
+        "version_id": v.id if rows else vid,
+        "version_name": v.version_name if rows else None,
+        "items": items,
+    }
+
+
+@router.get("/lookup/{key}")
+def lookup_applicant(
+    key: str,
+    request: Request,
+    db: Session = Depends(get_db),
+    me=Depends(require_roles("Admin", "NhanVien", "CongTacVien")),
+):
+    """
+    Tra cứu hợp nhất cho trang biên nhận: nhận MSSV (10 số) hoặc mã hồ sơ,
+    trả về {applicant, docs, checklist} trong 1 response.
+    """
+    k = (key or "").strip()
+    if not k:
+        raise HTTPException(400, "Thiếu mã tra cứu")
+
+    a, kind = _lookup_applicant(db, k)
+    if not a:
+        write_audit(db, action="READ", target_type="Applicant", target_id=k,
+                    status="FAILURE", request=request)
+        db.commit()
+        raise HTTPException(404, "Không tìm thấy hồ sơ với MSSV / mã hồ sơ đã nhập.")
+
+    # Chặn hồ sơ đã xoá mềm
+    if getattr(a, "status", None) == "deleted" or getattr(a, "deleted_at", None):
+        raise HTTPException(410, "Hồ sơ đã bị xoá tạm.")
+
+    docs = [{"code": d.code, "so_luong": int(d.so_luong or 0)} for d in a.docs]
+    checklist = _checklist_for(db, a, {d["code"]: d["so_luong"] for d in docs})
+    payload = _applicant_detail(a)  # dựng trước commit (tránh nạp lại sau expire)
+
+    write_audit(db, action="READ", target_type="Applicant", target_id=a.ma_so_hv, status="SUCCESS", request=request)
+    db.commit()
+
+    return {
+        "matched_by": kind,
+        "applicant": payload,
+        "docs": docs,
+        "checklist": checklist,
+    }
+
 # ================= CREATE =================
 @router.post("", status_code=201)
 @router.post("/", status_code=201)
@@ -607,6 +672,7 @@ def create_applicant(
         request=request,
     )
     db.commit()
+    receipt_prerender.enqueue(a.ma_so_hv)  # render sẵn biên nhận (nếu bật)
 
     return {
         "ma_so_hv": a.ma_so_hv,
@@ -617,15 +683,145 @@ def create_applicant(
 
 
 # ================= SEARCH =================
+# Cột cần cho danh sách (/search): tránh hydrate cả bản ghi
+_LIST_COLUMNS = (
+    Applicant.ma_so_hv, Applicant.ma_ho_so, Applicant.ho_dem, Applicant.ten, Applicant.ho_ten,
+    Applicant.email_hoc_vien, Applicant.ngay_nhan_hs, Applicant.dot, Applicant.khoa,
+    Applicant.nganh_nhap_hoc, Applicant.nguoi_nhan_ky_ten, Applicant.gioi_tinh, Applicant.dan_toc,
+    Applicant.created_at,
+)
+
+# Tổng số bản ghi theo từ khoá: cache theo data_version('applicants') -> ghi mới là tự hết hạn
+_SEARCH_TOTAL_CACHE = TTLCache(ttl=300, maxsize=512)
+
+
+def _encode_cursor(created_at: Optional[datetime], ma_so_hv: str) -> str:
+    raw = json.dumps([created_at.isoformat() if created_at else None, ma_so_hv], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(token: str) -> tuple[Optional[datetime], str]:
+    try:
+        pad = "=" * (-len(token) % 4)
+        ca, mssv = json.loads(base64.urlsafe_b64decode(token + pad).decode("utf-8"))
+        return (datetime.fromisoformat(ca) if ca else None), str(mssv)
+    except Exception:
+        raise HTTPException(status_code=400, detail="cursor không hợp lệ")
+
+
+def _keyset_after(created_at: Optional[datetime], ma_so_hv: str):
+    """Điều kiện 'đứng sau' (created_at, ma_so_hv) theo thứ tự DESC (NULL xếp cuối)."""
+    if created_at is None:
+        return and_(Applicant.created_at.is_(None), Applicant.ma_so_hv < ma_so_hv)
+    return or_(
+        Applicant.created_at < created_at,
+        and_(Applicant.created_at == created_at, Applicant.ma_so_hv < ma_so_hv),
+        Applicant.created_at.is_(None),
+    )
+
+
+# Khoá sắp xếp: tên -> [(cột, kiểu)] ; kiểu: 'vi' (collation tiếng Việt) | 'str' | 'date'
+# luôn thêm ma_so_hv cuối cùng để thứ tự ổn định (và làm khoá keyset).
+# Sắp xếp trên cột trần (không COALESCE) để dùng được index; NULL xếp đầu khi tăng dần
+# (MySQL và SQLite giống nhau) và được xử lý riêng trong điều kiện keyset.
+_SORT_KEYS: dict[str, list[tuple[str, str]]] = {
+    "name": [("ten", "vi"), ("ho_dem", "vi")],
+    "ten": [("ten", "vi"), ("ho_dem", "vi")],
+    "ho_dem": [("ho_dem", "vi"), ("ten", "vi")],
+    "ma_so_hv": [],
+    "ma_ho_so": [("ma_ho_so", "str")],
+    "ngay_nhan_hs": [("ngay_nhan_hs", "date")],
+    "nganh": [("nganh_nhap_hoc", "vi")],
+    "dot": [("dot", "str")],
+    "khoa": [("khoa", "str")],
+    "nguoi_nhan": [("nguoi_nhan_ky_ten", "vi")],
+}
+def _sort_exprs(db: Session, sort: str) -> list[tuple[object, str, str]]:
+    """[(biểu thức SQL, tên thuộc tính, kiểu)] — cột trần; cột 'vi' mang collation tiếng Việt."""
+    bind = db.get_bind()
+    out = []
+    for attr, kind in _SORT_KEYS[sort]:
+        col = Applicant.__table__.c[attr]
+        out.append((vi_sort_column(col, bind) if kind == "vi" else col, attr, kind))
+    return out
+
+
+def _row_sort_values(a: Applicant, exprs) -> list:
+    vals = []
+    for _, attr, kind in exprs:
+        v = getattr(a, attr, None)
+        vals.append(v.isoformat() if (kind == "date" and v is not None) else v)
+    return vals
+
+
+def _after(c, v, desc: bool):
+    """c đứng sau v (NULL là nhỏ nhất)."""
+    if v is None:
+        return false() if desc else c.is_not(None)
+    return or_(c < v, c.is_(None)) if desc else (c > v)
+
+
+def _keyset_generic(exprs, values: list, mssv: str, desc: bool):
+    """(e1, e2, ..., ma_so_hv) đứng sau (v1, v2, ..., mssv) theo chiều sắp xếp."""
+    cols = [e for e, _, _ in exprs] + [Applicant.ma_so_hv]
+    vals = list(values) + [mssv]
+    conds = []
+    for i, (c, v) in enumerate(zip(cols, vals)):
+        eqs = [cols[j].is_(None) if vals[j] is None else cols[j] == vals[j] for j in range(i)]
+        conds.append(and_(*eqs, _after(c, v, desc)))
+    return or_(*conds)
+
+
+def _encode_sort_cursor(sort: str, desc: bool, values: list, mssv: str) -> str:
+    raw = json.dumps({"s": sort, "d": "desc" if desc else "asc", "v": values, "m": mssv}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_sort_cursor(token: str, sort: str, desc: bool, exprs) -> tuple[list, str]:
+    try:
+        pad = "=" * (-len(token) % 4)
+        obj = json.loads(base64.urlsafe_b64decode(token + pad).decode("utf-8"))
+        if obj["s"] != sort or obj["d"] != ("desc" if desc else "asc") or len(obj["v"]) != len(exprs):
+            raise ValueError
+        vals = [
+            None if v is None else (date.fromisoformat(v) if kind == "date" else str(v))
+            for v, (_, _, kind) in zip(obj["v"], exprs)
+        ]
+        return vals, str(obj["m"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="cursor không hợp lệ (hoặc không khớp sort)")
+
+
 @router.get("/search")
 def search_applicants(
     q: Optional[str] = Query(None, description="Để trống = lấy tất cả"),
     page: int = Query(1, ge=1),
     size: int = Query(20, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Phân trang keyset: '' = trang đầu, sau đó dùng 'next' trả về"),
+    with_total: Optional[bool] = Query(None, description="Mặc định: có total ở chế độ page, không ở chế độ cursor"),
+    # 🆕 lọc phía server
+    dot: Optional[str] = Query(None),
+    khoa: Optional[str] = Query(None),
+    status_: Optional[str] = Query(None, alias="status"),
+    printed: Optional[bool] = Query(None),
+    nganh: Optional[str] = Query(None, description="nganh_nhap_hoc"),
+    ngay_from: Optional[str] = Query(None, description="Ngày nhận HS từ (dd/MM/YYYY hoặc YYYY-MM-DD)"),
+    ngay_to: Optional[str] = Query(None, description="Ngày nhận HS đến (bao gồm)"),
+    # 🆕 sắp xếp phía server
+    sort: Optional[str] = Query(None, description="created_at | name | ten | ho_dem | ma_so_hv | ma_ho_so | ngay_nhan_hs | nganh | dot | khoa | nguoi_nhan"),
+    dir: Optional[str] = Query(None, pattern="^(asc|desc)$"),
     db: Session = Depends(get_db),
     me=Depends(require_roles("Admin", "NhanVien", "CongTacVien")),
 ):
     qn = (q or "").strip() or None
+    use_cursor = cursor is not None
+    if with_total is None:
+        with_total = not use_cursor
+
+    sort_key = (sort or "created_at").strip()
+    if sort_key != "created_at" and sort_key not in _SORT_KEYS:
+        raise HTTPException(400, f"sort không hợp lệ: {sort_key}")
+    desc = (dir or ("desc" if sort_key == "created_at" else "asc")) == "desc"
 
     # Bắt đầu query
     query = db.query(Applicant)
@@ -633,30 +829,70 @@ def search_applicants(
     # Ẩn toàn bộ hồ sơ đã bị xoá mềm (tự động nhận diện cột)
     query = exclude_deleted(Applicant, query)
 
-    # Nếu có từ khoá tìm kiếm
+    # Nếu có từ khoá tìm kiếm: không phân biệt dấu, dùng FULLTEXT/FTS5 trên search_text
     if qn:
-        like = f"%{qn}%"
-        # concat tên tách đôi (an toàn nếu cột chưa tồn tại trên DB cũ: dùng getattr)
-        name_expr = func.concat(
-            func.coalesce(Applicant.ho_dem, ""), literal(" "),  # Sửa ở đây
-            func.coalesce(Applicant.ten, "")
-        )
-        query = query.filter(
-            or_(
-                Applicant.ho_ten.ilike(like),         # tương thích
-                name_expr.ilike(like),                # 🆕 tìm theo ho_dem + ten
-                Applicant.ma_ho_so.ilike(like),
-                Applicant.ma_so_hv.ilike(like),
-            )
-        )
+        query = apply_search(query, db, qn)
 
-    total = query.count()
-    rows = (
-        query.order_by(Applicant.created_at.desc())
-        .offset((page - 1) * size)
-        .limit(size)
-        .all()
+    # Bộ lọc (so sánh bằng -> dùng được index khoa/dot, ngay_nhan_hs, nganh...)
+    f_dot, f_khoa, f_status, f_nganh = (
+        (x or "").strip() or None for x in (dot, khoa, status_, nganh)
     )
+    d_from, d_to = _parse_date_flexible(ngay_from), _parse_date_flexible(ngay_to)
+    if f_dot:
+        query = query.filter(Applicant.dot == f_dot)
+    if f_khoa:
+        query = query.filter(Applicant.khoa == f_khoa)
+    if f_status:
+        query = query.filter(Applicant.status == f_status)
+    if printed is not None:
+        query = query.filter(Applicant.printed.is_(printed))
+    if f_nganh:
+        query = query.filter(Applicant.nganh_nhap_hoc == f_nganh)
+    if d_from:
+        query = query.filter(Applicant.ngay_nhan_hs >= d_from)
+    if d_to:
+        query = query.filter(Applicant.ngay_nhan_hs <= d_to)
+
+    total = None
+    if with_total:
+        key = (qn, f_dot, f_khoa, f_status, printed, f_nganh, d_from, d_to, data_version("applicants"))
+        total = _SEARCH_TOTAL_CACHE.get_or_set(key, query.order_by(None).count)
+
+    # chỉ nạp các cột trả về (không docs, không ghi_chu/search_text...)
+    base = query.options(load_only(*_LIST_COLUMNS))
+    next_cursor = None
+
+    if sort_key == "created_at" and desc:
+        ordered = base.order_by(Applicant.created_at.desc(), Applicant.ma_so_hv.desc())
+        if use_cursor:
+            # keyset: trang sâu tốn như trang 1 (dùng index created_at, ma_so_hv)
+            if cursor:
+                ordered = ordered.filter(_keyset_after(*_decode_cursor(cursor)))
+            rows = ordered.limit(size + 1).all()
+            if len(rows) > size:
+                rows = rows[:size]
+                next_cursor = _encode_cursor(rows[-1].created_at, rows[-1].ma_so_hv)
+        else:
+            rows = ordered.offset((page - 1) * size).limit(size).all()
+    else:
+        if sort_key == "created_at":
+            exprs = [(Applicant.created_at, "created_at", "datetime")]
+        else:
+            exprs = _sort_exprs(db, sort_key)
+        order_cols = [e for e, _, _ in exprs] + [Applicant.ma_so_hv]
+        ordered = base.order_by(*[(c.desc() if desc else c.asc()) for c in order_cols])
+        if use_cursor and sort_key != "created_at":
+            if cursor:
+                vals, mssv = _decode_sort_cursor(cursor, sort_key, desc, exprs)
+                ordered = ordered.filter(_keyset_generic(exprs, vals, mssv, desc))
+            rows = ordered.limit(size + 1).all()
+            if len(rows) > size:
+                rows = rows[:size]
+                next_cursor = _encode_sort_cursor(sort_key, desc, _row_sort_values(rows[-1], exprs), rows[-1].ma_so_hv)
+        else:
+            if use_cursor:
+                raise HTTPException(400, "cursor chỉ hỗ trợ sort=created_at theo chiều giảm dần")
+            rows = ordered.offset((page - 1) * size).limit(size).all()
 
     return {
         "items": [
@@ -681,9 +917,10 @@ def search_applicants(
             }
             for a in rows
         ],
-        "page": page,
+        "page": None if use_cursor else page,
         "size": size,
         "total": total,
+        "next": next_cursor,
     }
 
 
@@ -713,9 +950,7 @@ def find_by_ma_ho_so(
         raise HTTPException(410, "Hồ sơ đã bị xoá tạm.")
 
     docs = db.query(ApplicantDoc).filter_by(applicant_ma_so_hv=a.ma_so_hv).all()
-    q = db.query(ChecklistItem).filter(ChecklistItem.version_id == a.checklist_version_id)
-    q = q.order_by(getattr(ChecklistItem, "order_no", ChecklistItem.id).asc())
-    items = q.all()
+    items = checklist_cache.items_for_version(db, a.checklist_version_id)
 
     return {
         "ma_so_hv": a.ma_so_hv,
@@ -878,7 +1113,7 @@ def update_applicant(
     if auto_assign and not (a.ma_ho_so and str(a.ma_ho_so).strip()):
         _khoa = (body.get("khoa") if "khoa" in body else a.khoa)
         _dot  = (body.get("dot")  if "dot"  in body else a.dot)
-        a.ma_ho_so = _next_seq4(db, _khoa, _dot)
+        a.ma_ho_so = next_ma_ho_so_seq(db, _khoa, _dot)
 
     # Lưu người cập nhật gần nhất
     a.nguoi_nhan_ky_ten = getattr(me, "full_name", None) or getattr(me, "username", None)
@@ -938,6 +1173,8 @@ def update_applicant(
         request=request,
     )
     db.commit()
+    receipt_cache.invalidate_applicant(a.ma_so_hv)  # biên nhận cũ không còn đúng
+    receipt_prerender.enqueue(a.ma_so_hv)
 
     return {
         "ok": True,
@@ -1011,12 +1248,13 @@ def delete_applicant(
         request=request,
     )
     db.commit()
+    receipt_cache.invalidate_applicant(ma_so_hv)
 
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 # ================= PRINT (A4, A5) by MSSV =================
 def _do_print(ma_so_hv: str, mark_printed: bool, db: Session, request: Request, a5: bool = False):
-    from app.services.pdf_service import render_single_pdf, render_single_pdf_a5
+    from app.services.pdf_service import render_receipt_cached
 
     ensure_mssv(ma_so_hv)
     a = db.query(Applicant).filter(Applicant.ma_so_hv == ma_so_hv).first()
@@ -1027,15 +1265,8 @@ def _do_print(ma_so_hv: str, mark_printed: bool, db: Session, request: Request,
     if hasattr(Applicant, "deleted_at") and getattr(a, "deleted_at", None):
         raise HTTPException(410, "Hồ sơ đã bị xoá tạm, không thể in.")
 
-    q = db.query(ChecklistItem).filter(ChecklistItem.version_id == a.checklist_version_id)
-    if hasattr(ChecklistItem, "order_no"):
-        q = q.order_by(getattr(ChecklistItem, "order_no").asc())
-    else:
-        q = q.order_by(ChecklistItem.id.asc())
-    items = q.all()
-
-    docs = db.query(ApplicantDoc).filter(ApplicantDoc.applicant_ma_so_hv == a.ma_so_hv).all()
-    pdf_bytes = (render_single_pdf_a5 if a5 else render_single_pdf)(a, items, docs)
+    items, docs = receipt_prerender.load_receipt_inputs(db, a)
+    pdf_bytes = render_receipt_cached(a, items, docs, a5=a5)
 
     if mark_printed:
         a.printed = True
@@ -1097,10 +1328,45 @@ def print_applicant_a5_post(
 ):
     return _do_print(ma_so_hv, mark_printed, db, request=request, a5=True)
 
+# ================= Stats (dashboard) =================
+@router.get("/stats")
+def applicant_stats(
+    khoa: Optional[str] = Query(None),
+    dot: Optional[str] = Query(None),
+    db: Session = Depends(get_db),
+    me=Depends(require_roles("Admin", "NhanVien", "CongTacVien")),
+):
+    """
+    Thống kê gộp bằng GROUP BY (cache, tự hết hạn khi có ghi applicants/docs/checklist).
+    - groups: các ô (khoa, dot, nganh, status, printed, done, docs_complete, count) để client lọc nhanh
+    - phần còn lại: tổng hợp theo khoa/dot truyền vào
+    """
+    groups = stats_service.get_groups(db)
+    return {**stats_service.summarize(groups, khoa, dot), "groups": groups}
+
+@router.get("/facets")
+def applicant_facets(
+    khoa: Optional[str] = Query(None, description="Giới hạn đợt/ngành trong khoá này"),
+    dot: Optional[str] = Query(None, description="Giới hạn ngành trong đợt này"),
+    db: Session = Depends(get_db),
+    me=Depends(require_roles("Admin", "NhanVien", "CongTacVien")),
+):
+    """
+    Giá trị cho dropdown lọc: {khoa: [{value, count}], dot: [...], nganh: [...]}.
+    GROUP BY trên index (khoa, dot, ...) / nganh_nhap_hoc, cache theo data_version.
+    """
+    return stats_service.get_facets(db, khoa, dot)
+
 # ================= Recent =================
 @router.get("/recent")
 def get_recent_applicants(db: Session = Depends(get_db), limit: int = 50):
-    rows = db.query(Applicant).order_by(Applicant.created_at.desc()).limit(limit).all()
+    rows = (
+        db.query(Applicant)
+        .options(load_only(Applicant.ma_so_hv, Applicant.ma_ho_so, Applicant.ho_ten, Applicant.ho_dem, Applicant.ten))
+        .order_by(Applicant.created_at.desc())
+        .limit(limit)
+        .all()
+    )
     return [{
         "ma_so_hv": a.ma_so_hv,
         "ma_ho_so": a.ma_ho_so,
@@ -13,6 +13,8 @@ from app.db.session import get_db
 from app.routers.auth import require_roles
 from app.models.applicant import Applicant
 from app.services.audit import write_audit
+from app.services.applicant_bulk import bulk_create_applicants, BULK_MAX_ROWS
+from app.services import receipt_cache
 
 # ------------------------------------------------------------
 router = APIRouter(prefix="/applicants", tags=["Applicants (batch)"])
@@ -359,4 +361,57 @@ def applicants_batch_update(
     dry_run: bool = Query(False),
     db: Session = Depends(get_db),
 ):
-    return _handle_batch_update(request, payload, dry_run, db)
+    resp = _handle_batch_update(request, payload, dry_run, db)
+    if not dry_run:
+        # biên nhận đã cache của các hồ sơ vừa sửa không còn đúng
+        receipt_cache.invalidate_applicants(r.ma_so_hv for r in resp.results if r.status == "UPDATED")
+    return resp
+
+
+# ---------------------- Bulk create (import) ----------------
+class BulkCreateRequest(BaseModel):
+    rows: List[Dict[str, Any]]
+    start_index: int = 1  # số thứ tự dòng đầu tiên (để FE ghép kết quả khi gửi nhiều lô)
+
+class BulkCreateRowResult(BaseModel):
+    idx: int
+    status: str  # OK|ERR|SKIP
+    ma_so_hv: Optional[str] = None
+    ma_ho_so: Optional[str] = None
+    msg: str = ""
+
+class BulkCreateResponse(BaseModel):
+    total: int
+    ok: int
+    err: int
+    skip: int
+    results: List[BulkCreateRowResult]
+
+@router.post("/bulk", response_model=BulkCreateResponse)
+@router.post("/bulk/", response_model=BulkCreateResponse)
+def applicants_bulk_create(
+    request: Request,
+    payload: BulkCreateRequest = Body(...),
+    db: Session = Depends(get_db),
+    me=Depends(require_roles("Admin", "NhanVien", "CongTacVien")),
+):
+    if not payload.rows:
+        raise HTTPException(400, "Danh sách rỗng")
+    if len(payload.rows) > BULK_MAX_ROWS:
+        raise HTTPException(413, f"Tối đa {BULK_MAX_ROWS} dòng mỗi lần gửi")
+
+    results = bulk_create_applicants(
+        db,
+        payload.rows,
+        nguoi_nhan=(getattr(me, "full_name", None) or getattr(me, "username", None)),
+        request=request,
+        start_index=payload.start_index,
+    )
+    count = lambda st: sum(1 for r in results if r["status"] == st)
+    return BulkCreateResponse(
+        total=len(results),
+        ok=count("OK"),
+        err=count("ERR"),
+        skip=count("SKIP"),
+        results=results,
+    )
@@ -1,17 +1,19 @@
 from __future__ import annotations
 from datetime import datetime
 from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Body, Query
+from fastapi.responses import FileResponse
 import json
+import os
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 
 from app.db.session import SessionLocal, get_db
-from app.core.config import settings
 from app.services.sendmail_service import send_html_email, render_email
-from app.services import pdf_service
+from app.services import checklist_cache, receipt_archive
 from app.models.applicant import Applicant, ApplicantDoc
-from app.models.checklist import ChecklistItem
 from app.models.email_log import EmailLog
+from app.models.receipt_archive import ReceiptArchive
+from app.routers.auth import require_roles
 from typing import List, Dict, Any
 from sqlalchemy import select
 from types import SimpleNamespace
@@ -25,14 +27,8 @@ def _load_items_docs(db: Session, a: Applicant):
     Trả về: (items_checklist, docs_ctx_list)
     docs_ctx_list: list[{'code','name','received','so_luong','received_at','note'}]
     """
-    items = []
-    if getattr(a, "checklist_version_id", None):
-        items = (
-            db.query(ChecklistItem)
-            .filter(ChecklistItem.version_id == a.checklist_version_id)
-            .order_by(ChecklistItem.id.asc())
-            .all()
-        )
+    # cache checklist (order_no, id) — cùng thứ tự bản in -> dùng lại biên nhận đã render
+    items = checklist_cache.items_for_version(db, getattr(a, "checklist_version_id", None))
 
     # Ưu tiên bảng ApplicantDoc
     docs_db = (
@@ -256,10 +252,8 @@ def get_email_draft(
         )
         # Chuẩn hoá dữ liệu docs để PDF đọc theo thuộc tính .code/.so_luong
         docs_for_pdf = _normalize_docs_for_pdf(docs_email)
-        pdf_path = pdf_service.save_receipt_pdf_file(
-            a=a, items=items, docs=docs_for_pdf, a5=a5, out_dir=settings.RECEIPTS_DIR
-        )
-        attach_path = pdf_path
+        row, _ = receipt_archive.archive_receipt(db, a, items, docs_for_pdf, a5=a5)
+        attach_path = f"/applicants/{a.ma_so_hv}/receipts/{row.id}"   # tải qua API (kho không public)
 
     return {
         "to_email": to_email,
@@ -289,16 +283,14 @@ def send_email_generic(
     to_email = _ensure_to_email(a)
     items, docs_ctx = _load_items_docs(db, a)
     docs_email = _merge_items_with_docs_for_email(items, docs_ctx)
-    att_paths: List[str] = []
+    att_paths: List[tuple] = []
     missing_list = [d["name"] for d in docs_email if int(d.get("so_luong") or 0) <= 0]
     has_missing = bool(missing_list)
 
     if tpl == "confirmation" and attach_receipt:
         docs_for_pdf = _normalize_docs_for_pdf(docs_ctx)
-        pdf_path = pdf_service.save_receipt_pdf_file(
-            a=a, items=items, docs=docs_for_pdf, a5=a5, out_dir=settings.RECEIPTS_DIR
-        )
-        att_paths.append(pdf_path)
+        row, _ = receipt_archive.archive_receipt(db, a, items, docs_for_pdf, a5=a5)
+        att_paths.append(receipt_archive.attachment(row))   # (file trong kho, tên hiển thị)
 
     subj = subject or ("[V-HTPTĐT] BIÊN NHẬN HỒ SƠ NHẬP HỌC" if tpl == "confirmation"
                        else "[V-HTPTĐT] THÔNG BÁO THẺ SINH VIÊN")
@@ -425,3 +417,29 @@ def send_email_batch(
 
     bg.add_task(_task_batch, ids, tpl)
     return {"ok": True, "count": len(ids), "template": tpl}
+
+
+# ---------- Kho biên nhận đã gửi ----------
+@router.get("/{ma_so_hv}/receipts")
+def list_archived_receipts(
+    ma_so_hv: str,
+    db: Session = Depends(get_db),
+    me=Depends(require_roles("Admin", "NhanVien", "CongTacVien")),
+):
+    return [r.to_dict() for r in receipt_archive.list_for_applicant(db, ma_so_hv)]
+
+
+@router.get("/{ma_so_hv}/receipts/{receipt_id}")
+def get_archived_receipt(
+    ma_so_hv: str,
+    receipt_id: int,
+    db: Session = Depends(get_db),
+    me=Depends(require_roles("Admin", "NhanVien", "CongTacVien")),
+):
+    row = db.get(ReceiptArchive, receipt_id)
+    if not row or row.applicant_ma_so_hv != ma_so_hv:
+        raise HTTPException(404, "Không tìm thấy biên nhận")
+    path, name = receipt_archive.attachment(row)
+    if not os.path.exists(path):
+        raise HTTPException(404, "File biên nhận không còn trong kho")
+    return FileResponse(path, media_type="application/pdf", filename=name, content_disposition_type="inline")
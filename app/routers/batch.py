@@ -2,17 +2,17 @@
 from __future__ import annotations
 
 from datetime import datetime, timedelta, date
-import io
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Request
-from starlette.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 
 from app.db.session import get_db
-from app.models.applicant import Applicant, ApplicantDoc
-from app.models.checklist import ChecklistItem
-from app.services.pdf_service import render_batch_pdf
+from app.models.applicant import Applicant
+from app.services import checklist_cache
+from app.services.pdf_batch import render_batch_pdf_parallel
+from app.services.pdf_service import render_batch_pdf_a5_to
+from app.utils.spool import new_spool, spooled_response
 from app.utils.soft_delete import exclude_deleted, ensure_not_deleted
 
 # Lấy actor & ghi audit
@@ -83,30 +83,12 @@ def _fmt_dmy(d: date) -> str:
     return d.strftime("%d/%m/%Y") if d else ""
 
 def _load_items_by_version(db: Session, version_ids):
-    items_by_version = {}
-    for vid in version_ids:
-        q = db.query(ChecklistItem).filter(ChecklistItem.version_id == vid)
-        if hasattr(ChecklistItem, "order_index"):
-            q = q.order_by(getattr(ChecklistItem, "order_index").asc())
-        elif hasattr(ChecklistItem, "order_no"):
-            q = q.order_by(getattr(ChecklistItem, "order_no").asc())
-        else:
-            q = q.order_by(ChecklistItem.id.asc())
-        items_by_version[vid] = q.all()
-    return items_by_version
+    # 1 truy vấn cho mọi phiên bản + cache theo version_id (checklist_cache)
+    return checklist_cache.load_items_by_versions(db, version_ids)
 
 def _docs_by_mssv(db: Session, mssv_list):
-    out = {}
-    if not mssv_list:
-        return out
-    docs = (
-        db.query(ApplicantDoc)
-        .filter(ApplicantDoc.applicant_ma_so_hv.in_(mssv_list))
-        .all()
-    )
-    for d in docs:
-        out.setdefault(d.applicant_ma_so_hv, []).append(d)
-    return out
+    # IN (...) chia lô -> đợt lớn không vượt giới hạn gói tin MySQL
+    return checklist_cache.docs_by_mssv(db, mssv_list)
 
 def _is_not_deleted(a: Applicant) -> bool:
     if hasattr(a, "deleted_at") and getattr(a, "deleted_at", None):
@@ -126,21 +108,35 @@ def _dedup_latest_by_mssv(apps):
     return list(by.values())
 
 
+def _load_print_inputs(db: Session, apps):
+    version_ids = {a.checklist_version_id for a in apps if a.checklist_version_id is not None}
+    items_by_version = _load_items_by_version(db, version_ids)
+
+    valid_mssv = {a.ma_so_hv for a in apps}
+    docs_by_app = _docs_by_mssv(db, valid_mssv)
+    docs_by_app = {m: ds for (m, ds) in docs_by_app.items() if m in valid_mssv}
+    return items_by_version, docs_by_app
+
+def _render_spool(apps, items_by_version, docs_by_app, *, a5: bool, two_up: bool):
+    spool = new_spool()
+    if a5:
+        render_batch_pdf_a5_to(spool, apps, items_by_version, docs_by_app, two_up=two_up)
+    else:
+        render_batch_pdf_parallel(apps, items_by_version, docs_by_app, out=spool)
+    return spool
+
+def _layout_filters(a5: bool, two_up: bool) -> dict:
+    return {"size": "A5", "two_up": bool(two_up)} if a5 else {}
+
+
 # ------------------- In PDF gộp theo NGÀY -------------------
-@router.get("/print")
-def batch_print(
-    request: Request,
-    day: str | None = Query(None, description="YYYY-MM-DD (tùy chọn)"),
-    date_q: str | None = Query(None, alias="date", description="dd/MM/YYYY (khuyến nghị)"),
-    db: Session = Depends(get_db),
-    user=Depends(require_roles("Admin", "NhanVien")),
-):
-    raw = date_q or day
+def _print_day(request: Request, raw: str | None, db: Session, user, *, a5: bool = False, two_up: bool = False):
+    lf = _layout_filters(a5, two_up)
     if not raw:
         _audit_print_or_export(
             request=request, db=db, user=user,
             action="PRINT", scope="day",
-            filters={"date": None}, count=0,
+            filters={"date": None, **lf}, count=0,
             status="FAIL", error="MISSING_DATE"
         )
         raise HTTPException(status_code=400, detail="Thiếu tham số 'date=dd/MM/YYYY' hoặc 'day=YYYY-MM-DD'.")
@@ -165,55 +161,51 @@ def batch_print(
         _audit_print_or_export(
             request=request, db=db, user=user,
             action="PRINT", scope="day",
-            filters={"date": d.isoformat()}, count=0,
+            filters={"date": d.isoformat(), **lf}, count=0,
             status="FAIL", error="NO_DATA"
         )
         raise HTTPException(status_code=404, detail=f"Không có hồ sơ nào trong ngày { _fmt_dmy(d) }")
 
-    version_ids = {a.checklist_version_id for a in apps if a.checklist_version_id is not None}
-    items_by_version = _load_items_by_version(db, version_ids)
-
-    valid_mssv = {a.ma_so_hv for a in apps}
-    docs_by_app = _docs_by_mssv(db, valid_mssv)
-    docs_by_app = {m: ds for (m, ds) in docs_by_app.items() if m in valid_mssv}
-
-    pdf_bytes = render_batch_pdf(apps, items_by_version, docs_by_app)
+    items_by_version, docs_by_app = _load_print_inputs(db, apps)
+    spool = _render_spool(apps, items_by_version, docs_by_app, a5=a5, two_up=two_up)
 
     # Audit OK
     _audit_print_or_export(
         request=request, db=db, user=user,
         action="PRINT", scope="day",
-        filters={"date": d.isoformat()}, count=len(apps),
+        filters={"date": d.isoformat(), **lf}, count=len(apps),
         status="SUCCESS"
     )
 
-    filename = f"Batch_{d.strftime('%d-%m-%Y')}.pdf"
-    return StreamingResponse(
-        io.BytesIO(pdf_bytes),
-        media_type="application/pdf",
-        headers={"Content-Disposition": f'inline; filename=\"{filename}\"'},
-    )
+    prefix = "Batch_A5" if a5 else "Batch"
+    filename = f"{prefix}_{d.strftime('%d-%m-%Y')}.pdf"
+    return spooled_response(spool, media_type="application/pdf", filename=filename, disposition="inline")
 
+@router.get("/print")
+def batch_print(
+    request: Request,
+    day: str | None = Query(None, description="YYYY-MM-DD (tùy chọn)"),
+    date_q: str | None = Query(None, alias="date", description="dd/MM/YYYY (khuyến nghị)"),
+    db: Session = Depends(get_db),
+    user=Depends(require_roles("Admin", "NhanVien")),
+):
+    return _print_day(request, date_q or day, db, user)
 
-# ------------------- In PDF gộp theo ĐỢT -------------------
-@router.get("/print-dot")
-def batch_print_dot(
+@router.get("/print-a5")
+def batch_print_a5(
     request: Request,
-    dot: str = Query(..., description="Tên đợt, ví dụ: 'Đợt 1/2025' hoặc '9'"),
-    khoa: str | None = Query(None, description="(Tuỳ chọn) Lọc theo Khóa, ví dụ: '27'"),
+    day: str | None = Query(None, description="YYYY-MM-DD (tùy chọn)"),
+    date_q: str | None = Query(None, alias="date", description="dd/MM/YYYY (khuyến nghị)"),
+    two_up: bool = Query(False, description="Ghép 2 biên nhận A5 / tờ A4"),
     db: Session = Depends(get_db),
     user=Depends(require_roles("Admin", "NhanVien")),
 ):
-    dot_norm = (dot or "").strip()
-    if not dot_norm:
-        _audit_print_or_export(
-            request=request, db=db, user=user,
-            action="PRINT", scope="dot",
-            filters={"dot": None, "khoa": (khoa or "")}, count=0,
-            status="FAIL", error="MISSING_DOT"
-        )
-        raise HTTPException(status_code=400, detail="Thiếu tham số 'dot'.")
+    return _print_day(request, date_q or day, db, user, a5=True, two_up=two_up)
 
+
+# ------------------- In PDF gộp theo ĐỢT -------------------
+def _dot_apps(db: Session, dot_norm: str, khoa: str | None):
+    """Hồ sơ (chưa xoá) của đợt, tuỳ chọn đúng khóa; thứ tự in theo thời gian tạo."""
     q = (
         db.query(Applicant)
         .filter(Applicant.dot.isnot(None))
@@ -227,42 +219,71 @@ def batch_print_dot(
     apps = q.order_by(Applicant.created_at.asc(), Applicant.ma_so_hv.asc()).all()
 
     apps = [a for a in apps if _is_not_deleted(a) and ensure_not_deleted(a, raise_http_exception=False)]
-    apps = _dedup_latest_by_mssv(apps)
+    return _dedup_latest_by_mssv(apps)
+
+def _dot_pdf_filename(dot_norm: str, khoa: str | None, a5: bool) -> str:
+    safe_dot = "".join(ch if ch.isalnum() or ch in "-_" else "_" for ch in dot_norm)
+    safe_khoa = "".join(ch if ch.isalnum() or ch in "-_" else "_" for ch in (khoa or ""))
+    suffix = f"{safe_dot}" + (f"_Khoa_{safe_khoa}" if safe_khoa else "")
+    prefix = "Batch_A5_Dot" if a5 else "Batch_Dot"
+    return f"{prefix}_{suffix}.pdf"
+
+def _print_dot(request: Request, dot: str, khoa: str | None, db: Session, user, *, a5: bool = False, two_up: bool = False):
+    lf = _layout_filters(a5, two_up)
+    dot_norm = (dot or "").strip()
+    if not dot_norm:
+        _audit_print_or_export(
+            request=request, db=db, user=user,
+            action="PRINT", scope="dot",
+            filters={"dot": None, "khoa": (khoa or ""), **lf}, count=0,
+            status="FAIL", error="MISSING_DOT"
+        )
+        raise HTTPException(status_code=400, detail="Thiếu tham số 'dot'.")
+
+    apps = _dot_apps(db, dot_norm, khoa)
 
     if not apps:
         _audit_print_or_export(
             request=request, db=db, user=user,
             action="PRINT", scope="dot",
-            filters={"dot": dot_norm, "khoa": (khoa or "")}, count=0,
+            filters={"dot": dot_norm, "khoa": (khoa or ""), **lf}, count=0,
             status="FAIL", error="NO_DATA"
         )
         raise HTTPException(status_code=404, detail="Không có hồ sơ nào thuộc đợt đã chọn.")
 
-    version_ids = {a.checklist_version_id for a in apps if a.checklist_version_id is not None}
-    items_by_version = _load_items_by_version(db, version_ids)
-
-    valid_mssv = {a.ma_so_hv for a in apps}
-    docs_by_app = _docs_by_mssv(db, valid_mssv)
-    docs_by_app = {m: ds for (m, ds) in docs_by_app.items() if m in valid_mssv}
-
-    pdf_bytes = render_batch_pdf(apps, items_by_version, docs_by_app)
+    items_by_version, docs_by_app = _load_print_inputs(db, apps)
+    spool = _render_spool(apps, items_by_version, docs_by_app, a5=a5, two_up=two_up)
 
     _audit_print_or_export(
         request=request, db=db, user=user,
         action="PRINT", scope="dot",
-        filters={"dot": dot_norm, "khoa": (khoa or "")}, count=len(apps),
+        filters={"dot": dot_norm, "khoa": (khoa or ""), **lf}, count=len(apps),
         status="SUCCESS"
     )
 
-    safe_dot = "".join(ch if ch.isalnum() or ch in "-_" else "_" for ch in dot_norm)
-    safe_khoa = "".join(ch if ch.isalnum() or ch in "-_" else "_" for ch in (khoa or ""))
-    suffix = f"{safe_dot}" + (f"_Khoa_{safe_khoa}" if safe_khoa else "")
-    filename = f"Batch_Dot_{suffix}.pdf"
-    return StreamingResponse(
-        io.BytesIO(pdf_bytes),
-        media_type="application/pdf",
-        headers={"Content-Disposition": f'inline; filename=\"{filename}\"'},
-    )
+    filename = _dot_pdf_filename(dot_norm, khoa, a5)
+    return spooled_response(spool, media_type="application/pdf", filename=filename, disposition="inline")
+
+@router.get("/print-dot")
+def batch_print_dot(
+    request: Request,
+    dot: str = Query(..., description="Tên đợt, ví dụ: 'Đợt 1/2025' hoặc '9'"),
+    khoa: str | None = Query(None, description="(Tuỳ chọn) Lọc theo Khóa, ví dụ: '27'"),
+    db: Session = Depends(get_db),
+    user=Depends(require_roles("Admin", "NhanVien")),
+):
+    return _print_dot(request, dot, khoa, db, user)
+
+@router.get("/print-dot-a5")
+def batch_print_dot_a5(
+    request: Request,
+    dot: str = Query(..., description="Tên đợt, ví dụ: 'Đợt 1/2025' hoặc '9'"),
+    khoa: str | None = Query(None, description="(Tuỳ chọn) Lọc theo Khóa, ví dụ: '27'"),
+    two_up: bool = Query(False, description="Ghép 2 biên nhận A5 / tờ A4"),
+    db: Session = Depends(get_db),
+    user=Depends(require_roles("Admin", "NhanVien")),
+):
+    return _print_dot(request, dot, khoa, db, user, a5=True, two_up=two_up)
 
 # Giữ route cũ để tương thích
 @router.get("/print-by-dot")
@@ -272,4 +293,4 @@ def batch_print_by_dot_compat(
     db: Session = Depends(get_db),
     user=Depends(require_roles("Admin", "NhanVien")),
 ):
-    return batch_print_dot(request=request, dot=dot, db=db, user=user)
+    return _print_dot(request, dot, None, db, user)
@@ -1,13 +1,18 @@
 #app/routers/checklist.py
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException, Body
+import hashlib
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, Body, Request, Response
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 
 from app.db.session import get_db
 from app.models.checklist import ChecklistItem, ChecklistVersion
 from app.routers.auth import require_roles
+from app.services import checklist_cache, receipt_cache
 
 router = APIRouter(prefix="/checklist", tags=["Checklist"])
 
@@ -92,6 +97,7 @@ def _seed_if_empty(db: Session) -> ChecklistVersion:
         _set_order(it, i)
         db.add(it)
 
+    checklist_cache.mark_changed(db)
     db.commit()
     db.refresh(v)
     return v
@@ -116,37 +122,52 @@ def _list_items(db: Session, version_id: int):
     q = q.order_by(order.asc() if order else ChecklistItem.id.asc())
     return q.all()
 
+def _items_payload(items) -> list:
+    return [
+        {
+            "code": it.code,
+            "display_name": it.display_name,
+            "order_index": getattr(it, "order_index", None),
+            "order_no": getattr(it, "order_no", None),
+        }
+        for it in items
+    ]
+
+
 # ==================== APIs ====================
 
 @router.get("/active")
-def get_active_checklist(db: Session = Depends(get_db)):
-    v = _get_active(db)
-    items = _list_items(db, v.id)
-    return {
+def get_active_checklist(request: Request, db: Session = Depends(get_db)):
+    # đọc từ cache (checklist_cache); ETag theo nội dung -> trình duyệt hỏi lại chỉ nhận 304
+    v = checklist_cache.active_version(db)
+    if v is None:
+        v = _get_active(db)  # bảng rỗng -> seed v1
+    items = checklist_cache.items_for_version(db, v.id)
+    payload = {
         "version_id": v.id,
         "version_name": v.version_name,
-        "is_active": _get_active_flag(v),
-        "items": [
-            {
-                "code": it.code,
-                "display_name": it.display_name,
-                "order_index": getattr(it, "order_index", None),
-                "order_no": getattr(it, "order_no", None),
-            }
-            for it in items
-        ],
+        "is_active": v.active,
+        "items": _items_payload(items),
     }
+    raw = json.dumps(payload, ensure_ascii=False, sort_keys=True).encode("utf-8")
+    etag = '"ck-' + hashlib.sha1(raw).hexdigest()[:20] + '"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    inm = request.headers.get("if-none-match") or ""
+    if etag in {t.strip().removeprefix("W/") for t in inm.split(",")}:
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(payload, headers=headers)
 
 
 @router.get("/versions")
 def list_versions(db: Session = Depends(get_db)):
-    rows = db.query(ChecklistVersion).order_by(ChecklistVersion.id.asc()).all()
+    rows = checklist_cache.versions(db).values()
     return [
         {
             "id": v.id,
             "version_name": v.version_name,
-            "is_active": _get_active_flag(v),
-            "active": _get_active_flag(v),  # để UI linh hoạt
+            "is_active": v.active,
+            "active": v.active,  # để UI linh hoạt
         }
         for v in rows
     ]
@@ -158,23 +179,15 @@ def get_version_items(
     db: Session = Depends(get_db),
     me=Depends(require_roles("Admin", "NhanVien")),  # cho xem cả nhân viên
 ):
-    v = db.query(ChecklistVersion).filter(ChecklistVersion.id == version_id).first()
+    v = checklist_cache.get_version(db, version_id)
     if not v:
         raise HTTPException(404, "Version không tồn tại")
-    items = _list_items(db, v.id)
+    items = checklist_cache.items_for_version(db, v.id)
     return {
         "version_id": v.id,
         "version_name": v.version_name,
-        "is_active": _get_active_flag(v),
-        "items": [
-            {
-                "code": it.code,
-                "display_name": it.display_name,
-                "order_index": getattr(it, "order_index", None),
-                "order_no": getattr(it, "order_no", None),
-            }
-            for it in items
-        ],
+        "is_active": v.active,
+        "items": _items_payload(items),
     }
 
 
@@ -198,7 +211,9 @@ def delete_version(
             raise HTTPException(409, "Không thể xóa phiên bản hiện tại")
 
     db.delete(v)
+    checklist_cache.mark_changed(db)
     db.commit()
+    receipt_cache.invalidate_version(version_id)
     return {"ok": True, "deleted_id": version_id}
 
 
@@ -243,6 +258,7 @@ def create_version(
         if _has_active_flag():
             _set_active_flag(v, False)
 
+    checklist_cache.mark_changed(db)
     db.commit()
     return {
         "id": v.id,
@@ -270,6 +286,7 @@ def activate_version(
     db.query(ChecklistVersion).filter(ChecklistVersion.id != v.id).update({active_col: False})
     _set_active_flag(v, True)
     db.add(v)
+    checklist_cache.mark_changed(db)
     db.commit()
     return {"ok": True, "activated_id": v.id}
 
@@ -311,7 +328,9 @@ def add_item(
     it = ChecklistItem(version_id=v.id, code=code, display_name=name)
     _set_order(it, max_order + 1)
     db.add(it)
+    checklist_cache.mark_changed(db)
     db.commit()
+    receipt_cache.invalidate_version(v.id)
     return {"ok": True, "version_id": v.id, "code": code}
 
 
@@ -337,7 +356,9 @@ def update_item(
 
     it.display_name = name
     db.add(it)
+    checklist_cache.mark_changed(db)
     db.commit()
+    receipt_cache.invalidate_version(v.id)
     return {"ok": True}
 
 
@@ -364,7 +385,9 @@ def delete_item(
         _set_order(item, i)
         db.add(item)
 
+    checklist_cache.mark_changed(db)
     db.commit()
+    receipt_cache.invalidate_version(v.id)
     return {"ok": True}
 
 
@@ -387,5 +410,7 @@ def reorder_items(
         it = items[code]
         _set_order(it, i)
         db.add(it)
+    checklist_cache.mark_changed(db)
     db.commit()
+    receipt_cache.invalidate_version(v.id)
     return {"ok": True, "version_id": v.id, "count": len(codes)}
@@ -2,8 +2,9 @@
 from __future__ import annotations
 
 from datetime import datetime, timedelta, date
+import csv
 import io
-from typing import List, Dict, Optional, Tuple
+from typing import Iterator, List, Dict, Optional, Tuple
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Response, Request
 from starlette.responses import StreamingResponse
@@ -14,22 +15,21 @@ from app.routers.auth import require_roles
 from app.db.session import get_db
 from app.models.applicant import Applicant, ApplicantDoc
 from app.models.checklist import ChecklistItem
-from app.services.pdf_service import (
-    render_single_pdf,
-    render_single_pdf_a5,
-    render_batch_pdf,
-)
+from app.services.pdf_service import render_receipt_cached
 
-from openpyxl import Workbook
-from openpyxl.utils import get_column_letter
+from app.services.xlsx_stream import XlsxStreamWriter
+from app.services import checklist_cache
 
 from app.utils.soft_delete import exclude_deleted, ensure_not_deleted
+from app.utils.spool import new_spool, spooled_response
 
 # Audit
 from app.services.audit import write_audit
 
 router = APIRouter()  # không prefix; main sẽ mount /api
 
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
 
 # ------------------- Audit helper -------------------
 def _audit_print_or_export(
@@ -89,27 +89,8 @@ def _parse_day_any(raw: str) -> date:
     )
 
 def _items_merged_by_versions(db: Session, version_ids: set) -> List[ChecklistItem]:
-    code_seen = set()
-    items: List[ChecklistItem] = []
-    for vid in version_ids:
-        q = db.query(ChecklistItem).filter(ChecklistItem.version_id == vid)
-        if hasattr(ChecklistItem, "order_index"):
-            q = q.order_by(getattr(ChecklistItem, "order_index").asc())
-        elif hasattr(ChecklistItem, "order_no"):
-            q = q.order_by(getattr(ChecklistItem, "order_no").asc())
-        else:
-            q = q.order_by(ChecklistItem.id.asc())
-        for it in q.all():
-            if it.code not in code_seen:
-                code_seen.add(it.code)
-                items.append(it)
-    return items
-
-def _docs_map_by_mssv(docs: List[ApplicantDoc]) -> Dict[str, Dict[str, int]]:
-    out: Dict[str, Dict[str, int]] = {}
-    for d in docs:
-        out.setdefault(d.applicant_ma_so_hv, {})[d.code] = int(d.so_luong or 0)
-    return out
+    # 1 truy vấn cho mọi phiên bản + cache theo version_id (checklist_cache)
+    return checklist_cache.merged_items(db, version_ids)
 
 def _fmt_date_excel(v: Optional[object]) -> str:
     if v is None or v == "":
@@ -147,17 +128,44 @@ def _split_name(a: Applicant) -> Tuple[str, str]:
     return " ".join(parts[:-1]), parts[-1]
 
 
-def _build_excel_bytes(
-    apps: List[Applicant],
-    docs: List[ApplicantDoc],
-    items_all: List[ChecklistItem],
-    *,
-    split_name: bool = False,
-) -> bytes:
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Ho so"
-
+# Cột hồ sơ cần cho file Excel (đọc dạng tuple qua cursor phía server, không tạo ORM object)
+_EXPORT_FIELDS = (
+    "ma_so_hv", "ma_ho_so", "ngay_nhan_hs", "email_hoc_vien", "ho_ten", "ho_dem", "ten",
+    "ngay_sinh", "so_dt", "nganh_nhap_hoc", "nganh", "dot", "khoa", "da_tn_truoc_do",
+    "ghi_chu", "nguoi_nhan_ky_ten", "dan_toc",
+)
+EXPORT_CHUNK = 1000  # số hồ sơ / lần đọc (kèm 1 truy vấn docs cho cả lô)
+
+
+def _iter_export_rows(db: Session, q):
+    """
+    Duyệt hồ sơ theo query `q` bằng cursor phía server (yield_per), từng lô EXPORT_CHUNK:
+    yield (row, {code: so_luong}). Bộ nhớ chỉ phụ thuộc kích thước lô.
+    """
+    cols = [getattr(Applicant, f) for f in _EXPORT_FIELDS if hasattr(Applicant, f)]
+    stmt = (
+        q.with_entities(*cols)
+        .order_by(Applicant.created_at.asc(), Applicant.ma_so_hv.asc())
+        .statement
+    )
+    # kết nối riêng cho cursor stream (MySQL: cùng kết nối không chạy được truy vấn khác khi đang stream)
+    with db.get_bind().connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=EXPORT_CHUNK).execute(stmt)
+        for part in result.partitions():
+            docs = (
+                db.query(ApplicantDoc.applicant_ma_so_hv, ApplicantDoc.code, ApplicantDoc.so_luong)
+                .filter(ApplicantDoc.applicant_ma_so_hv.in_([r.ma_so_hv for r in part]))
+                .all()
+            )
+            dm: Dict[str, Dict[str, int]] = {}
+            for m, code, sl in docs:
+                dm.setdefault(m, {})[code] = int(sl or 0)
+            for r in part:
+                yield r, dm.get(r.ma_so_hv, {})
+
+
+def _export_headers(items_all: List[ChecklistItem], split_name: bool) -> List[str]:
+    """Tiêu đề cột dùng chung cho Excel / CSV."""
     base_headers = ["STT", "Mã hồ sơ", "Ngày nhận", "Email học viên"]
     if split_name:
         # giữ "Họ và tên" + thêm "Họ đệm", "Tên"
@@ -168,59 +176,103 @@ def _build_excel_bytes(
         "MSHV", "Ngày sinh", "Số ĐT", "Ngành nhập học", "Đợt", "Khóa",
         "Đã TN trước đó", "Ghi chú", "Người nhận (ký tên)", "Dân tộc",
     ]
-
     item_headers = [getattr(it, "display_name", None) or it.code for it in items_all]
-    headers = base_headers + item_headers
-    ws.append(headers)
-
-    docs_by_mssv = _docs_map_by_mssv(docs)
-
-    for idx, a in enumerate(apps, start=1):
-        common_prefix = [
-            idx,
-            a.ma_ho_so or "",
-            _fmt_date_excel(getattr(a, "ngay_nhan_hs", None)),
-            a.email_hoc_vien or "",
-        ]
-
-        if split_name:
-            full = _display_name(a)
-            ln, fn = _split_name(a)
-            name_cells = [full, ln, fn]
-        else:
-            name_cells = [_display_name(a)]
-
-        common_suffix = [
-            a.ma_so_hv or "",
-            _fmt_date_excel(getattr(a, "ngay_sinh", None)),
-            a.so_dt or "",
-            getattr(a, "nganh_nhap_hoc", None) or getattr(a, "nganh", None) or "",
-            a.dot or "",
-            getattr(a, "khoa", "") or "",
-            a.da_tn_truoc_do or "",
-            a.ghi_chu or "",
-            a.nguoi_nhan_ky_ten or "",
-            getattr(a, "dan_toc", None) or "",
-        ]
-
-        dm = docs_by_mssv.get(a.ma_so_hv, {})
-        doc_row = [int(dm.get(it.code, 0)) for it in items_all]
-
-        ws.append(common_prefix + name_cells + common_suffix + doc_row)
-
-    ws.freeze_panes = "A2"
-    for col in range(1, len(headers) + 1):
-        letter = get_column_letter(col)
-        max_len = 0
-        for cell in ws[letter]:
-            val = "" if cell.value is None else str(cell.value)
-            if len(val) > max_len:
-                max_len = len(val)
-        ws.column_dimensions[letter].width = min(max(10, max_len + 2), 40)
-
-    buf = io.BytesIO()
-    wb.save(buf)
-    return buf.getvalue()
+    return base_headers + item_headers
+
+
+def _export_row(idx: int, a, dm: Dict[str, int], codes: List[str], split_name: bool) -> list:
+    """1 dòng dữ liệu (cùng thứ tự với _export_headers)."""
+    common_prefix = [
+        idx,
+        a.ma_ho_so or "",
+        _fmt_date_excel(getattr(a, "ngay_nhan_hs", None)),
+        a.email_hoc_vien or "",
+    ]
+
+    if split_name:
+        full = _display_name(a)
+        ln, fn = _split_name(a)
+        name_cells = [full, ln, fn]
+    else:
+        name_cells = [_display_name(a)]
+
+    common_suffix = [
+        a.ma_so_hv or "",
+        _fmt_date_excel(getattr(a, "ngay_sinh", None)),
+        a.so_dt or "",
+        getattr(a, "nganh_nhap_hoc", None) or getattr(a, "nganh", None) or "",
+        a.dot or "",
+        getattr(a, "khoa", "") or "",
+        a.da_tn_truoc_do or "",
+        a.ghi_chu or "",
+        a.nguoi_nhan_ky_ten or "",
+        getattr(a, "dan_toc", None) or "",
+    ]
+
+    doc_row = [int(dm.get(c, 0)) for c in codes]
+    return common_prefix + name_cells + common_suffix + doc_row
+
+
+def _write_excel(
+    out,
+    rows,                              # iterable (hồ sơ, {code: so_luong})
+    items_all: List[ChecklistItem],
+    *,
+    split_name: bool = False,
+) -> int:
+    """Ghi file Excel (write-only, stream) vào file object `out`. Trả số hồ sơ đã ghi."""
+    codes = [it.code for it in items_all]
+    w = XlsxStreamWriter("Ho so", _export_headers(items_all, split_name))
+    for idx, (a, dm) in enumerate(rows, start=1):
+        w.append(_export_row(idx, a, dm, codes, split_name))
+    w.save(out)
+    return w.rows
+
+
+def _iter_csv(
+    q,
+    items_all: List[ChecklistItem],
+    *,
+    split_name: bool = False,
+    delimiter: str = ",",
+) -> Iterator[bytes]:
+    """
+    Sinh CSV/TSV (UTF-8 có BOM để Excel nhận đúng tiếng Việt) theo từng lô EXPORT_CHUNK dòng,
+    đọc thẳng từ cursor (_iter_export_rows) -> byte đầu tiên trả về ngay, bộ nhớ không đổi theo số hồ sơ.
+    Dùng Session riêng: generator chạy sau khi endpoint đã return (session của request có thể đã đóng).
+    """
+    codes = [it.code for it in items_all]
+    buf = io.StringIO()
+    w = csv.writer(buf, delimiter=delimiter, lineterminator="\r\n")
+    buf.write("\ufeff")
+    w.writerow(_export_headers(items_all, split_name))
+    yield buf.getvalue().encode("utf-8")
+    buf.seek(0); buf.truncate()
+
+    db = Session(bind=q.session.get_bind())
+    try:
+        for idx, (a, dm) in enumerate(_iter_export_rows(db, q.with_session(db)), start=1):
+            w.writerow(_export_row(idx, a, dm, codes, split_name))
+            if idx % EXPORT_CHUNK == 0:
+                yield buf.getvalue().encode("utf-8")
+                buf.seek(0); buf.truncate()
+        if buf.tell():
+            yield buf.getvalue().encode("utf-8")
+    finally:
+        db.close()
+
+
+def _csv_response(q, items_all: List[ChecklistItem], *, split_name: bool, tsv: bool, filename: str) -> StreamingResponse:
+    media_type = "text/tab-separated-values; charset=utf-8" if tsv else "text/csv; charset=utf-8"
+    return StreamingResponse(
+        _iter_csv(q, items_all, split_name=split_name, delimiter="\t" if tsv else ","),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+def _version_ids(q) -> set:
+    return {vid for (vid,) in q.with_entities(Applicant.checklist_version_id).distinct() if vid}
 
 
 def _get_app_by_mssv(db: Session, ma_so_hv: str) -> Applicant:
@@ -232,9 +284,10 @@ def _get_app_by_mssv(db: Session, ma_so_hv: str) -> Applicant:
 
 def _get_items_for_app(db: Session, app: Applicant):
     ver_id = getattr(app, "checklist_version_id", None)
-    q = db.query(ChecklistItem)
     if ver_id:
-        q = q.filter(ChecklistItem.version_id == ver_id)
+        return checklist_cache.items_for_version(db, ver_id)
+    # hồ sơ cũ chưa gắn phiên bản: giữ cách cũ (mọi mục)
+    q = db.query(ChecklistItem)
     if hasattr(ChecklistItem, "order_index"):
         q = q.order_by(getattr(ChecklistItem, "order_index").asc())
     elif hasattr(ChecklistItem, "order_no"):
@@ -247,22 +300,14 @@ def _get_docs_for_mssv(db: Session, ma_so_hv: str):
     return db.query(ApplicantDoc).filter(ApplicantDoc.applicant_ma_so_hv == ma_so_hv).all()
 
 
-# ================= EXPORT EXCEL THEO NGÀY =================
-@router.get("/export/excel")
-def export_excel(
-    request: Request,
-    day: str | None = Query(None, description="YYYY-MM-DD"),
-    date_q: str | None = Query(None, alias="date", description="dd/MM/YYYY"),
-    name: str = Query("split", description="Kiểu cột tên: 'full' hoặc 'split'"),
-    db: Session = Depends(get_db),
-    user=Depends(require_roles("Admin", "NhanVien")),
-):
-    raw = date_q or day
+# ================= Lọc hồ sơ cho EXPORT (dùng chung Excel / CSV) =================
+def _day_export_query(request: Request, db: Session, user, raw: str | None, name: str, fmt: dict):
+    """Hồ sơ nhận trong ngày -> (query, ngày). Thiếu/không có dữ liệu: audit FAIL + HTTPException."""
     if not raw:
         _audit_print_or_export(
             request=request, db=db, user=user,
             action="EXPORT", scope="day",
-            filters={"date": None}, count=0,
+            filters={"date": None, **fmt}, count=0,
             status="FAIL", error="MISSING_DATE", name_mode=name
         )
         raise HTTPException(status_code=400, detail="Thiếu tham số 'date=dd/MM/YYYY' hoặc 'day=YYYY-MM-DD'")
@@ -273,30 +318,87 @@ def export_excel(
 
     q = db.query(Applicant).filter(Applicant.ngay_nhan_hs >= d1, Applicant.ngay_nhan_hs < d2)
     q = exclude_deleted(Applicant, q)
-    apps = q.order_by(Applicant.created_at.asc(), Applicant.ma_so_hv.asc()).all()
 
-    if not apps:
+    if q.with_entities(Applicant.ma_so_hv).first() is None:
         q = exclude_deleted(Applicant, db.query(Applicant).filter(Applicant.ngay_nhan_hs == d))
-        apps = q.order_by(Applicant.created_at.asc(), Applicant.ma_so_hv.asc()).all()
 
-    apps = [a for a in apps if ensure_not_deleted(a, raise_http_exception=False)]
-    if not apps:
+    if q.with_entities(Applicant.ma_so_hv).first() is None:
         _audit_print_or_export(
             request=request, db=db, user=user,
             action="EXPORT", scope="day",
-            filters={"date": d.isoformat()}, count=0,
+            filters={"date": d.isoformat(), **fmt}, count=0,
             status="FAIL", error="NO_DATA", name_mode=name
         )
         raise HTTPException(status_code=404, detail=f"Không có hồ sơ trong ngày {d.strftime('%d/%m/%Y')}")
+    return q, d
+
+
+def _dot_filter_query(db: Session, key: str, khoa: str | None):
+    """Hồ sơ (chưa xoá) có đợt chứa `key`, tuỳ chọn đúng khóa."""
+    q = (
+        db.query(Applicant)
+        .filter(Applicant.dot.isnot(None))
+        .filter(Applicant.dot.ilike(f"%{key}%"))
+    )
+    if (khoa or "").strip():
+        k = khoa.strip()
+        q = q.filter(Applicant.khoa.isnot(None)).filter(func.lower(func.trim(Applicant.khoa)) == k.lower())
+    return exclude_deleted(Applicant, q)
+
+
+def _dot_export_query(request: Request, db: Session, user, dot: str, khoa: str | None, name: str, fmt: dict):
+    """Hồ sơ theo đợt (+ khóa) -> (query, key). Thiếu/không có dữ liệu: audit FAIL + HTTPException."""
+    key = (dot or "").strip()
+    if not key:
+        _audit_print_or_export(
+            request=request, db=db, user=user,
+            action="EXPORT", scope="dot",
+            filters={"dot": None, "khoa": (khoa or ""), **fmt}, count=0,
+            status="FAIL", error="MISSING_DOT", name_mode=name
+        )
+        raise HTTPException(status_code=400, detail="Thiếu tham số 'dot'")
 
-    mssv_list = [a.ma_so_hv for a in apps]
-    docs = db.query(ApplicantDoc).filter(ApplicantDoc.applicant_ma_so_hv.in_(mssv_list)).all()
+    q = _dot_filter_query(db, key, khoa)
 
-    version_ids = {a.checklist_version_id for a in apps if a.checklist_version_id}
+    if q.with_entities(Applicant.ma_so_hv).first() is None:
+        _audit_print_or_export(
+            request=request, db=db, user=user,
+            action="EXPORT", scope="dot",
+            filters={"dot": key, "khoa": (khoa or ""), **fmt}, count=0,
+            status="FAIL", error="NO_DATA", name_mode=name
+        )
+        raise HTTPException(status_code=404, detail="Không có hồ sơ nào phù hợp")
+    return q, key
+
+
+def _dot_filename_suffix(key: str, khoa: str | None) -> str:
+    safe_dot = "".join(ch if ch.isalnum() or ch in "-_" else "_" for ch in key)
+    safe_khoa = "".join(ch if ch.isalnum() or ch in "-_" else "_" for ch in (khoa or ""))
+    return f"{safe_dot}" + (f"_Khoa_{safe_khoa}" if safe_khoa else "")
+
+
+def _csv_fmt(tsv: bool) -> dict:
+    return {"format": "tsv" if tsv else "csv"}
+
+
+# ================= EXPORT EXCEL THEO NGÀY =================
+@router.get("/export/excel")
+def export_excel(
+    request: Request,
+    day: str | None = Query(None, description="YYYY-MM-DD"),
+    date_q: str | None = Query(None, alias="date", description="dd/MM/YYYY"),
+    name: str = Query("split", description="Kiểu cột tên: 'full' hoặc 'split'"),
+    db: Session = Depends(get_db),
+    user=Depends(require_roles("Admin", "NhanVien")),
+):
+    q, d = _day_export_query(request, db, user, date_q or day, name, {})
+
+    version_ids = _version_ids(q)
     items_all = _items_merged_by_versions(db, version_ids) if version_ids else []
 
     split = (name == "split")
-    xls_bytes = _build_excel_bytes(apps, docs, items_all, split_name=split)
+    spool = new_spool()
+    count = _write_excel(spool, _iter_export_rows(db, q), items_all, split_name=split)
     suffix = "_split" if split else ""
     filename = f"Export_{d.strftime('%d-%m-%Y')}{suffix}.xlsx"
 
@@ -304,15 +406,11 @@ def export_excel(
     _audit_print_or_export(
         request=request, db=db, user=user,
         action="EXPORT", scope="day",
-        filters={"date": d.isoformat()}, count=len(apps),
+        filters={"date": d.isoformat()}, count=count,
         status="SUCCESS", name_mode=("split" if split else "full")
     )
 
-    return StreamingResponse(
-        io.BytesIO(xls_bytes),
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={"Content-Disposition": f'attachment; filename=\"{filename}\"'},
-    )
+    return spooled_response(spool, media_type=XLSX_MEDIA_TYPE, filename=filename)
 
 
 # ================= EXPORT EXCEL THEO ĐỢT =================
@@ -325,64 +423,86 @@ def export_excel_dot(
     db: Session = Depends(get_db),
     user=Depends(require_roles("Admin", "NhanVien")),
 ):
-    key = (dot or "").strip()
-    if not key:
-        _audit_print_or_export(
-            request=request, db=db, user=user,
-            action="EXPORT", scope="dot",
-            filters={"dot": None, "khoa": (khoa or "")}, count=0,
-            status="FAIL", error="MISSING_DOT", name_mode=name
-        )
-        raise HTTPException(status_code=400, detail="Thiếu tham số 'dot'")
+    q, key = _dot_export_query(request, db, user, dot, khoa, name, {})
 
-    q = (
-        db.query(Applicant)
-        .filter(Applicant.dot.isnot(None))
-        .filter(Applicant.dot.ilike(f"%{key}%"))
+    items_all = _items_merged_by_versions(db, _version_ids(q))
+
+    split = (name == "split")
+    spool = new_spool()
+    count = _write_excel(spool, _iter_export_rows(db, q), items_all, split_name=split)
+    suffix2 = "_split" if split else ""
+    filename = f"Export_Dot_{_dot_filename_suffix(key, khoa)}{suffix2}.xlsx"
+
+    # Audit OK
+    _audit_print_or_export(
+        request=request, db=db, user=user,
+        action="EXPORT", scope="dot",
+        filters={"dot": key, "khoa": (khoa or "")}, count=count,
+        status="SUCCESS", name_mode=("split" if split else "full")
     )
-    if (khoa or "").strip():
-        k = khoa.strip()
-        q = q.filter(Applicant.khoa.isnot(None)).filter(func.lower(func.trim(Applicant.khoa)) == k.lower())
 
-    q = exclude_deleted(Applicant, q)
+    return spooled_response(spool, media_type=XLSX_MEDIA_TYPE, filename=filename)
 
-    apps = q.order_by(Applicant.created_at.asc(), Applicant.ma_so_hv.asc()).all()
-    apps = [a for a in apps if ensure_not_deleted(a, raise_http_exception=False)]
-    if not apps:
-        _audit_print_or_export(
-            request=request, db=db, user=user,
-            action="EXPORT", scope="dot",
-            filters={"dot": key, "khoa": (khoa or "")}, count=0,
-            status="FAIL", error="NO_DATA", name_mode=name
-        )
-        raise HTTPException(status_code=404, detail="Không có hồ sơ nào phù hợp")
 
-    mssv_list = [a.ma_so_hv for a in apps]
-    docs = db.query(ApplicantDoc).filter(ApplicantDoc.applicant_ma_so_hv.in_(mssv_list)).all()
+# ================= EXPORT CSV / TSV (stream, cho hệ thống khác import) =================
+# Cùng bố cục cột với Excel. Không biết trước số dòng (stream) -> audit đếm bằng COUNT trước khi trả.
+@router.get("/export/csv")
+def export_csv(
+    request: Request,
+    day: str | None = Query(None, description="YYYY-MM-DD"),
+    date_q: str | None = Query(None, alias="date", description="dd/MM/YYYY"),
+    name: str = Query("split", description="Kiểu cột tên: 'full' hoặc 'split'"),
+    tsv: bool = Query(False, description="true -> phân cách bằng TAB (.tsv)"),
+    db: Session = Depends(get_db),
+    user=Depends(require_roles("Admin", "NhanVien")),
+):
+    fmt = _csv_fmt(tsv)
+    q, d = _day_export_query(request, db, user, date_q or day, name, fmt)
 
-    items_all = _items_merged_by_versions(db, {a.checklist_version_id for a in apps if a.checklist_version_id})
+    version_ids = _version_ids(q)
+    items_all = _items_merged_by_versions(db, version_ids) if version_ids else []
+
+    split = (name == "split")
+    suffix = "_split" if split else ""
+    filename = f"Export_{d.strftime('%d-%m-%Y')}{suffix}.{fmt['format']}"
+
+    _audit_print_or_export(
+        request=request, db=db, user=user,
+        action="EXPORT", scope="day",
+        filters={"date": d.isoformat(), **fmt}, count=q.count(),
+        status="SUCCESS", name_mode=("split" if split else "full")
+    )
+
+    return _csv_response(q, items_all, split_name=split, tsv=tsv, filename=filename)
+
+
+@router.get("/export/csv-dot")
+def export_csv_dot(
+    request: Request,
+    dot: str = Query(..., description="Ví dụ: 'Đợt 1/2025' hoặc '9'"),
+    khoa: str | None = Query(None, description="(Tuỳ chọn) Lọc theo Khóa, ví dụ: '27'"),
+    name: str = Query("split", description="Kiểu cột tên: 'full' hoặc 'split'"),
+    tsv: bool = Query(False, description="true -> phân cách bằng TAB (.tsv)"),
+    db: Session = Depends(get_db),
+    user=Depends(require_roles("Admin", "NhanVien")),
+):
+    fmt = _csv_fmt(tsv)
+    q, key = _dot_export_query(request, db, user, dot, khoa, name, fmt)
+
+    items_all = _items_merged_by_versions(db, _version_ids(q))
 
     split = (name == "split")
-    xls_bytes = _build_excel_bytes(apps, docs, items_all, split_name=split)
-    safe_dot = "".join(ch if ch.isalnum() or ch in "-_" else "_" for ch in key)
-    safe_khoa = "".join(ch if ch.isalnum() or ch in "-_" else "_" for ch in (khoa or ""))
-    suffix = f"{safe_dot}" + (f"_Khoa_{safe_khoa}" if safe_khoa else "")
     suffix2 = "_split" if split else ""
-    filename = f"Export_Dot_{suffix}{suffix2}.xlsx"
+    filename = f"Export_Dot_{_dot_filename_suffix(key, khoa)}{suffix2}.{fmt['format']}"
 
-    # Audit OK
     _audit_print_or_export(
         request=request, db=db, user=user,
         action="EXPORT", scope="dot",
-        filters={"dot": key, "khoa": (khoa or "")}, count=len(apps),
+        filters={"dot": key, "khoa": (khoa or ""), **fmt}, count=q.count(),
         status="SUCCESS", name_mode=("split" if split else "full")
     )
 
-    return StreamingResponse(
-        io.BytesIO(xls_bytes),
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={"Content-Disposition": f'attachment; filename=\"{filename}\"'},
-    )
+    return _csv_response(q, items_all, split_name=split, tsv=tsv, filename=filename)
 
 
 # ================= PRINT 1 HỒ SƠ (theo MSSV) =================
@@ -391,7 +511,7 @@ def print_a5(ma_so_hv: str, db: Session = Depends(get_db)):
     app = _get_app_by_mssv(db, ma_so_hv)  # đã chặn deleted
     items = _get_items_for_app(db, app)
     docs = _get_docs_for_mssv(db, ma_so_hv)
-    pdf_bytes = render_single_pdf_a5(app, items, docs)
+    pdf_bytes = render_receipt_cached(app, items, docs, a5=True)
     return Response(
         content=pdf_bytes,
         media_type="application/pdf",
@@ -403,7 +523,7 @@ def print_a4(ma_so_hv: str, db: Session = Depends(get_db)):
     app = _get_app_by_mssv(db, ma_so_hv)
     items = _get_items_for_app(db, app)
     docs = _get_docs_for_mssv(db, ma_so_hv)
-    pdf_bytes = render_single_pdf(app, items, docs)
+    pdf_bytes = render_receipt_cached(app, items, docs)
     return Response(
         content=pdf_bytes,
         media_type="application/pdf",
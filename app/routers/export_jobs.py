@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import os
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import FileResponse
+from pydantic import BaseModel, Field
+from sqlalchemy.orm import Session
+
+from app.db.session import get_db
+from app.models.export_job import ExportJob
+from app.routers.auth import require_roles
+from app.services import export_jobs
+from app.services.audit import write_audit
+
+router = APIRouter(prefix="/exports", tags=["Exports"])
+
+MAX_WAIT_SEC = 30  # long-poll tối đa / lần gọi
+
+
+class ExportJobIn(BaseModel):
+    kind: str = Field(..., description="'excel-dot' | 'print-dot'")
+    dot: str = Field(..., description="Ví dụ: 'Đợt 1/2025' hoặc '9'")
+    khoa: Optional[str] = Field(None, description="(Tuỳ chọn) Lọc theo Khóa")
+    name: str = Field("split", description="excel-dot: 'full' hoặc 'split'")
+    a5: bool = Field(False, description="print-dot: in khổ A5")
+    two_up: bool = Field(False, description="print-dot A5: ghép 2 biên nhận / tờ A4")
+
+
+def _get_job(db: Session, job_id: str) -> ExportJob:
+    job = db.get(ExportJob, job_id)
+    if not job:
+        raise HTTPException(404, "Không tìm thấy job xuất")
+    return job
+
+
+def _actor(me) -> Optional[str]:
+    return getattr(me, "full_name", None) or getattr(me, "username", None)
+
+
+# ================= Tạo job (hoặc gắn vào job giống hệt) =================
+@router.post("", status_code=202)
+@router.post("/", status_code=202)
+def create_export_job(
+    body: ExportJobIn,
+    request: Request,
+    db: Session = Depends(get_db),
+    me=Depends(require_roles("Admin", "NhanVien")),
+):
+    if body.kind not in export_jobs.KINDS:
+        raise HTTPException(400, "Loại job không hỗ trợ. Dùng 'excel-dot' hoặc 'print-dot'")
+    params = export_jobs.normalize_params(body.kind, body.model_dump())
+    if not params["dot"]:
+        raise HTTPException(400, "Thiếu tham số 'dot'")
+
+    job, attached, count = export_jobs.submit_or_attach(db, body.kind, params, created_by=_actor(me))
+    if job is None:
+        raise HTTPException(404, "Không có hồ sơ nào phù hợp")
+
+    write_audit(
+        db,
+        action="EXPORT_JOB",
+        target_type="ExportJob",
+        target_id=job.id,
+        status="SUCCESS",
+        new_values={"kind": job.kind, "params": params, "count": count, "attached": attached},
+        request=request,
+    )
+    db.commit()
+    return {**job.to_dict(), "attached": attached}
+
+
+# ================= Trạng thái (poll / long-poll) =================
+@router.get("/{job_id}")
+def get_export_job(
+    job_id: str,
+    wait: float = Query(0, ge=0, le=MAX_WAIT_SEC, description="Chờ tối đa N giây tới khi job xong"),
+    db: Session = Depends(get_db),
+    me=Depends(require_roles("Admin", "NhanVien")),
+):
+    job = export_jobs.wait(db, job_id, wait) if wait else db.get(ExportJob, job_id)
+    if not job:
+        raise HTTPException(404, "Không tìm thấy job xuất")
+    return job.to_dict()
+
+
+@router.get("/{job_id}/download")
+def download_export_job(
+    job_id: str,
+    request: Request,
+    db: Session = Depends(get_db),
+    me=Depends(require_roles("Admin", "NhanVien")),
+):
+    job = _get_job(db, job_id)
+    if job.status != "done":
+        raise HTTPException(409, f"Job đang ở trạng thái '{job.status}', chưa có file")
+    if not (job.file_path and os.path.isfile(job.file_path)):
+        raise HTTPException(410, "File đã bị dọn, vui lòng tạo lại job")
+    export_jobs.touch(db, job)
+
+    # Ghi nhật ký giống endpoint xuất / in trực tiếp
+    params = dict(job.params or {})
+    filters = {"dot": params.get("dot"), "khoa": params.get("khoa") or ""}
+    if params.get("a5"):
+        filters.update({"size": "A5", "two_up": bool(params.get("two_up"))})
+    write_audit(
+        db,
+        action="EXPORT" if job.kind == "excel-dot" else "PRINT",
+        target_type="ApplicantBatch",
+        target_id=None,
+        status="SUCCESS",
+        new_values={
+            "scope": "dot",
+            "filters": filters,
+            "count": int(job.row_count or 0),
+            "name_mode": params.get("name"),
+            "job_id": job.id,
+            "actor_id": getattr(me, "id", None),
+            "actor_name": _actor(me),
+        },
+        request=request,
+    )
+    db.commit()
+
+    return FileResponse(
+        job.file_path,
+        media_type=job.media_type or "application/octet-stream",
+        filename=job.filename,
+        content_disposition_type="attachment" if job.kind == "excel-dot" else "inline",
+    )
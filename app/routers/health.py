@@ -4,8 +4,21 @@
 from fastapi import APIRouter
 from datetime import datetime
 
+from app.services.font_registry import font_status
+from app.services import receipt_cache, receipt_prerender
+
 router = APIRouter()
 
 @router.get("/health")
 def health():
     return {"ok": True, "time": datetime.utcnow().isoformat()}
+
+@router.get("/health/fonts")
+def health_fonts():
+    """Font PDF đang dùng (TNR / DejaVu / fallback Times) và thời gian nạp."""
+    return font_status()
+
+@router.get("/health/receipts")
+def health_receipts():
+    """Cache biên nhận (hit/miss) + hàng chờ render sẵn."""
+    return {"cache": receipt_cache.stats(), "prerender": receipt_prerender.stats()}
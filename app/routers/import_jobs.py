@@ -0,0 +1,140 @@
+# app/routers/import_jobs.py
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Optional
+
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, Request, UploadFile
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+
+from app.db.session import get_db
+from app.models.import_job import ImportJob
+from app.routers.auth import require_roles
+from app.services import import_jobs
+from app.services.audit import write_audit
+
+router = APIRouter(prefix="/imports", tags=["Imports"])
+
+
+def _get_job(db: Session, job_id: str) -> ImportJob:
+    job = db.get(ImportJob, job_id)
+    if not job:
+        raise HTTPException(404, "Không tìm thấy job import")
+    return job
+
+
+# ================= Tạo job =================
+@router.post("", status_code=202)
+@router.post("/", status_code=202)
+def create_import_job(
+    request: Request,
+    file: UploadFile = File(...),
+    mapping: Optional[str] = Form(None, description='JSON {field_key: tên cột}; bỏ trống = tự đoán'),
+    ngay_nhan_hs: Optional[str] = Form(None),
+    checklist_version_name: Optional[str] = Form(None),
+    db: Session = Depends(get_db),
+    me=Depends(require_roles("Admin", "NhanVien", "CongTacVien")),
+):
+    ext = Path(file.filename or "").suffix.lower()
+    if ext not in import_jobs.ALLOWED_EXT:
+        raise HTTPException(400, "Định dạng file không hỗ trợ. Hãy dùng .csv hoặc .xlsx")
+    if not (ngay_nhan_hs or "").strip():
+        raise HTTPException(422, "Thiếu trường bắt buộc: Ngày nhận hồ sơ mặc định")
+
+    try:
+        mp = json.loads(mapping) if mapping else None
+    except ValueError:
+        raise HTTPException(400, "mapping không phải JSON hợp lệ")
+    if mp is not None and not isinstance(mp, dict):
+        raise HTTPException(400, "mapping phải là object {field: cột}")
+
+    options = {
+        "mapping": mp,
+        "ngay_nhan_hs": ngay_nhan_hs.strip(),
+        "checklist_version_name": (checklist_version_name or "").strip() or None,
+    }
+    job = import_jobs.create_job(
+        db,
+        upload=file.file,
+        filename=file.filename or f"import{ext}",
+        options=options,
+        created_by=(getattr(me, "full_name", None) or getattr(me, "username", None)),
+        created_by_id=getattr(me, "id", None),
+    )
+
+    write_audit(
+        db,
+        action="IMPORT_START",
+        target_type="ImportJob",
+        target_id=job.id,
+        status="SUCCESS",
+        new_values={"filename": job.filename, "options": options},
+        request=request,
+    )
+    db.commit()
+
+    import_jobs.submit(job.id)
+    return job.to_dict()
+
+
+# ================= Trạng thái / tiến độ =================
+@router.get("")
+@router.get("/")
+def list_import_jobs(
+    limit: int = Query(20, ge=1, le=200),
+    db: Session = Depends(get_db),
+    me=Depends(require_roles("Admin", "NhanVien", "CongTacVien")),
+):
+    rows = db.query(ImportJob).order_by(ImportJob.created_at.desc()).limit(limit).all()
+    return [j.to_dict() for j in rows]
+
+
+@router.get("/{job_id}")
+def get_import_job(
+    job_id: str,
+    db: Session = Depends(get_db),
+    me=Depends(require_roles("Admin", "NhanVien", "CongTacVien")),
+):
+    return _get_job(db, job_id).to_dict()
+
+
+@router.post("/{job_id}/cancel")
+def cancel_import_job(
+    job_id: str,
+    request: Request,
+    db: Session = Depends(get_db),
+    me=Depends(require_roles("Admin", "NhanVien", "CongTacVien")),
+):
+    job = _get_job(db, job_id)
+    if job.status == "queued":
+        job.status = "cancelled"
+    elif job.status == "running":
+        job.status = "cancelling"  # worker dừng sau lô hiện tại
+    else:
+        raise HTTPException(409, f"Job đang ở trạng thái '{job.status}', không thể dừng")
+    write_audit(
+        db,
+        action="IMPORT_CANCEL",
+        target_type="ImportJob",
+        target_id=job.id,
+        status="SUCCESS",
+        request=request,
+    )
+    db.commit()
+    return job.to_dict()
+
+
+@router.get("/{job_id}/errors.csv")
+def download_import_errors(
+    job_id: str,
+    db: Session = Depends(get_db),
+    me=Depends(require_roles("Admin", "NhanVien", "CongTacVien")),
+):
+    job = _get_job(db, job_id)
+    p = Path(job.report_path or "")
+    if not job.report_path or not p.is_file():
+        raise HTTPException(404, "Chưa có báo cáo lỗi cho job này")
+    stem = Path(job.filename or "import").stem
+    return FileResponse(str(p), media_type="text/csv; charset=utf-8", filename=f"{stem}_loi.csv")
@@ -0,0 +1,245 @@
+# app/services/applicant_bulk.py
+"""
+Tạo hồ sơ hàng loạt (import Excel/CSV).
+
+Cùng luật với POST /applicants (create_applicant) nhưng:
+- kiểm tra toàn bộ dòng 1 lượt (MSSV, tên, ngày nhận, checklist version, trùng trong file)
+- MSSV đã có trong DB: 1 câu IN cho mỗi lô
+- insert applicants / applicant_docs / audit_logs theo lô (executemany), commit theo lô
+Kết quả trả về từng dòng: OK / ERR / SKIP (giống trang import đang hiển thị).
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Optional
+
+from fastapi import Request
+from sqlalchemy import insert, select
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.applicant import Applicant, ApplicantDoc
+from app.models.audit import AuditLog
+from app.models.checklist import ChecklistVersion
+from app.models.sequence import SEQ4_RE, bump_sequences, seq_key
+from app.routers.applicants import (
+    MSSV_REGEX,
+    _display_name,
+    _normalize_gender,
+    _parse_date_flexible,
+    _split_vn_name,
+    snapshot_applicant,
+)
+from app.services.audit import build_audit_values
+from app.utils.vn_text import build_search_text
+
+BULK_MAX_ROWS = 5000
+BULK_CHUNK = 500
+
+OK, ERR, SKIP = "OK", "ERR", "SKIP"
+
+
+def _chunks(seq: List[Any], n: int) -> Iterable[List[Any]]:
+    for i in range(0, len(seq), n):
+        yield seq[i:i + n]
+
+
+def existing_mssv(db: Session, mssvs: Iterable[str], chunk: int = BULK_CHUNK) -> set[str]:
+    """MSSV đã có trong DB (kể cả hồ sơ xoá mềm — PK vẫn chiếm chỗ)."""
+    out: set[str] = set()
+    lst = list(dict.fromkeys(mssvs))
+    for part in _chunks(lst, chunk):
+        out.update(db.execute(select(Applicant.ma_so_hv).where(Applicant.ma_so_hv.in_(part))).scalars())
+    return out
+
+
+def _result(idx: int, status: str, msg: str, values: Optional[Dict[str, Any]] = None, raw: Optional[dict] = None) -> dict:
+    src = values or raw or {}
+    return {
+        "idx": idx,
+        "status": status,
+        "ma_so_hv": (src.get("ma_so_hv") or None),
+        "ma_ho_so": (src.get("ma_ho_so") or None),
+        "msg": msg,
+    }
+
+
+def _prepare_row(payload: dict, version_ids: Dict[str, int], nguoi_nhan: Optional[str]):
+    """
+    Chuẩn hoá 1 dòng theo đúng luật create_applicant.
+    Trả về (status, msg, values, docs).
+    """
+    if not isinstance(payload, dict):
+        return ERR, "Dòng không hợp lệ", None, None
+
+    ma_so_hv = str(payload.get("ma_so_hv") or "").strip()
+    input_ho_dem = str(payload.get("ho_dem") or "").strip()
+    input_ten = str(payload.get("ten") or "").strip()
+    ho_ten = str(payload.get("ho_ten") or "").strip()
+
+    if not (input_ho_dem or input_ten or ho_ten) or not ma_so_hv:
+        return SKIP, "Thiếu bắt buộc (Họ và Tên hoặc Họ đệm+Tên) hoặc Mã số HV", None, None
+    if not MSSV_REGEX.fullmatch(ma_so_hv):
+        return ERR, "MSSV phải gồm đúng 10 chữ số.", None, None
+
+    if not (input_ho_dem or input_ten):
+        input_ho_dem, input_ten = _split_vn_name(ho_ten)
+    full_built = _display_name(input_ho_dem, input_ten, ho_ten)
+
+    try:
+        ngay_nhan_hs = _parse_date_flexible(payload.get("ngay_nhan_hs"))
+        ngay_sinh = _parse_date_flexible(payload.get("ngay_sinh"))
+    except ValueError:  # đúng định dạng nhưng không có thật (31/02, tháng 13...)
+        return ERR, "Ngày không hợp lệ", None, None
+    if not ngay_nhan_hs:
+        return ERR, "Thiếu trường bắt buộc: Ngày nhận hồ sơ (dd/MM/YYYY hoặc YYYY-MM-DD)", None, None
+
+    version_name = str(payload.get("checklist_version_name") or "").strip() or "v1"
+    vid = version_ids.get(version_name)
+    if vid is None:
+        return ERR, "Checklist version không tồn tại", None, None
+
+    docs = []
+    for d in (payload.get("docs") or []):
+        code = d.get("code") if isinstance(d, dict) else None
+        sl = d.get("so_luong") if isinstance(d, dict) else None
+        if sl in (None, ""):
+            continue
+        try:
+            docs.append({"applicant_ma_so_hv": ma_so_hv, "code": code, "so_luong": int(sl)})
+        except (TypeError, ValueError):
+            return ERR, f"Số lượng không hợp lệ cho mục '{code}'", None, None
+
+    ma_ho_so = str(payload.get("ma_ho_so") or "").strip() or None
+    values = {
+        "ma_so_hv": ma_so_hv,
+        "ma_ho_so": ma_ho_so,
+        "ngay_nhan_hs": ngay_nhan_hs,
+        "ho_ten": full_built or None,
+        "ho_dem": input_ho_dem or None,
+        "ten": input_ten or None,
+        "email_hoc_vien": payload.get("email_hoc_vien"),
+        "ngay_sinh": ngay_sinh,
+        "so_dt": payload.get("so_dt"),
+        "dot": payload.get("dot"),
+        "khoa": payload.get("khoa"),
+        "da_tn_truoc_do": payload.get("da_tn_truoc_do"),
+        "ghi_chu": payload.get("ghi_chu"),
+        "nguoi_nhan_ky_ten": nguoi_nhan,
+        "checklist_version_id": vid,
+        "status": "saved",
+        "printed": False,
+        "gioi_tinh": _normalize_gender(payload.get("gioi_tinh")),
+        "nganh_nhap_hoc": (payload.get("nganh_nhap_hoc") or payload.get("nganh") or None),
+    }
+    if hasattr(Applicant, "dan_toc"):
+        values["dan_toc"] = payload.get("dan_toc")
+    # insert hàng loạt không chạy listener ORM -> tự điền search_text
+    values["search_text"] = build_search_text(
+        values["ho_dem"], values["ten"], values["ho_ten"], values["ma_ho_so"], ma_so_hv
+    )
+    return OK, "", values, docs
+
+
+def _audit_row(values: dict, docs: List[dict], request: Optional[Request], actor: Dict[str, Any]) -> dict:
+    snap = snapshot_applicant(Applicant(**values))
+    return build_audit_values(
+        action="CREATE",
+        target_type="Applicant",
+        target_id=values["ma_so_hv"],
+        prev_values={},
+        new_values={**snap, "docs_after": {d["code"]: int(d["so_luong"] or 0) for d in docs}},
+        status="SUCCESS",
+        request=request,
+        **actor,
+    )
+
+
+def _insert_chunk(db: Session, batch: List[tuple], request: Optional[Request], actor: Dict[str, Any]) -> None:
+    apps = [v for _, v, _ in batch]
+    docs = [d for _, _, ds in batch for d in ds]
+    db.execute(insert(Applicant), apps)
+    if docs:
+        db.execute(insert(ApplicantDoc), docs)
+    db.execute(insert(AuditLog), [_audit_row(v, ds, request, actor) for _, v, ds in batch])
+
+    # mã HS có sẵn trong file -> đẩy bộ đếm (insert hàng loạt không qua listener)
+    maxes: Dict[tuple, int] = {}
+    for _, v, _ in batch:
+        m = SEQ4_RE.search(str(v.get("ma_ho_so") or ""))
+        if m:
+            key = seq_key(v.get("khoa"), v.get("dot"))
+            maxes[key] = max(maxes.get(key, 0), int(m.group(1)))
+    conn = db.connection()
+    for (k, d), n in sorted(maxes.items()):  # thứ tự khoá cố định giữa các worker
+        bump_sequences(conn, k, d, n)
+
+
+def bulk_create_applicants(
+    db: Session,
+    rows: List[dict],
+    *,
+    nguoi_nhan: Optional[str] = None,
+    request: Optional[Request] = None,
+    actor_id: Optional[Any] = None,
+    actor_name: Optional[str] = None,
+    start_index: int = 1,
+    chunk_size: int = BULK_CHUNK,
+) -> List[dict]:
+    """
+    Tạo nhiều hồ sơ. Commit theo lô; lô lỗi (vd. trùng MSSV do ghi song song, dữ liệu quá cột)
+    được thử lại từng dòng trong savepoint để chỉ đánh lỗi đúng dòng đó.
+    Job nền (không có request) truyền actor_id/actor_name của người tạo job để ghi audit.
+    """
+    actor = {"actor_id": actor_id, "actor_name": actor_name}
+    names = {str((r or {}).get("checklist_version_name") or "").strip() or "v1" for r in rows if isinstance(r, dict)}
+    version_ids = dict(
+        db.execute(
+            select(ChecklistVersion.version_name, ChecklistVersion.id)
+            .where(ChecklistVersion.version_name.in_(names))
+        ).all()
+    ) if names else {}
+
+    results: Dict[int, dict] = {}
+    valid: List[tuple] = []
+    seen: set[str] = set()
+    for i, payload in enumerate(rows):
+        idx = start_index + i
+        st, msg, values, docs = _prepare_row(payload, version_ids, nguoi_nhan)
+        if st != OK:
+            results[idx] = _result(idx, st, msg, raw=payload if isinstance(payload, dict) else None)
+            continue
+        if values["ma_so_hv"] in seen:
+            results[idx] = _result(idx, ERR, "Mã số HV bị trùng trong tệp", values)
+            continue
+        seen.add(values["ma_so_hv"])
+        valid.append((idx, values, docs))
+
+    taken = existing_mssv(db, [v["ma_so_hv"] for _, v, _ in valid], chunk_size)
+    todo = []
+    for idx, values, docs in valid:
+        if values["ma_so_hv"] in taken:
+            results[idx] = _result(idx, ERR, "Mã số học viên đã tồn tại!", values)
+        else:
+            todo.append((idx, values, docs))
+
+    for batch in _chunks(todo, chunk_size):
+        try:
+            _insert_chunk(db, batch, request, actor)
+            db.commit()
+            for idx, values, _ in batch:
+                results[idx] = _result(idx, OK, f"Tạo thành công (MSSV: {values['ma_so_hv']})", values)
+        except (IntegrityError, DataError):
+            db.rollback()
+            for item in batch:
+                idx, values, _ = item
+                try:
+                    with db.begin_nested():
+                        _insert_chunk(db, [item], request, actor)
+                    results[idx] = _result(idx, OK, f"Tạo thành công (MSSV: {values['ma_so_hv']})", values)
+                except IntegrityError:
+                    results[idx] = _result(idx, ERR, "Mã số HV đã tồn tại", values)
+                except DataError:  # vd. chuỗi dài quá cột
+                    results[idx] = _result(idx, ERR, "Dữ liệu không hợp lệ (quá dài hoặc sai kiểu)", values)
+            db.commit()
+
+    return [results[k] for k in sorted(results)]
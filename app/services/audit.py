@@ -179,8 +179,7 @@ def _build_hmac_hash(
     return hmac.new(AUDIT_HMAC_SECRET.encode("utf-8"), raw.encode("utf-8"), hashlib.sha256).hexdigest()
 
 
-def write_audit(
-    db: Session,
+def build_audit_values(
     *,
     action: str,
     target_type: Optional[str] = None,
@@ -189,14 +188,15 @@ def write_audit(
     prev_values: Optional[Dict[str, Any]] = None,
     new_values: Optional[Dict[str, Any]] = None,
     request: Optional[Request] = None,
-) -> AuditLog:
+    actor_id: Optional[Any] = None,
+    actor_name: Optional[str] = None,
+) -> Dict[str, Any]:
     """
-    Ghi 1 dòng audit. Không commit ở đây (để caller chủ động).
-    Bắt buộc set được hmac_hash để phù hợp DB NOT NULL.
+    Dựng giá trị cột cho 1 dòng audit (đã redact + giới hạn kích thước + hmac_hash).
+    Dùng chung cho write_audit và insert hàng loạt (bulk).
+    actor_id/actor_name: người thực hiện khi không có request (job nền chạy thay người tạo job).
     """
     # Lấy actor từ session (nếu có)
-    actor_id = None
-    actor_name = None
     if request is not None:
         try:
             sess = getattr(request, "session", {}) or {}
@@ -241,7 +241,7 @@ def write_audit(
         new_values=new_j,
     )
 
-    row = AuditLog(
+    return dict(
         action=action,
         status=status,
         target_type=target_type,
@@ -255,5 +255,35 @@ def write_audit(
         correlation_id=cid,
         hmac_hash=h,  # 👈 quan trọng: set giá trị NOT NULL
     )
+
+
+def write_audit(
+    db: Session,
+    *,
+    action: str,
+    target_type: Optional[str] = None,
+    target_id: Optional[str] = None,
+    status: str = "SUCCESS",
+    prev_values: Optional[Dict[str, Any]] = None,
+    new_values: Optional[Dict[str, Any]] = None,
+    request: Optional[Request] = None,
+    actor_id: Optional[Any] = None,
+    actor_name: Optional[str] = None,
+) -> AuditLog:
+    """
+    Ghi 1 dòng audit. Không commit ở đây (để caller chủ động).
+    Bắt buộc set được hmac_hash để phù hợp DB NOT NULL.
+    """
+    row = AuditLog(**build_audit_values(
+        action=action,
+        target_type=target_type,
+        target_id=target_id,
+        status=status,
+        prev_values=prev_values,
+        new_values=new_values,
+        request=request,
+        actor_id=actor_id,
+        actor_name=actor_name,
+    ))
     db.add(row)
     return row
@@ -0,0 +1,158 @@
+# app/services/cache.py
+"""
+Cache nhỏ trong tiến trình cho các truy vấn tổng hợp (total/stats/facets...).
+
+- data_version(topic): bộ đếm tăng mỗi khi có commit chạm tới bảng thuộc topic đó
+  (theo dõi qua Session events) -> khoá cache gắn version nên không bao giờ trả dữ liệu cũ
+  sau khi ghi trong cùng tiến trình.
+- shared_version(db, topic) / bump_shared(db, topic): bộ đếm trong bảng cache_versions, dùng chung
+  giữa nhiều worker (data_version chỉ thấy ghi trong tiến trình hiện tại).
+- TTLCache: dict có hạn sống + giới hạn số phần tử, thread-safe.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session
+
+# ================= Data version =================
+# tên bảng -> topic
+_TABLE_TOPIC = {
+    "applicants": "applicants",
+    "applicant_docs": "applicants",
+    "checklist_versions": "checklist",
+    "checklist_items": "checklist",
+}
+
+_versions: dict[str, int] = {}
+_ver_lock = threading.Lock()
+
+
+def data_version(topic: str) -> int:
+    return _versions.get(topic, 0)
+
+
+def bump(topic: str) -> int:
+    with _ver_lock:
+        _versions[topic] = _versions.get(topic, 0) + 1
+        return _versions[topic]
+
+
+def _topics_of_objects(objs) -> set[str]:
+    out = set()
+    for o in objs:
+        tbl = getattr(getattr(o, "__table__", None), "name", None)
+        t = _TABLE_TOPIC.get(tbl)
+        if t:
+            out.add(t)
+    return out
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_dirty_topics(session: Session, flush_context):
+    topics = session.info.setdefault("_dirty_topics", set())
+    topics |= _topics_of_objects(session.new)
+    topics |= _topics_of_objects(session.dirty)
+    topics |= _topics_of_objects(session.deleted)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk_topics(orm_execute_state):
+    # insert()/update()/delete() chạy thẳng qua session.execute (bulk, không qua flush)
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    tbl = getattr(getattr(orm_execute_state.statement, "table", None), "name", None)
+    t = _TABLE_TOPIC.get(tbl)
+    if t:
+        orm_execute_state.session.info.setdefault("_dirty_topics", set()).add(t)
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_on_commit(session: Session):
+    for t in session.info.pop("_dirty_topics", ()):
+        bump(t)
+
+
+@event.listens_for(Session, "after_rollback")
+def _clear_on_rollback(session: Session):
+    session.info.pop("_dirty_topics", None)
+
+
+# ================= Data version dùng chung (DB) =================
+_shared: dict[str, tuple[float, Optional[int]]] = {}  # topic -> (lúc đọc, version)
+
+
+def shared_version(db: Session, topic: str, max_age: float = 0.0) -> Optional[int]:
+    """
+    Version của topic trong bảng cache_versions (1 lookup theo PK).
+    max_age > 0: dùng lại giá trị đã đọc trong max_age giây -> worker khác thấy thay đổi chậm tối đa max_age.
+    """
+    now = time.monotonic()
+    hit = _shared.get(topic)
+    if max_age > 0 and hit is not None and now - hit[0] < max_age:
+        return hit[1]
+    from app.models.cache_version import CacheVersion
+
+    try:
+        v = db.execute(select(CacheVersion.version).where(CacheVersion.topic == topic)).scalar()
+    except Exception:  # bảng chưa tạo (chưa chạy startup)
+        v = None
+    _shared[topic] = (now, v)
+    return v
+
+
+def bump_shared(db: Session, topic: str) -> None:
+    """Tăng version của topic trong transaction hiện tại (commit cùng thay đổi dữ liệu)."""
+    from app.models.cache_version import CacheVersion
+
+    res = db.execute(
+        update(CacheVersion)
+        .where(CacheVersion.topic == topic)
+        .values(version=CacheVersion.version + 1)
+    )
+    if not res.rowcount:
+        db.add(CacheVersion(topic=topic, version=1))
+    _shared.pop(topic, None)
+
+
+# ================= TTL cache =================
+class TTLCache:
+    def __init__(self, ttl: float = 60.0, maxsize: int = 256):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            hit = self._data.get(key)
+            if hit is None:
+                return None
+            exp, val = hit
+            if exp < time.monotonic():
+                self._data.pop(key, None)
+                return None
+            self._data.move_to_end(key)
+            return val
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_set(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        val = self.get(key)
+        if val is None:
+            val = factory()
+            self.set(key, val)
+        return val
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
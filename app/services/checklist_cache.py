@@ -0,0 +1,198 @@
+# app/services/checklist_cache.py
+"""
+Cache checklist trong tiến trình: mục theo version_id + danh sách phiên bản / phiên bản đang active.
+Nạp cho xuất Excel / in gộp / in lẻ bằng 1 truy vấn cho mọi phiên bản cần dùng.
+
+- Mỗi entry gắn dấu (data_version("checklist"), version chung trong bảng cache_versions):
+  ghi trong tiến trình -> hết hạn ngay; worker khác ghi (routers/checklist.py gọi mark_changed)
+  -> hết hạn sau tối đa CHECKLIST_CACHE_CHECK_SEC giây.
+- Cache lưu bản chụp bất biến (ItemSnapshot), không giữ ORM object: không dính session/commit,
+  pickle được cho pool tiến trình in gộp.
+- Danh sách IN (...) lớn được chia lô IN_CHUNK (tránh vượt max_allowed_packet của MySQL).
+"""
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.applicant import ApplicantDoc
+from app.models.checklist import ChecklistItem, ChecklistVersion
+from app.services.cache import bump_shared, data_version, shared_version
+
+IN_CHUNK = 1000       # số phần tử tối đa / mệnh đề IN
+MAX_VERSIONS = 256    # số phiên bản checklist giữ trong cache
+TOPIC = "checklist"
+
+
+@dataclass(frozen=True)
+class ItemSnapshot:
+    id: int
+    version_id: int
+    code: Optional[str]
+    display_name: Optional[str]
+    default_qty: Optional[int]
+    order_no: Optional[int]
+
+
+@dataclass(frozen=True)
+class VersionSnapshot:
+    id: int
+    version_name: Optional[str]
+    active: Optional[bool]
+
+
+Stamp = Tuple[int, Optional[int]]
+
+_items: "OrderedDict[int, Tuple[Stamp, Tuple[ItemSnapshot, ...]]]" = OrderedDict()
+_versions: Optional[Tuple[Stamp, Dict[int, VersionSnapshot]]] = None
+_lock = threading.Lock()
+
+
+def stamp(db: Session) -> Stamp:
+    """Dấu hiện tại của checklist: (bộ đếm trong tiến trình, bộ đếm chung trong DB)."""
+    max_age = float(getattr(settings, "CHECKLIST_CACHE_CHECK_SEC", 2.0) or 0)
+    return data_version(TOPIC), shared_version(db, TOPIC, max_age=max_age)
+
+
+def mark_changed(db: Session) -> None:
+    """Gọi trước db.commit() ở mọi route sửa checklist: báo các worker khác bỏ cache."""
+    bump_shared(db, TOPIC)
+
+
+def chunks(seq: Iterable, n: Optional[int] = None) -> Iterator[list]:
+    n = n or IN_CHUNK
+    buf: list = []
+    for x in seq:
+        buf.append(x)
+        if len(buf) >= n:
+            yield buf
+            buf = []
+    if buf:
+        yield buf
+
+
+# ================= Checklist =================
+def load_items_by_versions(db: Session, version_ids: Iterable[Optional[int]]) -> Dict[int, List[ItemSnapshot]]:
+    """{version_id: [mục theo order_no, id]}; phiên bản chưa có trong cache nạp chung 1 truy vấn (None -> [])."""
+    dv = stamp(db)
+    out: Dict[int, List[ItemSnapshot]] = {}
+    missing = []
+    with _lock:
+        for vid in set(version_ids):
+            if vid is None:  # hồ sơ chưa gắn phiên bản
+                out[vid] = []
+                continue
+            hit = _items.get(vid)
+            if hit is not None and hit[0] == dv:
+                _items.move_to_end(vid)
+                out[vid] = list(hit[1])
+            else:
+                missing.append(vid)
+    if not missing:
+        return out
+
+    loaded: Dict[int, List[ItemSnapshot]] = {vid: [] for vid in missing}
+    cols = (
+        ChecklistItem.id, ChecklistItem.version_id, ChecklistItem.code,
+        ChecklistItem.display_name, ChecklistItem.default_qty, ChecklistItem.order_no,
+    )
+    for part in chunks(sorted(missing)):
+        rows = db.execute(
+            select(*cols)
+            .where(ChecklistItem.version_id.in_(part))
+            .order_by(ChecklistItem.version_id.asc(), ChecklistItem.order_no.asc(), ChecklistItem.id.asc())
+        ).all()
+        for r in rows:
+            loaded[r.version_id].append(ItemSnapshot(*r))
+
+    with _lock:
+        for vid, its in loaded.items():
+            _items[vid] = (dv, tuple(its))
+            _items.move_to_end(vid)
+        while len(_items) > MAX_VERSIONS:
+            _items.popitem(last=False)
+    out.update(loaded)
+    return out
+
+
+def items_for_version(db: Session, version_id: Optional[int]) -> List[ItemSnapshot]:
+    if version_id is None:
+        return []
+    return load_items_by_versions(db, (version_id,)).get(version_id, [])
+
+
+def merged_items(db: Session, version_ids: Iterable[Optional[int]]) -> List[ItemSnapshot]:
+    """Gộp mục của nhiều phiên bản (theo thứ tự version_id), bỏ trùng code — cột Excel."""
+    by_version = load_items_by_versions(db, version_ids)
+    seen = set()
+    out: List[ItemSnapshot] = []
+    for vid in sorted(v for v in by_version if v is not None):
+        for it in by_version[vid]:
+            if it.code not in seen:
+                seen.add(it.code)
+                out.append(it)
+    return out
+
+
+# ================= Phiên bản =================
+def versions(db: Session) -> Dict[int, VersionSnapshot]:
+    """{id: phiên bản} (bảng nhỏ -> nạp cả bảng 1 lần)."""
+    global _versions
+    st = stamp(db)
+    cur = _versions
+    if cur is not None and cur[0] == st:
+        return cur[1]
+    rows = db.execute(
+        select(ChecklistVersion.id, ChecklistVersion.version_name, ChecklistVersion.active)
+        .order_by(ChecklistVersion.id.asc())
+    ).all()
+    data = {r.id: VersionSnapshot(r.id, r.version_name, r.active) for r in rows}
+    with _lock:
+        _versions = (st, data)
+    return data
+
+
+def get_version(db: Session, version_id: Optional[int]) -> Optional[VersionSnapshot]:
+    if version_id is None:
+        return None
+    return versions(db).get(version_id)
+
+
+def active_version(db: Session, *, fallback_latest: bool = True) -> Optional[VersionSnapshot]:
+    """
+    Phiên bản active (id lớn nhất nếu có nhiều); không có -> phiên bản mới nhất (fallback_latest)
+    giống routers/checklist._get_active. Bảng rỗng -> None (để router seed).
+    """
+    vs = versions(db)
+    active = [v for v in vs.values() if v.active]
+    if active:
+        return max(active, key=lambda v: v.id)
+    if fallback_latest and vs:
+        return vs[max(vs)]
+    return None
+
+
+def invalidate(version_id: Optional[int] = None) -> None:
+    global _versions
+    with _lock:
+        _versions = None
+        if version_id is None:
+            _items.clear()
+        else:
+            _items.pop(version_id, None)
+
+
+# ================= Giấy tờ đã nộp =================
+def docs_by_mssv(db: Session, mssv_list: Sequence[str]) -> Dict[str, List[ApplicantDoc]]:
+    """{mssv: [ApplicantDoc]} cho cả lô, IN (...) chia theo IN_CHUNK."""
+    out: Dict[str, List[ApplicantDoc]] = {}
+    for part in chunks(sorted({m for m in mssv_list if m})):
+        for d in db.query(ApplicantDoc).filter(ApplicantDoc.applicant_ma_so_hv.in_(part)).all():
+            out.setdefault(d.applicant_ma_so_hv, []).append(d)
+    return out
@@ -0,0 +1,345 @@
+# app/services/export_jobs.py
+"""
+Job xuất file chạy nền: Excel theo đợt (excel-dot) / in PDF gộp theo đợt (print-dot).
+
+- Gửi yêu cầu -> trả job id ngay; worker (EXPORT_JOB_WORKERS thread) dựng file 1 lần, lưu ở EXPORTS_DIR.
+- Gộp yêu cầu: fingerprint = loại + bộ lọc + dấu dữ liệu (số hồ sơ, updated_at, giấy tờ,
+  version checklist chung trong DB) + ngày in (A5 in dòng 'TP.HCM, ngày ...').
+  Yêu cầu giống hệt khi job đang chạy / đã xong -> gắn vào job đó, không dựng lại.
+- Dữ liệu đổi -> dấu đổi -> fingerprint mới -> job mới; file cũ bị thay thế được gc dọn.
+- Client hỏi trạng thái / long-poll qua wait(): worker báo qua Condition khi job xong.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import func, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.applicant import Applicant, ApplicantDoc
+from app.models.checklist import ChecklistItem
+from app.models.export_job import ExportJob
+from app.services import checklist_cache
+from app.services.cache import data_version, shared_version
+
+log = logging.getLogger("export_jobs")
+
+KINDS = ("excel-dot", "print-dot")
+ACTIVE_STATUSES = ("queued", "running")
+SUPERSEDED_GRACE = timedelta(minutes=15)  # file đã bị job mới thay thế vẫn giữ thêm chút cho người đang tải
+
+_EXECUTOR = ThreadPoolExecutor(
+    max_workers=max(1, int(getattr(settings, "EXPORT_JOB_WORKERS", 2) or 1)),
+    thread_name_prefix="export-job",
+)
+_submit_lock = threading.Lock()
+_done_cv = threading.Condition()
+
+# job tạo trong tiến trình này -> data_version lúc tạo. updated_at chỉ tự tăng trên MySQL,
+# nên bộ đếm trong tiến trình bắt thêm các lần ghi mà dấu DB không thấy (vd SQLite).
+_local_versions: Dict[str, Tuple[int, int]] = {}
+
+
+def exports_dir() -> Path:
+    p = settings.exports_path
+    p.mkdir(parents=True, exist_ok=True)
+    return p
+
+
+# ================= Tham số / fingerprint =================
+def normalize_params(kind: str, raw: Dict[str, Any]) -> Dict[str, Any]:
+    p = {"dot": (raw.get("dot") or "").strip(), "khoa": (raw.get("khoa") or "").strip()}
+    if kind == "excel-dot":
+        p["name"] = "full" if raw.get("name") == "full" else "split"
+    else:
+        p["a5"] = bool(raw.get("a5"))
+        p["two_up"] = bool(raw.get("two_up")) and p["a5"]
+    return p
+
+
+def _sha(*parts: Any) -> str:
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def params_key(kind: str, params: Dict[str, Any]) -> str:
+    return _sha(kind, params)
+
+
+def data_stamp(db: Session, params: Dict[str, Any]) -> Tuple[str, int]:
+    """(dấu dữ liệu của bộ lọc, số hồ sơ). Vài truy vấn gộp, rẻ hơn nhiều so với dựng file."""
+    from app.routers.export import _dot_filter_query
+    from app.services.pdf_service import _now_vn
+
+    q = _dot_filter_query(db, params["dot"], params.get("khoa"))
+    n, last_upd = q.with_entities(func.count(Applicant.ma_so_hv), func.max(Applicant.updated_at)).one()
+    sub = q.with_entities(Applicant.ma_so_hv).subquery()
+    docs = db.execute(
+        select(func.count(ApplicantDoc.id), func.sum(ApplicantDoc.so_luong), func.max(ApplicantDoc.id))
+        .where(ApplicantDoc.applicant_ma_so_hv.in_(select(sub.c.ma_so_hv)))
+    ).one()
+    items = db.execute(select(func.count(ChecklistItem.id), func.max(ChecklistItem.id))).one()
+    # đổi tên / thứ tự mục không đổi count/max(id) -> dùng version chung (mọi route sửa checklist đều tăng)
+    checklist_v = shared_version(db, checklist_cache.TOPIC)
+    # A5 in ngày hiện tại -> file hôm qua không được dùng lại hôm nay
+    today = _now_vn().date() if params.get("a5") else None
+    return _sha(n, last_upd, tuple(docs), tuple(items), checklist_v, today), int(n or 0)
+
+
+def _current_local_version() -> Tuple[int, int]:
+    return data_version("applicants"), data_version("checklist")
+
+
+# ================= Gửi / gộp job =================
+def _reusable(job: ExportJob) -> bool:
+    if job.status == "done" and not (job.file_path and os.path.isfile(job.file_path)):
+        return False
+    lv = _local_versions.get(job.id)
+    return lv is None or lv == _current_local_version()
+
+
+def submit_or_attach(
+    db: Session,
+    kind: str,
+    params: Dict[str, Any],
+    *,
+    created_by: Optional[str],
+) -> Tuple[Optional[ExportJob], bool, int]:
+    """
+    -> (job, attached, số hồ sơ). Không có hồ sơ nào -> (None, False, 0).
+    attached=True: đã có job cùng fingerprint (đang chạy / đã xong) -> dùng lại.
+    """
+    pk = params_key(kind, params)
+    stamp, count = data_stamp(db, params)
+    if count == 0:
+        return None, False, 0
+    fp = _sha(pk, stamp)
+    now = datetime.now()
+
+    with _submit_lock:
+        cands = db.execute(
+            select(ExportJob)
+            .where(ExportJob.fingerprint == fp, ExportJob.status.in_(ACTIVE_STATUSES + ("done",)))
+            .order_by(ExportJob.created_at.desc())
+        ).scalars().all()
+        for job in cands:
+            if _reusable(job):
+                job.last_used_at = now
+                db.commit()
+                return job, True, count
+
+        job = ExportJob(
+            id=uuid.uuid4().hex,
+            kind=kind,
+            params=params,
+            params_key=pk,
+            fingerprint=fp,
+            status="queued",
+            row_count=count,
+            created_by=created_by,
+            last_used_at=now,
+        )
+        db.add(job)
+        db.commit()
+        _local_versions[job.id] = _current_local_version()
+        _EXECUTOR.submit(run_job, job.id)
+    return job, False, count
+
+
+def touch(db: Session, job: ExportJob) -> None:
+    job.last_used_at = datetime.now()
+    db.commit()
+
+
+# ================= Dựng file =================
+def _build_excel_dot(db: Session, params: Dict[str, Any], out) -> Tuple[int, str, str]:
+    from app.routers import export as ex
+
+    q = ex._dot_filter_query(db, params["dot"], params.get("khoa"))
+    items_all = ex._items_merged_by_versions(db, ex._version_ids(q))
+    split = params.get("name") == "split"
+    count = ex._write_excel(out, ex._iter_export_rows(db, q), items_all, split_name=split)
+    filename = f"Export_Dot_{ex._dot_filename_suffix(params['dot'], params.get('khoa'))}{'_split' if split else ''}.xlsx"
+    return count, filename, ex.XLSX_MEDIA_TYPE
+
+
+def _build_print_dot(db: Session, params: Dict[str, Any], out) -> Tuple[int, str, str]:
+    from app.routers import batch as bt
+    from app.services.pdf_batch import render_batch_pdf_parallel
+    from app.services.pdf_service import render_batch_pdf_a5_to
+
+    apps = bt._dot_apps(db, params["dot"], params.get("khoa"))
+    if apps:
+        items_by_version, docs_by_app = bt._load_print_inputs(db, apps)
+        if params.get("a5"):
+            render_batch_pdf_a5_to(out, apps, items_by_version, docs_by_app, two_up=bool(params.get("two_up")))
+        else:
+            render_batch_pdf_parallel(apps, items_by_version, docs_by_app, out=out)
+    filename = bt._dot_pdf_filename(params["dot"], params.get("khoa"), bool(params.get("a5")))
+    return len(apps), filename, "application/pdf"
+
+
+_BUILDERS = {"excel-dot": _build_excel_dot, "print-dot": _build_print_dot}
+
+
+def _set(db: Session, job_id: str, **values) -> None:
+    db.execute(update(ExportJob).where(ExportJob.id == job_id).values(**values))
+    db.commit()
+
+
+def _notify() -> None:
+    with _done_cv:
+        _done_cv.notify_all()
+
+
+def run_job(job_id: str) -> None:
+    db = SessionLocal()
+    tmp = None
+    try:
+        job = db.get(ExportJob, job_id)
+        if not job or job.status != "queued":
+            return
+        _set(db, job_id, status="running", started_at=datetime.now())
+
+        ext = ".xlsx" if job.kind == "excel-dot" else ".pdf"
+        dest = exports_dir() / f"{job_id}{ext}"
+        tmp = dest.with_name(f".{job_id}.part")
+        with open(tmp, "wb") as out:
+            count, filename, media_type = _BUILDERS[job.kind](db, dict(job.params or {}), out)
+        if count == 0:
+            _set(db, job_id, status="failed", finished_at=datetime.now(), row_count=0,
+                 error_message="Không có hồ sơ nào phù hợp")
+            return
+        os.replace(tmp, dest)
+        tmp = None
+        _set(
+            db, job_id,
+            status="done", finished_at=datetime.now(),
+            file_path=str(dest), filename=filename, media_type=media_type,
+            size_bytes=dest.stat().st_size, row_count=count,
+        )
+    except Exception as e:
+        log.exception("Export job %s failed", job_id)
+        db.rollback()
+        try:
+            _set(db, job_id, status="failed", finished_at=datetime.now(), error_message=str(e)[:2000])
+        except Exception:
+            pass
+    finally:
+        if tmp is not None:
+            try:
+                tmp.unlink()
+            except OSError:
+                pass
+        db.close()
+        _notify()
+    gdb = SessionLocal()
+    try:
+        gc(gdb)
+    except Exception:
+        gdb.rollback()
+        log.exception("Export job GC failed")
+    finally:
+        gdb.close()
+
+
+# ================= Chờ (long-poll) =================
+def wait(db: Session, job_id: str, timeout: float) -> Optional[ExportJob]:
+    """
+    Đọc job; nếu còn đang chạy thì chờ tối đa `timeout` giây tới khi xong / lỗi.
+    Chỉ đọc: mỗi vòng rollback để kết thúc transaction của request (REPEATABLE READ của MySQL
+    giữ nguyên snapshot cũ -> expire_all() thôi thì không bao giờ thấy job đã xong).
+    """
+    deadline = time.monotonic() + max(0.0, timeout)
+    while True:
+        db.rollback()
+        job = db.get(ExportJob, job_id)
+        remaining = deadline - time.monotonic()
+        if job is None or job.status not in ACTIVE_STATUSES or remaining <= 0:
+            return job
+        # job có thể chạy ở tiến trình khác (không nhận được notify) -> hỏi lại DB mỗi giây
+        with _done_cv:
+            _done_cv.wait(min(remaining, 1.0))
+
+
+# ================= Dọn dẹp =================
+def _unlink(path: Optional[str]) -> None:
+    if not path:
+        return
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+def gc(db: Session, now: Optional[datetime] = None) -> int:
+    """
+    Xoá job (và file) đã xong / lỗi mà:
+      - không ai dùng quá EXPORT_JOB_TTL_HOURS, hoặc
+      - đã có job mới hơn cùng bộ lọc (dữ liệu đã đổi) và quá SUPERSEDED_GRACE.
+    """
+    now = now or datetime.now()
+    ttl = int(getattr(settings, "EXPORT_JOB_TTL_HOURS", 24) or 0)
+    rows = db.execute(
+        select(ExportJob)
+        .where(ExportJob.status.in_(("done", "failed")))
+        .order_by(ExportJob.params_key, ExportJob.finished_at.desc(), ExportJob.created_at.desc())
+    ).scalars().all()
+
+    drop, seen = [], set()
+    for job in rows:
+        used = job.last_used_at or job.finished_at or job.created_at or now
+        newest = job.status == "done" and job.params_key not in seen
+        if job.status == "done":
+            seen.add(job.params_key)
+        if ttl > 0 and used < now - timedelta(hours=ttl):
+            drop.append(job)
+        elif not newest and used < now - SUPERSEDED_GRACE:
+            drop.append(job)
+
+    paths = [j.file_path for j in drop]
+    for job in drop:
+        _local_versions.pop(job.id, None)
+        db.delete(job)
+    db.commit()
+    for p in paths:  # chỉ xoá file sau khi đã commit
+        _unlink(p)
+    return len(drop)
+
+
+def recover_jobs(engine: Engine) -> None:
+    """
+    Startup: job đang chạy dở khi server tắt -> failed; job còn xếp hàng -> đưa lại vào worker;
+    dọn file tạm dở dang và job hết hạn.
+    """
+    exports_dir()
+    with Session(bind=engine) as db:
+        db.execute(
+            update(ExportJob)
+            .where(ExportJob.status == "running")
+            .values(status="failed", finished_at=datetime.now(),
+                    error_message="Máy chủ khởi động lại khi job đang chạy")
+        )
+        db.commit()
+        queued = db.execute(select(ExportJob.id).where(ExportJob.status == "queued")).scalars().all()
+        try:
+            gc(db)
+        except Exception:
+            db.rollback()
+            log.exception("Export job GC failed")
+    for p in settings.exports_path.glob(".*.part"):
+        _unlink(str(p))
+    for jid in queued:
+        _EXECUTOR.submit(run_job, jid)
@@ -6,11 +6,8 @@ from typing import List, Dict, Iterable, Any, Optional, Tuple, Union, Callable
 from io import BytesIO
 from datetime import date, datetime
 
-from openpyxl import Workbook
-from openpyxl.utils import get_column_letter
-from openpyxl.styles import Alignment
-
 from ..models import Applicant, ApplicantDoc, ChecklistItem
+from .xlsx_stream import XlsxStreamWriter
 
 DOC_PREFIX = "doc_"
 
@@ -50,12 +47,6 @@ def _norm_gender(v: Optional[object]) -> str:
         return "Nữ"
     return s.capitalize()  # fallback
 
-def _autosize(ws):
-    ws.freeze_panes = "A2"
-    for col in ws.columns:
-        w = max(10, *(len(str(c.value)) if c.value else 0 for c in col)) + 2
-        ws.column_dimensions[col[0].column_letter].width = min(w, 40)
-
 def _get(obj: Union[dict, Any], key: str, default=None):
     if isinstance(obj, dict):
         return obj.get(key, default)
@@ -90,22 +81,6 @@ def _split_name_cells(obj: Union[dict, Any]) -> Tuple[str, str]:
         return "", parts[0]
     return " ".join(parts[:-1]), parts[-1]
 
-def _set_date_format_by_header(ws, headers: List[str], header_names: Iterable[str]):
-    """
-    Đặt number_format = dd/mm/yyyy + căn giữa cho các cột ngày
-    dựa trên tên header (an toàn khi thêm/bớt cột).
-    """
-    name_to_idx = {h: i + 1 for i, h in enumerate(headers)}  # 1-based
-    for hn in header_names:
-        col = name_to_idx.get(hn)
-        if not col:
-            continue
-        for cell in ws.iter_cols(min_col=col, max_col=col, min_row=2):
-            for c in cell:
-                if isinstance(c.value, (date, datetime)):
-                    c.number_format = "dd/mm/yyyy"
-                    c.alignment = Alignment(horizontal="center")
-
 # ---------- Export 1: có cột checklist ----------
 def build_excel_bytes_by_items(
     apps: List[Applicant],
@@ -139,10 +114,8 @@ def build_excel_bytes_by_items(
     doc_headers = [f"{DOC_PREFIX}{it.code}" for it in (items or [])]
     headers = base_headers + doc_headers
 
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Data_TongNgay"
-    ws.append(headers)
+    date_cols = [headers.index("Ngày nhận HS"), headers.index("Ngày sinh")]
+    w = XlsxStreamWriter("Data_TongNgay", headers, date_cols=date_cols, min_width=12)
 
     for a in apps:
         dm = docs_by_mssv.get(a.ma_so_hv, {})
@@ -177,15 +150,10 @@ def build_excel_bytes_by_items(
         for it in items or []:
             qty = int(dm.get(it.code, 0))
             row.append("" if qty == 0 else qty)
-        ws.append(row)
-
-    # format cột ngày theo tên header
-    _set_date_format_by_header(ws, headers, header_names=["Ngày nhận HS", "Ngày sinh"])
+        w.append(row)
 
-    _autosize(ws)
     out = BytesIO()
-    wb.save(out)
-    out.seek(0)
+    w.save(out)
     return out.getvalue()
 
 
@@ -200,10 +168,6 @@ def build_excel_bytes_simple(
     - split_name=False: 1 cột 'Họ tên'
     - split_name=True : 2 cột 'Họ và tên đệm' + 'Tên'
     """
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "TongHop"
-
     headers = [
         "Mã HS",
     ]
@@ -218,7 +182,8 @@ def build_excel_bytes_simple(
         "Ngày nhận HS", "Ngày sinh", "Ngành", "Đợt",
         "Khóa", "Người nhận", "Ghi chú"
     ]
-    ws.append(headers)
+    date_cols = [headers.index("Ngày nhận HS"), headers.index("Ngày sinh")]
+    w = XlsxStreamWriter("TongHop", headers, date_cols=date_cols, min_width=12)
 
     for a in rows:
         get = a.get if isinstance(a, dict) else lambda k, d=None: getattr(a, k, d)
@@ -244,13 +209,8 @@ def build_excel_bytes_simple(
             get("ghi_chu"),
         ]
 
-        ws.append(prefix + name_cells + suffix)
-
-    # format cột ngày theo tên header
-    _set_date_format_by_header(ws, headers, header_names=["Ngày nhận HS", "Ngày sinh"])
+        w.append(prefix + name_cells + suffix)
 
-    _autosize(ws)
     out = BytesIO()
-    wb.save(out)
-    out.seek(0)
+    w.save(out)
     return out.getvalue()
@@ -0,0 +1,124 @@
+# app/services/font_registry.py
+"""
+Font cho PDF (reportlab): dò + đăng ký Times New Roman / DejaVu 1 lần cho cả tiến trình.
+
+Thứ tự dò (giữ nguyên như pdf_service cũ):
+  - settings.FONT_PATH / FONT_PATH_BOLD
+  - assets/TimesNewRoman(.ttf / -Bold.ttf)
+  - C:\\Windows\\Fonts\\times(.ttf / bd.ttf)
+  - assets/DejaVuSans(.ttf / -Bold.ttf)
+Không có -> dùng font chuẩn Times-Roman / Times-Bold (không crash).
+
+ensure_fonts() gọi lúc startup; các lần sau chỉ trả kết quả đã lưu (không đọc lại file TTF).
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Optional
+
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+
+from app.core.config import settings
+
+FALLBACK_REG = "Times-Roman"
+FALLBACK_BOLD = "Times-Bold"
+
+_lock = threading.Lock()
+_state: Optional[dict[str, Any]] = None
+
+
+def _first_existing(paths):
+    for p in paths:
+        if not p:
+            continue
+        p = os.path.abspath(str(p).strip().strip('"').strip("'"))
+        if os.path.exists(p):
+            return p
+    return None
+
+
+def _candidates() -> tuple[list, list]:
+    reg = [
+        getattr(settings, "FONT_PATH", None),
+        os.path.join(os.getcwd(), "assets", "TimesNewRoman.ttf"),
+        r"C:\Windows\Fonts\times.ttf",
+        os.path.join(os.getcwd(), "assets", "DejaVuSans.ttf"),
+    ]
+    bold = [
+        getattr(settings, "FONT_PATH_BOLD", None) or getattr(settings, "FONT_PATH", None),
+        os.path.join(os.getcwd(), "assets", "TimesNewRoman-Bold.ttf"),
+        r"C:\Windows\Fonts\timesbd.ttf",
+        os.path.join(os.getcwd(), "assets", "DejaVuSans-Bold.ttf"),
+    ]
+    return reg, bold
+
+
+def _register(name: str, path: Optional[str], fallback: str, errors: list) -> tuple[str, Optional[str]]:
+    if not path:
+        return fallback, None
+    if name in pdfmetrics.getRegisteredFontNames():
+        return name, path  # đã có (vd. tiến trình con fork từ tiến trình đã nạp)
+    try:
+        pdfmetrics.registerFont(TTFont(name, path))
+        return name, path
+    except Exception as e:
+        print(f"[WARN] Could not register TrueType font {name} ({path}):", e)
+        errors.append(f"{name}: {e}")
+        return fallback, None
+
+
+def _load() -> dict[str, Any]:
+    t0 = time.perf_counter()
+    reg_paths, bold_paths = _candidates()
+    errors: list = []
+    reg, reg_path = _register("TNR", _first_existing(reg_paths), FALLBACK_REG, errors)
+    bold, bold_path = _register("TNR-Bold", _first_existing(bold_paths), FALLBACK_BOLD, errors)
+    return {
+        "regular": reg,
+        "bold": bold,
+        "regular_path": reg_path,
+        "bold_path": bold_path,
+        "fallback": reg == FALLBACK_REG or bold == FALLBACK_BOLD,
+        "errors": errors,
+        "loaded_at": datetime.utcnow().isoformat(),
+        "load_ms": round((time.perf_counter() - t0) * 1000, 2),
+        "pid": os.getpid(),
+    }
+
+
+def ensure_fonts() -> dict[str, Any]:
+    """Nạp + đăng ký font nếu chưa; idempotent, an toàn khi gọi song song."""
+    global _state
+    st = _state
+    if st is not None:
+        return st
+    with _lock:
+        if _state is None:
+            _state = _load()
+        return _state
+
+
+def font_names() -> tuple[str, str]:
+    """(regular, bold) đã đăng ký — dùng trực tiếp cho canvas.setFont / TableStyle."""
+    st = ensure_fonts()
+    return st["regular"], st["bold"]
+
+
+def font_status() -> dict[str, Any]:
+    """Cho endpoint chẩn đoán: font nào đang dùng, nạp từ file nào, mất bao lâu."""
+    st = _state
+    if st is None:
+        return {"loaded": False}
+    return {"loaded": True, **st}
+
+
+def reload_fonts() -> dict[str, Any]:
+    """Dò lại (sau khi đổi FONT_PATH / chép font mới). Tên font đã đăng ký thì reportlab giữ bản cũ."""
+    global _state
+    with _lock:
+        _state = None
+    return ensure_fonts()
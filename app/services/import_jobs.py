@@ -0,0 +1,336 @@
+# app/services/import_jobs.py
+"""
+Import hồ sơ chạy nền trên server.
+
+- File upload (xlsx/csv) lưu vào IMPORTS_DIR, đọc dạng stream:
+  openpyxl read_only (không nạp cả workbook) / csv.reader — không dùng pandas.
+- 1 worker thread xử lý lần lượt các job, mỗi lô BULK_CHUNK dòng đi qua
+  bulk_create_applicants (1 transaction / lô) rồi cập nhật tiến độ vào import_jobs.
+- Dòng ERR/SKIP được ghi dần ra CSV báo lỗi để tải về.
+Đóng tab trình duyệt không ảnh hưởng job.
+"""
+from __future__ import annotations
+
+import csv
+import logging
+import re
+import shutil
+import threading
+import unicodedata
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import inspect, select, text, update
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.checklist import ChecklistVersion
+from app.models.import_job import ImportJob
+from app.services.applicant_bulk import BULK_CHUNK, bulk_create_applicants
+
+log = logging.getLogger("import_jobs")
+
+ALLOWED_EXT = {".xlsx", ".csv"}
+ACTIVE_STATUSES = ("queued", "running", "cancelling")
+
+# Giống FIELD_DEFS của web/import_students.js (key, nhãn, alias) để đoán cột khi FE không gửi mapping
+FIELD_DEFS: List[Tuple[str, str, List[str]]] = [
+    ("ma_ho_so", "Mã hồ sơ", ["ma ho so", "ma_hs", "ma_hoso", "hoso", "code"]),
+    ("ho_ten", "Họ và tên", ["ho va ten", "ho ten", "hoten", "full name", "fullname"]),
+    ("ho_dem", "Họ đệm", ["ho dem", "hodem", "last name", "ho"]),
+    ("ten", "Tên", ["ten goi", "first name", "tên gọi"]),
+    ("ma_so_hv", "Mã số HV", ["mshv", "ma so", "ma hoc vien", "ma_hv", "mahv", "mssv"]),
+    ("gioi_tinh", "Giới tính", ["gioi tinh", "sex", "gender", "gt"]),
+    ("dan_toc", "Dân tộc", ["dan toc", "dantoc", "ethnicity", "dan-toc"]),
+    ("ngay_sinh", "Ngày sinh", ["dob", "date of birth", "ns", "sinh nhat"]),
+    ("so_dt", "Số ĐT", ["sdt", "so dien thoai", "dien thoai", "so lien he"]),
+    ("email_hoc_vien", "Email học viên", ["email", "email hoc vien", "mail", "gmail"]),
+    ("nganh_nhap_hoc", "Ngành nhập học", ["nganh", "nganh hoc"]),
+    ("dot", "Đợt", ["dot nhap hoc", "dot tuyen"]),
+    ("khoa", "Khóa", ["nien khoa", "khoa hoc", "nk"]),
+    ("da_tn_truoc_do", "Đối tượng TN", ["doi tuong", "doi tuong tn", "doi tuong tot nghiep", "da tn", "trinh do"]),
+    ("ghi_chu", "Ghi chú", ["note", "ghi chu"]),
+]
+
+SEQ4_TAIL = re.compile(r"(\d{4})$")
+
+_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="import-job")
+_submit_lock = threading.Lock()
+
+
+def imports_dir() -> Path:
+    p = settings.imports_path
+    p.mkdir(parents=True, exist_ok=True)
+    return p
+
+
+# ================= Đọc file dạng stream =================
+def _norm_header(s: Any) -> str:
+    s = unicodedata.normalize("NFD", str(s or "").strip().lower())
+    s = "".join(ch for ch in s if unicodedata.category(ch) != "Mn")
+    return " ".join(s.split())
+
+
+def guess_mapping(headers: List[str]) -> Dict[str, str]:
+    normed = [_norm_header(h) for h in headers]
+    out: Dict[str, str] = {}
+    for key, label, aliases in FIELD_DEFS:
+        cands = {_norm_header(key), _norm_header(label)} | {_norm_header(a) for a in aliases}
+        for h, hn in zip(headers, normed):
+            if hn in cands:
+                out[key] = h
+                break
+    return out
+
+
+def _iter_xlsx(path: Path) -> Tuple[List[str], Optional[int], Iterator[tuple]]:
+    from openpyxl import load_workbook
+
+    wb = load_workbook(filename=str(path), read_only=True, data_only=True)
+    ws = wb.worksheets[0]
+    rows = ws.iter_rows(values_only=True)
+    headers = [str(x).strip() if x is not None else "" for x in (next(rows, None) or ())]
+    est = (ws.max_row - 1) if ws.max_row else None
+
+    def gen():
+        try:
+            yield from rows
+        finally:
+            wb.close()
+
+    return headers, est, gen()
+
+
+def _iter_csv(path: Path) -> Tuple[List[str], Optional[int], Iterator[tuple]]:
+    f = open(path, "r", encoding="utf-8-sig", newline="")
+    sample = f.read(4096)
+    f.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.reader(f, dialect)
+    headers = [h.strip() for h in next(reader, [])]
+
+    def gen():
+        try:
+            yield from reader
+        finally:
+            f.close()
+
+    return headers, None, gen()
+
+
+def open_rows(path: Path) -> Tuple[List[str], Optional[int], Iterator[tuple]]:
+    """(headers, số dòng ước lượng, iterator các dòng dữ liệu)."""
+    if path.suffix.lower() == ".csv":
+        return _iter_csv(path)
+    return _iter_xlsx(path)
+
+
+def _cell(v: Any) -> Any:
+    if v is None:
+        return ""
+    if isinstance(v, datetime):
+        return v.date()
+    if isinstance(v, date):
+        return v
+    if isinstance(v, float) and v.is_integer():
+        v = int(v)  # MSSV/SĐT gõ dạng số trong Excel
+    return str(v).strip()
+
+
+def row_to_payload(row: tuple, col_idx: Dict[str, int], opts: Dict[str, Any]) -> Optional[dict]:
+    """1 dòng bảng tính -> payload giống create_applicant (None = dòng trống)."""
+    vals = [_cell(v) for v in row]
+    if not any(v not in ("", None) for v in vals):
+        return None
+
+    def pick(key: str):
+        i = col_idx.get(key)
+        return vals[i] if i is not None and i < len(vals) else ""
+
+    ho_dem, ten = pick("ho_dem"), pick("ten")
+    ho_ten = pick("ho_ten") or " ".join(x for x in (ho_dem, ten) if x).strip()
+    m = SEQ4_TAIL.search(str(pick("ma_ho_so") or ""))
+    return {
+        "ngay_nhan_hs": opts.get("ngay_nhan_hs"),
+        "ho_ten": ho_ten,
+        "ho_dem": ho_dem or None,
+        "ten": ten or None,
+        "ma_so_hv": str(pick("ma_so_hv") or ""),
+        "ma_ho_so": m.group(1) if m else None,
+        "gioi_tinh": pick("gioi_tinh") or None,
+        "dan_toc": pick("dan_toc") or None,
+        "ngay_sinh": pick("ngay_sinh") or None,
+        "so_dt": str(pick("so_dt") or "") or None,
+        "email_hoc_vien": pick("email_hoc_vien") or None,
+        "nganh_nhap_hoc": pick("nganh_nhap_hoc") or None,
+        "dot": str(pick("dot") or "") or None,
+        "khoa": str(pick("khoa") or "") or None,
+        "da_tn_truoc_do": pick("da_tn_truoc_do") or None,
+        "ghi_chu": pick("ghi_chu") or None,
+        "docs": [],
+        "checklist_version_name": opts.get("checklist_version_name") or "v1",
+    }
+
+
+# ================= Tạo / chạy job =================
+def create_job(
+    db,
+    *,
+    upload: BinaryIO,
+    filename: str,
+    options: Dict[str, Any],
+    created_by: Optional[str],
+    created_by_id: Optional[Any] = None,
+) -> ImportJob:
+    ext = Path(filename or "").suffix.lower()
+    job_id = uuid.uuid4().hex
+    dest = imports_dir() / f"{job_id}{ext}"
+    with open(dest, "wb") as out:
+        shutil.copyfileobj(upload, out, length=1024 * 1024)
+
+    if not options.get("checklist_version_name"):
+        active = db.execute(
+            select(ChecklistVersion.version_name)
+            .where(ChecklistVersion.active.is_(True))
+            .order_by(ChecklistVersion.id.desc())
+        ).scalars().first()
+        options["checklist_version_name"] = active or "v1"
+
+    job = ImportJob(
+        id=job_id,
+        status="queued",
+        filename=filename,
+        file_path=str(dest),
+        options=options,
+        created_by=created_by,
+        created_by_id=str(created_by_id) if created_by_id is not None else None,
+    )
+    db.add(job)
+    db.commit()
+    return job
+
+
+def submit(job_id: str) -> None:
+    with _submit_lock:
+        _EXECUTOR.submit(run_job, job_id)
+
+
+def _set(db, job_id: str, **values) -> None:
+    db.execute(update(ImportJob).where(ImportJob.id == job_id).values(**values))
+    db.commit()
+
+
+def run_job(job_id: str) -> None:
+    db = SessionLocal()
+    try:
+        job = db.get(ImportJob, job_id)
+        if not job or job.status != "queued":
+            return
+        opts = dict(job.options or {})
+        nguoi_nhan = job.created_by
+        actor_id = job.created_by_id
+        path = Path(job.file_path)
+        report = imports_dir() / f"{job_id}_errors.csv"
+        _set(db, job_id, status="running", started_at=datetime.now(), report_path=str(report))
+
+        headers, est, rows = open_rows(path)
+        mapping = opts.get("mapping") or guess_mapping(headers)
+        col_idx = {k: headers.index(h) for k, h in mapping.items() if h in headers}
+        if "ma_so_hv" not in col_idx or not ({"ho_ten", "ho_dem", "ten"} & col_idx.keys()):
+            _set(db, job_id, status="failed", finished_at=datetime.now(),
+                 error_message="Thiếu map cột: Họ và Tên (hoặc Họ đệm + Tên) và Mã số HV")
+            return
+        if est is not None:
+            _set(db, job_id, total_rows=est)
+
+        processed = ok = err = skip = 0
+        line_no = 1  # dòng 1 = tiêu đề
+        with open(report, "w", encoding="utf-8-sig", newline="") as rf:
+            w = csv.writer(rf)
+            w.writerow(["Dòng", "Mã số HV", "Mã hồ sơ", "Kết quả", "Thông báo"])
+
+            def flush(batch: List[Tuple[int, dict]]):
+                nonlocal processed, ok, err, skip
+                if not batch:
+                    return
+                results = bulk_create_applicants(
+                    db, [p for _, p in batch], nguoi_nhan=nguoi_nhan, start_index=0,
+                    actor_id=actor_id, actor_name=nguoi_nhan,
+                )
+                for r in results:
+                    src_line = batch[r["idx"]][0]
+                    if r["status"] == "OK":
+                        ok += 1
+                        continue
+                    if r["status"] == "SKIP":
+                        skip += 1
+                    else:
+                        err += 1
+                    w.writerow([src_line, r.get("ma_so_hv") or "", r.get("ma_ho_so") or "", r["status"], r["msg"]])
+                rf.flush()
+                processed += len(batch)
+                _set(db, job_id, processed=processed, ok_count=ok, err_count=err, skip_count=skip)
+
+            batch: List[Tuple[int, dict]] = []
+            for row in rows:
+                line_no += 1
+                payload = row_to_payload(row, col_idx, opts)
+                if payload is None:
+                    continue
+                batch.append((line_no, payload))
+                if len(batch) >= BULK_CHUNK:
+                    flush(batch)
+                    batch = []
+                    if db.execute(select(ImportJob.status).where(ImportJob.id == job_id)).scalar() == "cancelling":
+                        _set(db, job_id, status="cancelled", finished_at=datetime.now())
+                        return
+            flush(batch)
+
+        _set(db, job_id, status="done", total_rows=processed, finished_at=datetime.now())
+    except Exception as e:
+        log.exception("Import job %s failed", job_id)
+        db.rollback()
+        try:
+            _set(db, job_id, status="failed", finished_at=datetime.now(), error_message=str(e)[:2000])
+        except Exception:
+            pass
+    finally:
+        db.close()
+
+
+def _ensure_columns(engine: Engine) -> None:
+    """create_all() không thêm cột cho bảng đã có -> bổ sung cột mới của import_jobs."""
+    cols = {c["name"] for c in inspect(engine).get_columns("import_jobs")}
+    if "created_by_id" in cols:
+        return
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE import_jobs ADD COLUMN created_by_id VARCHAR(128) NULL"))
+    log.info("Added column import_jobs.created_by_id")
+
+
+def recover_jobs(engine: Engine) -> None:
+    """
+    Startup: job đang chạy dở khi server tắt -> đánh dấu failed (các lô đã commit vẫn giữ);
+    job còn xếp hàng -> đưa lại vào worker.
+    """
+    from sqlalchemy.orm import Session
+
+    _ensure_columns(engine)
+    with Session(bind=engine) as db:
+        db.execute(
+            update(ImportJob)
+            .where(ImportJob.status.in_(("running", "cancelling")))
+            .values(status="failed", finished_at=datetime.now(),
+                    error_message="Máy chủ khởi động lại khi job đang chạy")
+        )
+        db.commit()
+        queued = db.execute(select(ImportJob.id).where(ImportJob.status == "queued")).scalars().all()
+    for jid in queued:
+        submit(jid)
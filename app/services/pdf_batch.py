@@ -0,0 +1,205 @@
+# app/services/pdf_batch.py
+"""
+In gộp A4 song song: chia danh sách hồ sơ thành lô, render từng lô trong
+ProcessPoolExecutor (mỗi tiến trình nạp font 1 lần), rồi ghép trang theo đúng
+thứ tự hồ sơ bằng pypdf.
+
+- Dữ liệu gửi sang tiến trình con là snapshot thuần (SimpleNamespace), không phải ORM object.
+- Mỗi lô được ghi ra file tạm (không gửi bytes qua pipe); bản ghép ghi vào `out`
+  (PdfWriter vẫn giữ trọn tài liệu đã ghép trong RAM tới lúc write()).
+- Không có pypdf / ít hồ sơ / PDF_WORKERS=1 / pool lỗi -> render tuần tự như cũ.
+"""
+from __future__ import annotations
+
+import io
+import math
+import multiprocessing as mp
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from app.models.applicant import Applicant, ApplicantDoc
+from app.models.checklist import ChecklistItem
+from app.services.font_registry import ensure_fonts
+from app.services.pdf_service import render_batch_pdf_to
+
+try:  # ghép PDF (tùy chọn)
+    from pypdf import PdfReader, PdfWriter
+except Exception:  # pragma: no cover
+    PdfReader = PdfWriter = None  # type: ignore
+
+# các thuộc tính hồ sơ mà bản in A4 dùng tới
+_APPLICANT_FIELDS = (
+    "ma_so_hv", "ma_ho_so", "ngay_nhan_hs", "ho_ten", "ho_dem", "ten",
+    "ngay_sinh", "gioi_tinh", "dan_toc", "so_dt", "email_hoc_vien",
+    "nganh_nhap_hoc", "da_tn_truoc_do", "dot", "khoa", "ghi_chu",
+    "nguoi_nhan_ky_ten", "checklist_version_id",
+)
+_MIN_CHUNK = 25  # hồ sơ / lô tối thiểu (lô quá nhỏ: tốn chi phí ghép + nhúng font lặp)
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_size = 0
+_pool_lock = threading.Lock()
+
+
+# ================= Snapshot (picklable) =================
+def snapshot_applicant(a: Applicant) -> SimpleNamespace:
+    return SimpleNamespace(**{f: getattr(a, f, None) for f in _APPLICANT_FIELDS})
+
+
+def snapshot_items(items: List[ChecklistItem]) -> List[SimpleNamespace]:
+    return [
+        SimpleNamespace(code=it.code, display_name=it.display_name, order_no=getattr(it, "order_no", 0))
+        for it in items
+    ]
+
+
+def snapshot_docs(docs: List[ApplicantDoc]) -> List[SimpleNamespace]:
+    return [SimpleNamespace(code=d.code, so_luong=d.so_luong) for d in docs]
+
+
+# ================= Pool =================
+def effective_workers() -> int:
+    """PDF_WORKERS > 0: dùng đúng số đó; 0 = tự chọn theo số CPU (tối đa 4)."""
+    n = int(getattr(settings, "PDF_WORKERS", 0) or 0)
+    if n > 0:
+        return n
+    return max(1, min(4, os.cpu_count() or 1))
+
+
+def _worker_init():
+    ensure_fonts()
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    global _pool, _pool_size
+    with _pool_lock:
+        if _pool is None or _pool_size != workers:
+            if _pool is not None:  # đổi số worker: pool cũ chạy nốt việc đang có của request khác
+                _pool.shutdown(wait=False)
+            # spawn: không fork cả tiến trình web (thread, kết nối DB...)
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=mp.get_context("spawn"),
+                initializer=_worker_init,
+            )
+            _pool_size = workers
+        return _pool
+
+
+def _reset_pool(broken: Optional[ProcessPoolExecutor] = None):
+    """Bỏ pool hiện tại; broken != None: chỉ bỏ nếu vẫn là pool hỏng đó (request khác có thể đã tạo lại)."""
+    global _pool, _pool_size
+    with _pool_lock:
+        if broken is not None and _pool is not broken:
+            return
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool, _pool_size = None, 0
+
+
+def shutdown_pool():
+    """Gọi khi tắt server."""
+    _reset_pool()
+
+
+def _render_chunk(args) -> str:
+    """Chạy trong tiến trình con: render 1 lô ra file tạm, trả về đường dẫn."""
+    apps, items_by_version, docs_by_app = args
+    fd, path = tempfile.mkstemp(prefix="ams_batch_", suffix=".pdf")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            render_batch_pdf_to(f, apps, items_by_version, docs_by_app)
+    except BaseException:
+        _unlink_all([path])  # lô lỗi: không để lại file tạm
+        raise
+    return path
+
+
+def merge_pdfs(parts: List[str], out, title: Optional[str] = None) -> None:
+    """Ghép các file PDF (theo thứ tự) vào file object `out`."""
+    writer = PdfWriter()
+    for path in parts:
+        writer.append(PdfReader(path))
+    if hasattr(writer, "compress_identical_objects"):  # pypdf >= 4.3: gộp font/ảnh trùng giữa các lô
+        writer.compress_identical_objects()
+    if title:
+        writer.add_metadata({"/Title": title})
+    writer.write(out)
+
+
+def _unlink_all(paths):
+    for p in paths:
+        try:
+            os.remove(p)
+        except OSError:
+            pass
+
+
+# ================= API =================
+def render_batch_pdf_parallel(
+    apps: List[Applicant],
+    items_by_version: Dict[int, List[ChecklistItem]],
+    docs_by_app: Dict[str, List[ApplicantDoc]],
+    workers: Optional[int] = None,
+    out=None,
+) -> Optional[bytes]:
+    """
+    Giống render_batch_pdf (1 trang A4 / hồ sơ, đúng thứ tự) nhưng chia lô cho nhiều tiến trình.
+    out=None -> trả bytes; có out (file tạm / BytesIO) -> ghi vào đó, trả None.
+    """
+    if out is None:
+        buf = io.BytesIO()
+        render_batch_pdf_parallel(apps, items_by_version, docs_by_app, workers, out=buf)
+        return buf.getvalue()
+
+    workers = workers or effective_workers()
+    min_n = int(getattr(settings, "PDF_PARALLEL_MIN", 100) or 0)
+    if workers <= 1 or len(apps) < max(min_n, 2 * _MIN_CHUNK) or PdfWriter is None:
+        render_batch_pdf_to(out, apps, items_by_version, docs_by_app)
+        return None
+
+    snap_items = {vid: snapshot_items(its) for vid, its in items_by_version.items()}
+    snap_apps = [snapshot_applicant(a) for a in apps]
+
+    # ~4 lô / worker để cân tải, nhưng không nhỏ hơn _MIN_CHUNK
+    size = max(_MIN_CHUNK, math.ceil(len(snap_apps) / (workers * 4)))
+    jobs = []
+    for i in range(0, len(snap_apps), size):
+        part = snap_apps[i:i + size]
+        vids = {a.checklist_version_id for a in part}
+        jobs.append((
+            part,
+            {vid: snap_items.get(vid, []) for vid in vids},
+            {a.ma_so_hv: snapshot_docs(docs_by_app.get(a.ma_so_hv, [])) for a in part},
+        ))
+
+    pool = None
+    futures = []
+    try:
+        pool = _get_pool(workers)
+        futures = [pool.submit(_render_chunk, job) for job in jobs]
+        parts = [f.result() for f in futures]  # giữ đúng thứ tự lô
+    except Exception as e:
+        print("[WARN] Parallel PDF render failed, falling back to sequential:", e)
+        # chỉ huỷ lô của lần gọi này (pool dùng chung với request khác), chờ lô đang chạy xong
+        # rồi mới xoá file tạm của chúng
+        for f in futures:
+            f.cancel()
+        wait(futures)
+        _unlink_all(f.result() for f in futures if not f.cancelled() and f.exception() is None)
+        if isinstance(e, BrokenProcessPool):
+            _reset_pool(pool)
+        render_batch_pdf_to(out, apps, items_by_version, docs_by_app)
+        return None
+
+    try:
+        merge_pdfs(parts, out, title="Bản in A4 - Danh sách")
+    finally:
+        _unlink_all(parts)
+    return None
@@ -1,6 +1,7 @@
 # app/services/pdf_service.py
 from datetime import datetime, date
-import io, os
+from functools import lru_cache
+import io, os, threading
 from typing import List, Dict
 from pathlib import Path
 import re
@@ -11,12 +12,13 @@ from reportlab.lib.units import mm
 from reportlab.pdfgen import canvas as rl_canvas
 from reportlab.platypus import Table, TableStyle
 from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.pdfbase.pdfmetrics import stringWidth
 
 from ..core.config import settings
 from ..models.applicant import Applicant, ApplicantDoc
 from ..models.checklist import ChecklistItem
+from .font_registry import font_names
+from . import receipt_cache
 
 from reportlab.platypus import (
     Table, TableStyle, BaseDocTemplate, PageTemplate, Frame, Paragraph, Spacer
@@ -47,69 +49,56 @@ LM, RM, TM, BM = 15*mm, 15*mm, 18*mm, 18*mm
 PARA_LEADING = 6.2 * mm
 KV_STEP      = 6.5 * mm
 
-# Font mặc định (sẽ đổi sau khi register)
+# Font mặc định (đổi theo font_registry khi render)
 FONT_REG  = "Times-Roman"
 FONT_BOLD = "Times-Bold"
 # =======================================================
 
-def _first_existing(paths):
-    for p in paths:
-        if not p:
-            continue
-        p = os.path.abspath(str(p).strip().strip('"').strip("'"))
-        if os.path.exists(p):
-            return p
-    return None
+# reportlab nhúng font TTF (TTFont.makeSubset) lúc save() bằng con trỏ đọc dùng chung của font
+# -> nhiều luồng save() cùng lúc làm hỏng / lẫn subset. Phần vẽ vẫn song song, chỉ save() tuần tự.
+_SAVE_LOCK = threading.Lock()
+
+
+def _save(c: rl_canvas.Canvas) -> None:
+    with _SAVE_LOCK:
+        c.save()
+
 
 def _register_font_times():
-    r"""
-    Tự dò Times New Roman/DejaVu:
-      - settings.FONT_PATH / FONT_PATH_BOLD
-      - assets\TimesNewRoman(.ttf/.Bold.ttf)
-      - C:\Windows\Fonts\times(.ttf/.bd.ttf)
-      - assets\DejaVuSans(.ttf/.Bold.ttf)
-    Không có -> fallback Times-Roman/Times-Bold (không crash).
+    """
+    Lấy tên font đã đăng ký từ font_registry (nạp 1 lần lúc startup / lần đầu gọi).
+    Không dò file, không đọc lại TTF mỗi lần render.
     """
     global FONT_REG, FONT_BOLD
+    FONT_REG, FONT_BOLD = font_names()
 
-    reg = _first_existing([
-        getattr(settings, "FONT_PATH", None),
-        os.path.join(os.getcwd(), "assets", "TimesNewRoman.ttf"),
-        r"C:\Windows\Fonts\times.ttf",
-        os.path.join(os.getcwd(), "assets", "DejaVuSans.ttf"),
-    ])
-    bold = _first_existing([
-        getattr(settings, "FONT_PATH_BOLD", None) or getattr(settings, "FONT_PATH", None),
-        os.path.join(os.getcwd(), "assets", "TimesNewRoman-Bold.ttf"),
-        r"C:\Windows\Fonts\timesbd.ttf",
-        os.path.join(os.getcwd(), "assets", "DejaVuSans-Bold.ttf"),
-    ])
-
-    try:
-        if reg:
-            pdfmetrics.registerFont(TTFont("TNR", reg))
-            FONT_REG = "TNR"
-        if bold:
-            pdfmetrics.registerFont(TTFont("TNR-Bold", bold))
-            FONT_BOLD = "TNR-Bold"
-    except Exception as e:
-        print("[WARN] Could not register TrueType fonts:", e)
-        # giữ fallback
 
+# ===== Đo chữ: cache độ rộng theo (chuỗi, font, cỡ) =====
+@lru_cache(maxsize=16384)
+def _text_width(s: str, font: str, size: float) -> float:
+    """stringWidth có nhớ — dùng cho từng từ, nhãn cố định, dấu cách."""
+    return stringWidth(s, font, size)
 
 def _wrap_lines(text: str, font: str, size: int, max_w: float):
+    """
+    Ngắt dòng theo từ, tuyến tính: cộng dồn độ rộng từng từ (đã cache) + dấu cách
+    thay vì đo lại cả chuỗi đang ghép sau mỗi từ. Kết quả giống cách cũ.
+    """
     words = (text or "").split()
-    lines, cur = [], ""
+    space_w = _text_width(" ", font, size)
+    lines, cur, cur_w = [], [], 0.0
     for w in words:
-        t = (cur + " " + w).strip()
-        if stringWidth(t, font, size) <= max_w:
-            cur = t
+        ww = _text_width(w, font, size)
+        if not cur:
+            cur, cur_w = [w], ww
+        elif cur_w + space_w + ww <= max_w:
+            cur.append(w)
+            cur_w += space_w + ww
         else:
-            if cur:
-                lines.append(cur)
-            cur = w
+            lines.append(" ".join(cur))
+            cur, cur_w = [w], ww
     if cur:
-        lines.append(cur)
+        lines.append(" ".join(cur))
     return lines
 
 # ===== Helper tên: ưu tiên ho_dem + ten, fallback ho_ten =====
@@ -147,7 +136,7 @@ def _draw_kv(c, x_label, _x_val_ignored, y, label, value, step=KV_STEP, gap=1.4*
     c.setFont(FONT_REG, TEXT_SIZE)
     c.drawString(x_label, y, lbl_text)
 
-    x_val = x_label + stringWidth(lbl_text, FONT_REG, TEXT_SIZE) + gap
+    x_val = x_label + _text_width(lbl_text, FONT_REG, TEXT_SIZE) + gap
     c.setFont(FONT_BOLD, TEXT_SIZE)
     c.drawString(x_val, y, value or "")
 
@@ -375,7 +364,7 @@ def render_single_pdf(a: Applicant, items: List[ChecklistItem], docs: List[Appli
     sig_top = y_note - 4*mm
     _draw_signature_block(c, sig_top, W, a.nguoi_nhan_ky_ten or "")
 
-    c.showPage(); c.save()
+    c.showPage(); _save(c)
     return buf.getvalue()
 
 # ================== A4: in gộp ==================
@@ -384,75 +373,297 @@ def render_batch_pdf(
     items_by_version: Dict[int, List[ChecklistItem]],
     docs_by_app: Dict[str, List[ApplicantDoc]],   # key = MSSV
 ):
-    _register_font_times()
     buf = io.BytesIO()
-    c = rl_canvas.Canvas(buf, pagesize=A4)
+    render_batch_pdf_to(buf, apps, items_by_version, docs_by_app)
+    return buf.getvalue()
+
+def render_batch_pdf_to(
+    out,                                          # file object (BytesIO / file tạm)
+    apps: List[Applicant],
+    items_by_version: Dict[int, List[ChecklistItem]],
+    docs_by_app: Dict[str, List[ApplicantDoc]],
+) -> None:
+    """
+    Như render_batch_pdf nhưng ghi thẳng vào file object (không giữ thêm bản bytes;
+    Canvas vẫn giữ mọi trang trong RAM tới save()).
+    Dùng layout biên dịch sẵn: phần tĩnh vẽ 1 lần thành form XObject, mỗi trang chỉ vẽ chữ thay đổi.
+    """
+    _register_font_times()
+    c = rl_canvas.Canvas(out, pagesize=A4)
     c.setTitle("Bản in A4 - Danh sách")
     W, H = A4
 
+    forms: Dict[tuple, str] = {}   # form đã đăng ký trong canvas này
     for a in apps:
         items = items_by_version.get(a.checklist_version_id, [])
         docs  = docs_by_app.get(a.ma_so_hv, [])
+        _draw_a4_compiled(c, W, H, forms, a, items, docs)
+        c.showPage()
 
-        y = _header_block(
-            c, W, H,
-            getattr(a, "khoa", "") or "",
-            a.ma_ho_so,
-            a.ngay_nhan_hs
-        )
+    _save(c)
+
+# ================== A4: layout biên dịch sẵn (in gộp) ==================
+# Khoá = (font, khổ giấy, khóa, checklist). Chỉ giữ dữ liệu bất biến (nội dung bảng, toạ độ ô/nhãn),
+# dùng lại cho mọi trang cùng khoá (kể cả giữa các lần in, nhiều luồng cùng lúc).
+# Table của reportlab gán/xoá self.canv trong drawOn -> KHÔNG dùng chung giữa các canvas:
+# mỗi canvas dựng Table riêng 1 lần khi tạo form XObject.
+_A4_GEOM: Dict[tuple, dict] = {}
+_A4_GEOM_MAX = 64
+_A4_GEOM_LOCK = threading.Lock()
+
+_KV_ROWS = (
+    ("Họ và tên:", "Mã số HV:"),
+    ("Ngày sinh:", "Giới tính:"),
+    ("Số ĐT:", "Email HV:"),
+    ("Dân tộc:", "Ngành nhập học:"),
+    ("Đã TN:", "Đợt:"),
+)
+NOTE_LABEL_W = 22 * mm
 
-        # 2 cột thông tin
-        left_lbl, left_val   = LM,         LM + 26*mm
-        right_lbl, right_val = LM + 85*mm, LM + 110*mm
 
-        # Hàng 1
-        y_l = _draw_kv(c, left_lbl,  left_val,  y, "Họ và tên:",      _full_name(a))
-        y_r = _draw_kv(c, right_lbl, right_val, y, "Mã số HV:",       a.ma_so_hv or "");                       y = min(y_l, y_r)
+def _kv_values(a: Applicant):
+    """Giá trị 5 hàng × 2 cột, cùng thứ tự với _KV_ROWS."""
+    return (
+        (_full_name(a), a.ma_so_hv or ""),
+        (_fmt_dmy(a.ngay_sinh), getattr(a, "gioi_tinh", "") or ""),
+        (a.so_dt or "", getattr(a, "email_hoc_vien", "") or ""),
+        (getattr(a, "dan_toc", "") or "", a.nganh_nhap_hoc or ""),
+        (a.da_tn_truoc_do or "", a.dot or ""),
+    )
 
-        # Hàng 2
-        y_l = _draw_kv(c, left_lbl,  left_val,  y, "Ngày sinh:",      _fmt_dmy(a.ngay_sinh))
-        y_r = _draw_kv(c, right_lbl, right_val, y, "Giới tính:",      getattr(a, "gioi_tinh", "") or "");     y = min(y_l, y_r)
 
-        # Hàng 3
-        y_l = _draw_kv(c, left_lbl,  left_val,  y, "Số ĐT:",          a.so_dt or "")
-        y_r = _draw_kv(c, right_lbl, right_val, y, "Email HV:",       getattr(a, "email_hoc_vien", "") or "");y = min(y_l, y_r)
+def _cell_text_pos(t: Table, row: int, col: int):
+    """Toạ độ (x, baseline) của chuỗi 1 dòng trong ô — cùng công thức Table._drawCell (tương đối gốc bảng)."""
+    cs = t._cellStyles[row][col]
+    colpos = t._colpositions[col]
+    colwidth = t._colpositions[col + 1] - colpos
+    rowpos = t._rowpositions[row + 1]
+    rowheight = t._rowpositions[row] - rowpos
+    if cs.alignment in ("CENTRE", "CENTER"):
+        x = colpos + (colwidth + cs.leftPadding - cs.rightPadding) * 0.5
+    elif cs.alignment == "RIGHT":
+        x = colpos + colwidth - cs.rightPadding
+    else:
+        x = colpos + cs.leftPadding
+    if cs.valign == "TOP":
+        y = rowpos + rowheight - cs.topPadding - cs.fontsize
+    elif cs.valign == "MIDDLE":
+        y = rowpos + (cs.bottomPadding + rowheight - cs.topPadding + cs.leading) / 2.0 - cs.fontsize
+    else:
+        y = rowpos + cs.bottomPadding + cs.leading - cs.fontsize
+    return x, y
+
+
+def _a4_items_table(rows, W) -> Table:
+    """Bảng danh mục (cột "Số lượng" để trống) — dựng mới cho mỗi canvas."""
+    w = W - LM - RM
+    table = Table([list(r) for r in rows], colWidths=[w*0.10, w*0.68, w*0.22])
+    table.setStyle(TableStyle([
+        ("FONTNAME",   (0,0), (-1,-1), FONT_REG),
+        ("FONTNAME",   (0,0), (-1,0),  FONT_BOLD),
+        ("FONTSIZE",   (0,0), (-1,-1), TEXT_SIZE),
+        ("ALIGN",      (0,0), (-1,0),  "CENTER"),
+        ("ALIGN",      (0,1), (0,-1),  "CENTER"),
+        ("ALIGN",      (-1,1), (-1,-1),  "CENTER"),
+        ("GRID",       (0,0), (-1,-1), 0.5, colors.black),
+        ("TOPPADDING",    (0,0), (-1,-1), 6),
+        ("BOTTOMPADDING", (0,0), (-1,-1), 5),
+        ("LEFTPADDING",   (0,0), (-1,-1), 4),
+        ("RIGHTPADDING",  (0,0), (-1,-1), 4),
+    ]))
+    return table
 
-        # Hàng 4
-        y_l = _draw_kv(c, left_lbl,  left_val,  y, "Dân tộc:",        getattr(a, "dan_toc", "") or "")
-        y_r = _draw_kv(c, right_lbl, right_val, y, "Ngành nhập học:", a.nganh_nhap_hoc or "");                y = min(y_l, y_r)
 
-        # Hàng 5
-        y_l = _draw_kv(c, left_lbl,  left_val,  y, "Đã TN:",          a.da_tn_truoc_do or "")
-        y_r = _draw_kv(c, right_lbl, right_val, y, "Đợt:",            a.dot or "");                            y = min(y_l, y_r)
+_SIG_ROW_HEIGHTS = (1*PARA_LEADING, 12*mm, 36*mm)
 
-        # Bảng hồ sơ gồm
-        c.setFont(FONT_BOLD, TEXT_SIZE); c.drawString(LM, y, "Hồ sơ gồm:")
-        y -= 6*mm
-        rows = _build_checklist_rows(items, docs)
-        y = _draw_checklist_table(c, LM, y, W - LM - RM, rows)
 
-        # Sau bảng
-        y -= 10*mm
+def _signature_table(W) -> Table:
+    """Bảng chữ ký như _draw_signature_block, ô tên để trống — dựng mới cho mỗi canvas."""
+    table_w = W - LM - RM
+    t = Table([["",""], ["","Người nhận"], ["", ""]],
+              colWidths=[table_w*0.5, table_w*0.5], rowHeights=list(_SIG_ROW_HEIGHTS))
+    t.setStyle(TableStyle([
+        ("FONTNAME", (0,0), (-1,-1), FONT_REG),
+        ("FONTNAME", (1,2), (1,2), FONT_BOLD),
+        ("FONTSIZE", (0,0), (-1,-1), TEXT_SIZE),
+        ("ALIGN",    (1,1), (1,2), "CENTER"),
+        ("VALIGN",   (0,0), (-1,-1), "MIDDLE"),
+        ("INNERGRID",(0,0),(-1,-1),0,colors.white),
+        ("LINEABOVE",(0,0),(-1,-1),0,colors.white),
+        ("LINEBELOW",(0,0),(-1,-1),0,colors.white),
+        ("TOPPADDING",(0,0),(-1,-1),2),
+        ("BOTTOMPADDING",(0,0),(-1,-1),2),
+    ]))
+    return t
 
-        # Ghi chú
-        c.setFont(FONT_REG, TEXT_SIZE);  c.drawString(LM, y, "Ghi chú:")
-        c.setFont(FONT_BOLD, TEXT_SIZE)
-        NOTE_LABEL_W = 22 * mm
-        text_w = W - LM - RM - NOTE_LABEL_W
-        note_text = a.ghi_chu or ""
-        lines = _wrap_lines(note_text, FONT_BOLD, TEXT_SIZE, text_w)
-        y_note = y
-        for line in lines:
-            c.drawString(LM + NOTE_LABEL_W, y_note, line)
-            y_note -= PARA_LEADING
-
-        sig_top = y_note - 4*mm
-        _draw_signature_block(c, sig_top, W, a.nguoi_nhan_ky_ten or "")
 
-        c.showPage()
+def _a4_geometry(W, H, khoa: str, items: List[ChecklistItem]) -> dict:
+    key = (
+        FONT_REG, FONT_BOLD, W, H, khoa,
+        tuple((it.code, it.display_name) for it in items),
+    )
+    g = _A4_GEOM.get(key)
+    if g is not None:
+        return g
 
-    c.save()
-    return buf.getvalue()
+    # Header: cùng toạ độ với _header_block
+    box_w, box_h = 42*mm, 14*mm
+    x_box = W - box_w - 8*mm
+    y_box = H - 7*mm - box_h
+    title_y = y_box - 12*mm
+    date_y = title_y - 7*mm
+    title = "BIÊN NHẬN HỒ SƠ NHẬP HỌC CHƯƠNG TRÌNH ĐÀO TẠO TỪ XA"
+    if khoa:
+        title += f" KHÓA {khoa}"
+    intro = "Viện Hợp tác và Phát triển Đào tạo xác nhận đã nhận hồ sơ nhập học"
+    intro += f" khóa {khoa} của Anh/Chị:" if khoa else " của Anh/Chị:"
+    intro_lines = _wrap_lines(intro, FONT_REG, TEXT_SIZE, W - LM - RM)
+    y = date_y - 10*mm - len(intro_lines) * PARA_LEADING
+
+    # 5 hàng nhãn/giá trị (giá trị bám sau dấu ':' như _draw_kv)
+    kv = []
+    for lbl_l, lbl_r in _KV_ROWS:
+        row = []
+        for x_lbl, lbl in ((LM, lbl_l), (LM + 85*mm, lbl_r)):
+            row.append((x_lbl, lbl, x_lbl + _text_width(lbl, FONT_REG, TEXT_SIZE) + 1.4*mm))
+        kv.append((y, row))
+        y -= KV_STEP
+
+    # Bảng danh mục: cột "Số lượng" để trống, số lượng vẽ riêng từng trang
+    hs_y = y
+    y -= 6*mm
+    rows = (("STT", "Danh mục", "Số lượng"),)
+    rows += tuple((str(i), it.display_name, "") for i, it in enumerate(items, 1))
+    table = _a4_items_table(rows, W)
+    table.wrapOn(rl_canvas.Canvas(io.BytesIO()), 0, 0)
+    table_y = y - table._height
+    qty_pos = []
+    for r in range(1, len(rows)):
+        qx, qy = _cell_text_pos(table, r, 2)
+        qty_pos.append((LM + qx, table_y + qy))
+
+    g = {
+        "box": (x_box, y_box, box_w, box_h),
+        "title": (title_y, title),
+        "date_y": date_y,
+        "intro": (date_y - 10*mm, intro_lines),
+        "kv": kv,
+        "hs_y": hs_y,
+        "table": (rows, table._height, table_y),
+        "qty": qty_pos,
+        "codes": [it.code for it in items],
+        "note_y": table_y - 10*mm,
+        "key": key,
+    }
+    with _A4_GEOM_LOCK:
+        if len(_A4_GEOM) >= _A4_GEOM_MAX:
+            _A4_GEOM.clear()
+        _A4_GEOM[key] = g
+    return g
+
+
+def _signature_geometry(W) -> dict:
+    """Toạ độ bảng chữ ký (chiều cao, vị trí ô tên, gốc bảng tại y=0) — không giữ Table."""
+    key = ("sig", FONT_REG, FONT_BOLD, W)
+    g = _A4_GEOM.get(key)
+    if g is not None:
+        return g
+    t = _signature_table(W)
+    t.wrapOn(rl_canvas.Canvas(io.BytesIO()), 0, 0)
+    nx, ny = _cell_text_pos(t, 2, 1)
+    g = {"height": sum(_SIG_ROW_HEIGHTS), "name": (LM + nx, ny), "key": key}
+    with _A4_GEOM_LOCK:
+        _A4_GEOM[key] = g
+    return g
+
+
+def _a4_static_form(c, forms: Dict[tuple, str], W, H, khoa: str, g: dict) -> str:
+    """Form XObject phần tĩnh của trang (khung mã HS, tiêu đề, intro, nhãn, bảng, 'Ghi chú:')."""
+    fkey = g["key"]
+    name = forms.get(fkey)
+    if name:
+        return name
+    name = f"a4static{len(forms)}"
+    c.beginForm(name)
+    x_box, y_box, box_w, box_h = g["box"]
+    c.setLineWidth(1.0)
+    c.roundRect(x_box, y_box, box_w, box_h, 3.0*mm, stroke=1, fill=0)
+    c.setFont(FONT_BOLD, 11); c.drawCentredString(x_box + box_w/2, y_box + box_h - 4*mm, "MÃ HỒ SƠ")
+    title_y, title = g["title"]
+    c.setFont(FONT_BOLD, TITLE_SIZE); c.drawCentredString(W/2, title_y, title)
+    y, lines = g["intro"]
+    c.setFont(FONT_REG, TEXT_SIZE)
+    for line in lines:
+        c.drawString(LM, y, line)
+        y -= PARA_LEADING
+    for y, row in g["kv"]:
+        for x_lbl, lbl, _ in row:
+            c.drawString(x_lbl, y, lbl)
+    c.setFont(FONT_BOLD, TEXT_SIZE); c.drawString(LM, g["hs_y"], "Hồ sơ gồm:")
+    rows, _, table_y = g["table"]
+    table = _a4_items_table(rows, W)
+    table.wrapOn(c, 0, 0)
+    table.drawOn(c, LM, table_y)
+    c.setFont(FONT_REG, TEXT_SIZE); c.drawString(LM, g["note_y"], "Ghi chú:")
+    c.endForm()
+    forms[fkey] = name
+    return name
+
+
+def _signature_form(c, forms: Dict[tuple, str], W, sg: dict) -> str:
+    fkey = sg["key"]
+    name = forms.get(fkey)
+    if not name:
+        name = f"a4sig{len(forms)}"
+        c.beginForm(name)
+        t = _signature_table(W)
+        t.wrapOn(c, 0, 0)
+        t.drawOn(c, LM, 0)
+        c.endForm()
+        forms[fkey] = name
+    return name
+
+
+def _draw_a4_compiled(c, W, H, forms: Dict[tuple, str], a: Applicant, items, docs) -> None:
+    """1 trang A4: doForm phần tĩnh + vẽ phần thay đổi. Kết quả trùng khớp bản vẽ từng phần ở trên."""
+    khoa = (getattr(a, "khoa", "") or "").strip()
+    g = _a4_geometry(W, H, khoa, items)
+    c.doForm(_a4_static_form(c, forms, W, H, khoa, g))
+
+    x_box, y_box, box_w, _ = g["box"]
+    c.setFont(FONT_BOLD, 13); c.drawCentredString(x_box + box_w/2, y_box + 4*mm, a.ma_ho_so or "")
+    c.setFont(FONT_BOLD, TEXT_SIZE + 1)
+    c.drawRightString(W - RM, g["date_y"], f"Ngày nhận HS: {_fmt_dmy(a.ngay_nhan_hs)}")
+
+    c.setFont(FONT_BOLD, TEXT_SIZE)
+    for (y, row), vals in zip(g["kv"], _kv_values(a)):
+        for (_, _, x_val), v in zip(row, vals):
+            if v:
+                c.drawString(x_val, y, v)
+
+    doc_map = {d.code: d.so_luong for d in docs}
+    for code, (qx, qy) in zip(g["codes"], g["qty"]):
+        qty = int(doc_map.get(code, 0) or 0)
+        if qty:
+            c.drawCentredString(qx, qy, str(qty))
+
+    y_note = g["note_y"]
+    for line in _wrap_lines(a.ghi_chu or "", FONT_BOLD, TEXT_SIZE, W - LM - RM - NOTE_LABEL_W):
+        c.drawString(LM + NOTE_LABEL_W, y_note, line)
+        y_note -= PARA_LEADING
+
+    sg = _signature_geometry(W)
+    dy = y_note - 4*mm - sg["height"]
+    sig = _signature_form(c, forms, W, sg)
+    c.saveState()
+    c.translate(0, dy)
+    c.doForm(sig)
+    c.restoreState()
+    name = a.nguoi_nhan_ky_ten or ""
+    if name:
+        nx, ny = sg["name"]
+        c.setFont(FONT_BOLD, TEXT_SIZE)
+        c.drawCentredString(nx, dy + ny, name)
 
 # ================== BẢN IN A5 TỐI GIẢN (cho học viên) ==================
 def _build_rows_nonzero(items: List[ChecklistItem], docs: List[ApplicantDoc]):
@@ -478,7 +689,12 @@ def render_single_pdf_a5(a: Applicant, items: List[ChecklistItem], docs: List[Ap
     c = rl_canvas.Canvas(buf, pagesize=landscape(A5))
     c.setTitle(f"Bản in A5 - {_full_name(a)}")
     W, H = landscape(A5)
+    _draw_a5_receipt(c, W, H, a, items, docs, _vn_date_line(None, "TP.HCM"))
+    c.showPage(); _save(c)
+    return buf.getvalue()
 
+def _draw_a5_receipt(c: rl_canvas.Canvas, W, H, a: Applicant, items, docs, date_line: str):
+    """Vẽ 1 biên nhận A5 ngang trong khung (0, 0, W, H) của canvas hiện tại."""
     # Lề & cỡ chữ gọn
     lm, rm, tm, bm = 8*mm, 8*mm, 6*mm, 6*mm
     title_sz, text_sz = 10, 9
@@ -580,7 +796,7 @@ def render_single_pdf_a5(a: Applicant, items: List[ChecklistItem], docs: List[Ap
     c.drawRightString(
         W - rm,
         bm_footer + sign_h + 2*mm,
-        _vn_date_line(None, "TP.HCM")
+        date_line
     )
     # Bảng chữ ký: Người nộp (HV) — Người nhận (NV)
     content_w = W - lm - rm
@@ -608,10 +824,77 @@ def render_single_pdf_a5(a: Applicant, items: List[ChecklistItem], docs: List[Ap
     sig.wrapOn(c, 0, 0)
     sig.drawOn(c, x_right, bm_footer)  # <-- đặt sát chân trang
 
-    c.showPage(); c.save()
+# ================== A5: in gộp ==================
+def render_batch_pdf_a5(
+    apps: List[Applicant],
+    items_by_version: Dict[int, List[ChecklistItem]],
+    docs_by_app: Dict[str, List[ApplicantDoc]],   # key = MSSV
+    *,
+    two_up: bool = False,
+):
+    buf = io.BytesIO()
+    render_batch_pdf_a5_to(buf, apps, items_by_version, docs_by_app, two_up=two_up)
     return buf.getvalue()
+
+def render_batch_pdf_a5_to(
+    out,
+    apps: List[Applicant],
+    items_by_version: Dict[int, List[ChecklistItem]],
+    docs_by_app: Dict[str, List[ApplicantDoc]],
+    *,
+    two_up: bool = False,
+) -> None:
+    """
+    Biên nhận A5 cho cả lô trên 1 canvas (font đăng ký 1 lần).
+    two_up=False: mỗi hồ sơ 1 trang A5 ngang.
+    two_up=True : ghép 2 biên nhận A5 ngang lên 1 tờ A4 dọc (trên/dưới) + đường cắt nét đứt.
+    """
+    _register_font_times()
+    W, H = landscape(A5)
+    date_line = _vn_date_line(None, "TP.HCM")   # cùng 1 ngày cho cả lô
+    c = rl_canvas.Canvas(out, pagesize=A4 if two_up else (W, H))
+    c.setTitle("Bản in A5 - Danh sách")
+
+    if not two_up:
+        for a in apps:
+            items = items_by_version.get(a.checklist_version_id, [])
+            docs = docs_by_app.get(a.ma_so_hv, [])
+            _draw_a5_receipt(c, W, H, a, items, docs, date_line)
+            c.showPage()
+        _save(c)
+        return
+
+    sheet_w, sheet_h = A4
+    half_h = sheet_h / 2.0
+    for i in range(0, len(apps), 2):
+        for slot, a in enumerate(apps[i:i + 2]):
+            items = items_by_version.get(a.checklist_version_id, [])
+            docs = docs_by_app.get(a.ma_so_hv, [])
+            c.saveState()
+            c.translate((sheet_w - W) / 2.0, half_h if slot == 0 else 0)
+            _draw_a5_receipt(c, W, H, a, items, docs, date_line)
+            c.restoreState()
+        # đường cắt giữa tờ
+        c.saveState()
+        c.setLineWidth(0.3)
+        c.setDash(3, 3)
+        c.setStrokeColor(colors.grey)
+        c.line(0, half_h, sheet_w, half_h)
+        c.restoreState()
+        c.showPage()
+    _save(c)
 # ================== HẾT BẢN IN A5 ==================
 
+# ===== BIÊN NHẬN 1 HỒ SƠ QUA CACHE (A4/A5) =====
+def render_receipt_cached(a: Applicant, items: List[ChecklistItem], docs: List[ApplicantDoc], *, a5: bool = False) -> bytes:
+    """In lại / gửi lại khi hồ sơ không đổi -> lấy từ receipt_cache thay vì vẽ lại."""
+    if a5:
+        # A5 có dòng 'TP.HCM, ngày ...' theo ngày hiện tại -> ngày nằm trong khoá cache
+        return receipt_cache.get_or_render(
+            a, items, docs, "A5", lambda: render_single_pdf_a5(a, items, docs), today=_now_vn().date()
+        )
+    return receipt_cache.get_or_render(a, items, docs, "A4", lambda: render_single_pdf(a, items, docs))
+
 # ===== LƯU FILE PDF BIÊN NHẬN (A4/A5) =====
 def save_receipt_pdf_file(
     a: Applicant,
@@ -672,7 +955,7 @@ def save_receipt_pdf_file(
     out_dir: str | Path | None = None,
 ) -> str:
     """Render biên nhận (A4/A5) -> ghi file -> trả về absolute path."""
-    data = render_single_pdf_a5(a, items, docs) if a5 else render_single_pdf(a, items, docs)
+    data = render_receipt_cached(a, items, docs, a5=a5)
 
     base_dir: Path = Path(out_dir).resolve() if out_dir else settings.receipts_path
     base_dir.mkdir(parents=True, exist_ok=True)
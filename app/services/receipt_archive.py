@@ -0,0 +1,250 @@
+# app/services/receipt_archive.py
+"""
+Kho biên nhận PDF đã gửi / lưu (thay cho việc ghi file bien_nhan_<...>_<timestamp>.pdf phẳng trong RECEIPTS_DIR).
+
+- Khử trùng lặp theo nội dung: file = RECEIPT_ARCHIVE_DIR/<sha[:2]>/<sha[2:4]>/<sha>.pdf
+  (gửi lại cùng biên nhận -> không ghi thêm file, chỉ cập nhật last_used_at).
+- Bảng receipt_archive: hồ sơ -> các bản đã lưu (A4/A5), kèm tên file khi đính kèm.
+- Thư mục KHÔNG mount public; tải qua API có kiểm tra đăng nhập.
+- Dọn dẹp (gc): giữ RECEIPT_ARCHIVE_KEEP bản mới nhất / hồ sơ / khổ giấy, bỏ bản quá RECEIPT_ARCHIVE_MAX_DAYS;
+  file chỉ bị xoá khi không còn dòng nào trỏ tới.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.applicant import Applicant, ApplicantDoc
+from app.models.checklist import ChecklistItem
+from app.models.receipt_archive import ReceiptArchive
+
+log = logging.getLogger("receipt_archive")
+
+
+def archive_dir() -> Path:
+    p = settings.receipt_archive_path
+    p.mkdir(parents=True, exist_ok=True)
+    return p
+
+
+def blob_path(sha: str) -> Path:
+    return settings.receipt_archive_path / sha[:2] / sha[2:4] / f"{sha}.pdf"
+
+
+def _write_blob(sha: str, data: bytes) -> Path:
+    p = blob_path(sha)
+    if p.exists() and p.stat().st_size == len(data):
+        return p
+    p.parent.mkdir(parents=True, exist_ok=True)
+    tmp = p.with_name(f".{sha}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, p)  # ghi nguyên tử
+    return p
+
+
+def _download_name(a: Applicant, layout: str) -> str:
+    from app.services.pdf_service import _display_name, _safe_filename
+
+    mcode = (a.ma_ho_so or a.ma_so_hv or "").strip()
+    mcode_safe = _safe_filename(mcode) if mcode else "NA"
+    return f"bien_nhan_{layout}_{mcode_safe}_{_safe_filename(_display_name(a))}.pdf"
+
+
+# ================= Lưu =================
+def _find(db: Session, ma_so_hv: str, sha: str, layout: str) -> Optional[ReceiptArchive]:
+    return db.execute(
+        select(ReceiptArchive).where(
+            ReceiptArchive.applicant_ma_so_hv == ma_so_hv,
+            ReceiptArchive.sha256 == sha,
+            ReceiptArchive.layout == layout,
+        )
+    ).scalar_one_or_none()
+
+
+def store(db: Session, a: Applicant, data: bytes, layout: str) -> ReceiptArchive:
+    """Lưu PDF (khử trùng lặp) + ghi/cập nhật chỉ mục, giữ N bản mới nhất. Có commit."""
+    sha = hashlib.sha256(data).hexdigest()
+    _write_blob(sha, data)
+    now = datetime.utcnow()
+
+    row = _find(db, a.ma_so_hv, sha, layout)
+    if row is None:
+        row = ReceiptArchive(
+            applicant_ma_so_hv=a.ma_so_hv,
+            layout=layout,
+            sha256=sha,
+            size_bytes=len(data),
+            created_at=now,
+        )
+        try:
+            # savepoint: trùng khoá chỉ huỷ dòng này, không mất thay đổi đang chờ của caller
+            with db.begin_nested():
+                db.add(row)
+        except IntegrityError:  # request song song vừa ghi cùng bản
+            row = _find(db, a.ma_so_hv, sha, layout)
+    row.download_name = _download_name(a, layout)
+    row.last_used_at = now
+
+    dropped = _trim_applicant(db, a.ma_so_hv, layout)
+    db.commit()
+    _unlink_unreferenced(db, dropped)  # chỉ xoá file sau khi đã commit
+    return row
+
+
+def archive_receipt(
+    db: Session,
+    a: Applicant,
+    items: List[ChecklistItem],
+    docs: List[ApplicantDoc],
+    *,
+    a5: bool = False,
+) -> Tuple[ReceiptArchive, str]:
+    """Render biên nhận (qua receipt_cache) -> lưu kho. Trả (dòng chỉ mục, đường dẫn file)."""
+    from app.services.pdf_service import render_receipt_cached
+
+    data = render_receipt_cached(a, items, docs, a5=a5)
+    row = store(db, a, data, "A5" if a5 else "A4")
+    return row, str(blob_path(row.sha256))
+
+
+def attachment(row: ReceiptArchive) -> Tuple[str, str]:
+    """(đường dẫn file, tên hiển thị) cho send_html_email."""
+    return str(blob_path(row.sha256)), row.download_name or f"{row.sha256}.pdf"
+
+
+def list_for_applicant(db: Session, ma_so_hv: str) -> List[ReceiptArchive]:
+    return db.execute(
+        select(ReceiptArchive)
+        .where(ReceiptArchive.applicant_ma_so_hv == ma_so_hv)
+        .order_by(ReceiptArchive.last_used_at.desc(), ReceiptArchive.id.desc())
+    ).scalars().all()
+
+
+# ================= Dọn dẹp =================
+def _unlink_unreferenced(db: Session, shas: Iterable[str]) -> int:
+    shas = set(shas)
+    if not shas:
+        return 0
+    still = set(db.execute(
+        select(ReceiptArchive.sha256).where(ReceiptArchive.sha256.in_(shas))
+    ).scalars().all())
+    n = 0
+    for sha in shas - still:
+        try:
+            blob_path(sha).unlink()
+            n += 1
+        except OSError:
+            pass
+    return n
+
+
+def _trim_applicant(db: Session, ma_so_hv: str, layout: str) -> set:
+    """Bỏ các dòng ngoài RECEIPT_ARCHIVE_KEEP bản mới nhất; trả sha của các dòng đã bỏ."""
+    keep = int(getattr(settings, "RECEIPT_ARCHIVE_KEEP", 5) or 0)
+    if keep <= 0:
+        return set()
+    db.flush()
+    old = db.execute(
+        select(ReceiptArchive)
+        .where(ReceiptArchive.applicant_ma_so_hv == ma_so_hv, ReceiptArchive.layout == layout)
+        .order_by(ReceiptArchive.last_used_at.desc(), ReceiptArchive.id.desc())
+        .offset(keep)
+    ).scalars().all()
+    for r in old:
+        db.delete(r)
+    return {r.sha256 for r in old}
+
+
+def _remove_legacy_files(max_days: int) -> int:
+    """File bien_nhan_*.pdf kiểu cũ (ghi phẳng trong RECEIPTS_DIR) quá hạn."""
+    n = 0
+    ts = time.time() - max_days * 86400
+    for p in settings.receipts_path.glob("bien_nhan_*.pdf"):
+        try:
+            if p.stat().st_mtime < ts:
+                p.unlink()
+                n += 1
+        except OSError:
+            pass
+    return n
+
+
+def gc(db: Session, now: Optional[datetime] = None) -> dict:
+    """
+    Áp chính sách giữ lại cho toàn kho:
+      - bỏ dòng last_used_at quá RECEIPT_ARCHIVE_MAX_DAYS
+      - mỗi (hồ sơ, khổ giấy) chỉ giữ RECEIPT_ARCHIVE_KEEP bản mới nhất
+      - xoá file không còn được tham chiếu, file tạm dở dang, file kiểu cũ quá hạn
+    """
+    now = now or datetime.utcnow()
+    max_days = int(getattr(settings, "RECEIPT_ARCHIVE_MAX_DAYS", 730) or 0)
+    keep = int(getattr(settings, "RECEIPT_ARCHIVE_KEEP", 5) or 0)
+    removed, shas = 0, set()
+
+    if max_days > 0:
+        cutoff = now - timedelta(days=max_days)
+        old = db.execute(select(ReceiptArchive).where(ReceiptArchive.last_used_at < cutoff)).scalars().all()
+        for r in old:
+            shas.add(r.sha256)
+            db.delete(r)
+        removed += len(old)
+
+    if keep > 0:
+        rows = db.execute(
+            select(ReceiptArchive.id, ReceiptArchive.applicant_ma_so_hv, ReceiptArchive.layout, ReceiptArchive.sha256)
+            .order_by(
+                ReceiptArchive.applicant_ma_so_hv, ReceiptArchive.layout,
+                ReceiptArchive.last_used_at.desc(), ReceiptArchive.id.desc(),
+            )
+        ).all()
+        seen: dict = {}
+        extra_ids = []
+        for rid, mssv, layout, sha in rows:
+            k = (mssv, layout)
+            seen[k] = seen.get(k, 0) + 1
+            if seen[k] > keep:
+                extra_ids.append(rid)
+                shas.add(sha)
+        for i in range(0, len(extra_ids), 500):
+            for r in db.execute(select(ReceiptArchive).where(ReceiptArchive.id.in_(extra_ids[i:i + 500]))).scalars():
+                db.delete(r)
+        removed += len(extra_ids)
+
+    db.commit()
+    files = _unlink_unreferenced(db, shas)
+
+    # file tạm bị bỏ dở (server tắt giữa chừng khi ghi)
+    stale = time.time() - 3600
+    for p in settings.receipt_archive_path.glob("*/*/.*.tmp"):
+        try:
+            if p.stat().st_mtime < stale:
+                p.unlink()
+        except OSError:
+            pass
+
+    legacy = _remove_legacy_files(max_days) if max_days > 0 else 0
+    return {"rows_removed": removed, "files_removed": files, "legacy_removed": legacy}
+
+
+def gc_on_startup(engine: Engine) -> None:
+    """Startup: dọn kho 1 lần (chỉ mục có index, chi phí nhỏ)."""
+    archive_dir()
+    with Session(bind=engine) as db:
+        try:
+            res = gc(db)
+            if any(res.values()):
+                log.info("Receipt archive GC: %s", res)
+        except Exception:
+            db.rollback()
+            log.exception("Receipt archive GC failed")
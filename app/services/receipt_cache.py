@@ -0,0 +1,247 @@
+# app/services/receipt_cache.py
+"""
+Cache PDF biên nhận 1 hồ sơ (A4 / A5), khoá theo nội dung:
+  sha256( layout + các trường hồ sơ dùng khi vẽ + số lượng docs + checklist (code/tên/thứ tự) + font )
+=> dữ liệu đổi thì khoá đổi, không bao giờ trả bản cũ.
+
+2 tầng:
+- RAM: LRU giới hạn theo tổng byte (RECEIPT_CACHE_MEM_MB)
+- Đĩa: RECEIPT_CACHE_DIR/<mssv>_v<version>_<layout>_<hash>.pdf, giới hạn số file (RECEIPT_CACHE_DISK_FILES)
+  (ngoài RECEIPTS_DIR: thư mục đó mount public ở /static/receipts)
+
+Ghi hồ sơ (update_applicant, batch-update, xoá) / sửa checklist gọi invalidate_* để dọn bản cũ ngay.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Callable, Iterable, Optional
+
+from app.core.config import settings
+from app.services.font_registry import font_names
+
+# đổi khi sửa layout trong pdf_service để bỏ toàn bộ cache cũ
+LAYOUT_REV = "1"
+
+# các thuộc tính hồ sơ mà bản in A4/A5 dùng tới
+_FIELDS = (
+    "ma_so_hv", "ma_ho_so", "ngay_nhan_hs", "ho_ten", "ho_dem", "ten",
+    "ngay_sinh", "gioi_tinh", "dan_toc", "so_dt", "email_hoc_vien",
+    "nganh_nhap_hoc", "da_tn_truoc_do", "dot", "khoa", "ghi_chu",
+    "nguoi_nhan_ky_ten", "checklist_version_id",
+)
+
+_lock = threading.Lock()
+_mem: "OrderedDict[str, bytes]" = OrderedDict()
+_mem_bytes = 0
+_writes = 0
+_stats = {"hit_mem": 0, "hit_disk": 0, "miss": 0}
+
+
+def _plain(v: Any) -> Any:
+    if isinstance(v, (datetime, date)):
+        return v.isoformat()
+    return v
+
+
+def _safe(s: Any) -> str:
+    return "".join(ch if ch.isalnum() or ch in "-_" else "_" for ch in str(s or ""))
+
+
+def _cache_dir() -> Path:
+    return settings.receipt_cache_path
+
+
+def _mem_limit() -> int:
+    return int(getattr(settings, "RECEIPT_CACHE_MEM_MB", 64) or 0) * 1024 * 1024
+
+
+def _disk_limit() -> int:
+    return int(getattr(settings, "RECEIPT_CACHE_DISK_FILES", 5000) or 0)
+
+
+# ================= Khoá =================
+def receipt_key(a, items, docs, layout: str, *, today: Optional[date] = None) -> str:
+    """
+    Tên khoá '<mssv>_v<version>_<layout>_<sha256[:32]>'.
+    today: A5 in dòng 'TP.HCM, ngày ...' theo ngày hiện tại -> phải nằm trong khoá.
+    """
+    reg, bold = font_names()
+    payload = {
+        "rev": LAYOUT_REV,
+        "layout": layout,
+        "font": [reg, bold],
+        "today": _plain(today),
+        "a": {f: _plain(getattr(a, f, None)) for f in _FIELDS},
+        "items": [
+            [it.code, getattr(it, "display_name", None), getattr(it, "order_no", None)]
+            for it in (items or [])
+        ],
+        "docs": sorted(
+            [[d.code, int(getattr(d, "so_luong", 0) or 0)] for d in (docs or [])],
+            key=lambda x: str(x[0]),
+        ),
+    }
+    raw = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    h = hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+    vid = getattr(a, "checklist_version_id", None) or 0
+    return f"{_safe(getattr(a, 'ma_so_hv', ''))}_v{vid}_{layout}_{h}"
+
+
+# ================= RAM =================
+def _mem_get(key: str) -> Optional[bytes]:
+    with _lock:
+        data = _mem.get(key)
+        if data is not None:
+            _mem.move_to_end(key)
+        return data
+
+
+def _mem_put(key: str, data: bytes) -> None:
+    global _mem_bytes
+    limit = _mem_limit()
+    if len(data) > limit:
+        return
+    with _lock:
+        old = _mem.pop(key, None)
+        if old is not None:
+            _mem_bytes -= len(old)
+        _mem[key] = data
+        _mem_bytes += len(data)
+        while _mem_bytes > limit and _mem:
+            _, ev = _mem.popitem(last=False)
+            _mem_bytes -= len(ev)
+
+
+def _mem_drop(pred: Callable[[str], bool]) -> int:
+    global _mem_bytes
+    with _lock:
+        keys = [k for k in _mem if pred(k)]
+        for k in keys:
+            _mem_bytes -= len(_mem.pop(k))
+        return len(keys)
+
+
+# ================= Đĩa =================
+def _disk_get(key: str) -> Optional[bytes]:
+    p = _cache_dir() / f"{key}.pdf"
+    try:
+        data = p.read_bytes()
+    except OSError:
+        return None
+    try:
+        os.utime(p)  # LRU theo mtime
+    except OSError:
+        pass
+    return data
+
+
+def _disk_put(key: str, data: bytes) -> None:
+    global _writes
+    d = _cache_dir()
+    try:
+        d.mkdir(parents=True, exist_ok=True)
+        tmp = d / f".{key}.{os.getpid()}.tmp"
+        tmp.write_bytes(data)
+        os.replace(tmp, d / f"{key}.pdf")  # ghi nguyên tử
+    except OSError as e:
+        print("[WARN] receipt cache write failed:", e)
+        return
+    with _lock:
+        _writes += 1
+        prune = _writes % 100 == 0
+    if prune:
+        prune_disk()
+
+
+def prune_disk() -> int:
+    """Giữ tối đa RECEIPT_CACHE_DISK_FILES file, xoá file ít dùng nhất (mtime cũ nhất)."""
+    limit = _disk_limit()
+    try:
+        files = [(p.stat().st_mtime, p) for p in _cache_dir().glob("*.pdf")]
+    except OSError:
+        return 0
+    if len(files) <= limit:
+        return 0
+    files.sort()
+    n = 0
+    for _, p in files[: len(files) - limit]:
+        try:
+            p.unlink()
+            n += 1
+        except OSError:
+            pass
+    return n
+
+
+def _disk_drop(pattern: str) -> int:
+    n = 0
+    for p in _cache_dir().glob(pattern):
+        try:
+            p.unlink()
+            n += 1
+        except OSError:
+            pass
+    return n
+
+
+# ================= API =================
+def get_or_render(a, items, docs, layout: str, render: Callable[[], bytes], *, today: Optional[date] = None) -> bytes:
+    """Trả PDF từ RAM -> đĩa -> render (rồi lưu cả 2 tầng)."""
+    key = receipt_key(a, items, docs, layout, today=today)
+
+    data = _mem_get(key)
+    if data is not None:
+        _stats["hit_mem"] += 1
+        return data
+
+    data = _disk_get(key)
+    if data is not None:
+        _stats["hit_disk"] += 1
+        _mem_put(key, data)
+        return data
+
+    _stats["miss"] += 1
+    data = render()
+    _mem_put(key, data)
+    _disk_put(key, data)
+    return data
+
+
+def invalidate_applicant(ma_so_hv: str) -> int:
+    prefix = f"{_safe(ma_so_hv)}_v"
+    n = _mem_drop(lambda k: k.startswith(prefix))
+    return n + _disk_drop(f"{prefix}*.pdf")
+
+
+def invalidate_applicants(mssvs: Iterable[str]) -> int:
+    return sum(invalidate_applicant(m) for m in set(mssvs) if m)
+
+
+def invalidate_version(version_id: Optional[int]) -> int:
+    tag = f"_v{version_id or 0}_"
+    n = _mem_drop(lambda k: tag in k)
+    return n + _disk_drop(f"*{tag}*.pdf")
+
+
+def clear() -> None:
+    _mem_drop(lambda k: True)
+    _disk_drop("*.pdf")
+
+
+def purge_legacy_dir() -> None:
+    """Startup: xoá cache cũ ở RECEIPTS_DIR/cache (thư mục public, ai cũng tải được)."""
+    legacy = settings.receipts_path / "cache"
+    if legacy.is_dir() and legacy.resolve() != _cache_dir():
+        shutil.rmtree(legacy, ignore_errors=True)
+
+
+def stats() -> dict:
+    with _lock:
+        return {**_stats, "mem_entries": len(_mem), "mem_bytes": _mem_bytes}
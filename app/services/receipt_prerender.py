@@ -0,0 +1,90 @@
+# app/services/receipt_prerender.py
+"""
+Render sẵn biên nhận (A4 + A5) chạy nền sau khi tạo / sửa hồ sơ (RECEIPT_PRERENDER=True).
+
+- 1 worker thread, hàng chờ giới hạn RECEIPT_PRERENDER_QUEUE hồ sơ; đầy thì bỏ qua (in vẫn render như thường).
+- Cùng MSSV đang chờ -> gộp làm 1 (worker đọc dữ liệu mới nhất từ DB lúc chạy).
+- Kết quả nằm trong receipt_cache => /print, /print-a5, send-email (attach_receipt) chỉ việc lấy ra.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.applicant import Applicant, ApplicantDoc
+from app.models.checklist import ChecklistItem
+from app.services import checklist_cache
+
+log = logging.getLogger("receipt_prerender")
+
+_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="receipt-prerender")
+_lock = threading.Lock()
+_pending: set = set()
+_stats = {"queued": 0, "merged": 0, "dropped": 0, "done": 0, "failed": 0}
+
+
+def enabled() -> bool:
+    return bool(getattr(settings, "RECEIPT_PRERENDER", False))
+
+
+def load_receipt_inputs(db, a: Applicant) -> Tuple[List[ChecklistItem], List[ApplicantDoc]]:
+    """Checklist (theo order_no) + docs của hồ sơ — cùng thứ tự với /print để trùng khoá cache."""
+    items = checklist_cache.items_for_version(db, a.checklist_version_id)
+    docs = db.query(ApplicantDoc).filter(ApplicantDoc.applicant_ma_so_hv == a.ma_so_hv).all()
+    return items, docs
+
+
+def enqueue(ma_so_hv: Optional[str]) -> str:
+    """Xếp hàng render sẵn. Trả 'queued' | 'merged' | 'dropped' | 'disabled'."""
+    if not enabled() or not ma_so_hv:
+        return "disabled"
+    limit = int(getattr(settings, "RECEIPT_PRERENDER_QUEUE", 200) or 0)
+    with _lock:
+        if ma_so_hv in _pending:
+            _stats["merged"] += 1
+            return "merged"
+        if len(_pending) >= limit:
+            _stats["dropped"] += 1
+            return "dropped"
+        _pending.add(ma_so_hv)
+        _stats["queued"] += 1
+    try:
+        _EXECUTOR.submit(_run, ma_so_hv)
+    except RuntimeError:  # executor đã tắt (đang shutdown)
+        with _lock:
+            _pending.discard(ma_so_hv)
+        return "dropped"
+    return "queued"
+
+
+def _run(ma_so_hv: str) -> None:
+    from app.services.pdf_service import render_receipt_cached
+
+    # bỏ khỏi hàng chờ trước khi đọc DB: sửa tiếp trong lúc render sẽ được xếp lại
+    with _lock:
+        _pending.discard(ma_so_hv)
+    db = SessionLocal()
+    try:
+        a = db.query(Applicant).filter(Applicant.ma_so_hv == ma_so_hv).first()
+        if not a or getattr(a, "deleted_at", None):
+            return
+        items, docs = load_receipt_inputs(db, a)
+        render_receipt_cached(a, items, docs)
+        render_receipt_cached(a, items, docs, a5=True)
+        with _lock:
+            _stats["done"] += 1
+    except Exception:
+        log.exception("Pre-render receipt %s failed", ma_so_hv)
+        with _lock:
+            _stats["failed"] += 1
+    finally:
+        db.close()
+
+
+def stats() -> dict:
+    with _lock:
+        return {**_stats, "enabled": enabled(), "pending": len(_pending)}
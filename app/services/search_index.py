@@ -0,0 +1,215 @@
+# app/services/search_index.py
+"""
+Chỉ mục tìm kiếm hồ sơ không dấu.
+
+- Cột applicants.search_text = tên + mã HS + MSSV đã bỏ dấu (xem app/utils/vn_text.py),
+  được cập nhật bởi listener ORM trong app/models/applicant.py.
+- MySQL : FULLTEXT INDEX ... WITH PARSER ngram trên search_text, tạo với stopword tắt
+  (innodb_ft_enable_stopword=0): ngram bỏ mọi token *chứa* stopword mặc định ('a', 'i', 'an',
+  'in', 'la', 'de'...) -> phần lớn bigram của tên không dấu ('va', 'an', 'ng'+'a'...) sẽ không vào index.
+- SQLite: bảng ảo FTS5 'applicants_fts' (tokenizer trigram) + trigger đồng bộ.
+- Không có FTS -> rơi về LIKE trên 1 cột search_text (vẫn đúng, chỉ chậm hơn).
+"""
+from __future__ import annotations
+
+import logging
+from typing import Optional
+
+from sqlalchemy import and_, inspect, text, or_
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Query, Session
+
+from app.models.applicant import Applicant
+from app.utils.vn_text import fold_vn, build_search_text
+
+log = logging.getLogger("search_index")
+
+MYSQL_FT_INDEX = "ft_applicants_search_nostop"
+_MYSQL_FT_INDEX_OLD = "ft_applicants_search_text"  # bản cũ tạo với stopword mặc định -> bỏ
+SQLITE_FTS_TABLE = "applicants_fts"
+BACKFILL_CHUNK = 2000
+
+# dialect -> "mysql_ngram" | "sqlite_trigram" | None (đã dò khi khởi động)
+_FTS_MODE: dict[str, Optional[str]] = {}
+
+_SQLITE_MSSV_GLOB = "'" + "[0-9]" * 10 + "'"
+
+_SQLITE_FTS_DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_FTS_TABLE} "
+    f"USING fts5(ma_so_hv UNINDEXED, search_text, tokenize='trigram')",
+    # rowid FTS = MSSV (10 chữ số) -> xoá/cập nhật theo rowid, không phải quét bảng
+    f"""CREATE TRIGGER IF NOT EXISTS {SQLITE_FTS_TABLE}_ai AFTER INSERT ON applicants
+        WHEN new.ma_so_hv GLOB {_SQLITE_MSSV_GLOB}
+        BEGIN
+            INSERT INTO {SQLITE_FTS_TABLE}(rowid, ma_so_hv, search_text)
+            VALUES (CAST(new.ma_so_hv AS INTEGER), new.ma_so_hv, coalesce(new.search_text, ''));
+        END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {SQLITE_FTS_TABLE}_ad AFTER DELETE ON applicants
+        WHEN old.ma_so_hv GLOB {_SQLITE_MSSV_GLOB}
+        BEGIN
+            DELETE FROM {SQLITE_FTS_TABLE} WHERE rowid = CAST(old.ma_so_hv AS INTEGER);
+        END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {SQLITE_FTS_TABLE}_au AFTER UPDATE ON applicants
+        BEGIN
+            DELETE FROM {SQLITE_FTS_TABLE} WHERE rowid = CAST(old.ma_so_hv AS INTEGER)
+                AND old.ma_so_hv GLOB {_SQLITE_MSSV_GLOB};
+            INSERT INTO {SQLITE_FTS_TABLE}(rowid, ma_so_hv, search_text)
+            SELECT CAST(new.ma_so_hv AS INTEGER), new.ma_so_hv, coalesce(new.search_text, '')
+            WHERE new.ma_so_hv GLOB {_SQLITE_MSSV_GLOB};
+        END""",
+]
+
+
+# ================= Khởi tạo / backfill =================
+def _ensure_column(engine: Engine) -> None:
+    cols = {c["name"] for c in inspect(engine).get_columns("applicants")}
+    if "search_text" in cols:
+        return
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE applicants ADD COLUMN search_text VARCHAR(512) NULL"))
+    log.info("Added column applicants.search_text")
+
+
+def _ensure_mysql_fulltext(engine: Engine) -> Optional[str]:
+    with engine.begin() as conn:
+        def _has(name: str) -> bool:
+            return conn.execute(text("SHOW INDEX FROM applicants WHERE Key_name = :k"), {"k": name}).first() is not None
+
+        if _has(_MYSQL_FT_INDEX_OLD):
+            conn.execute(text(f"ALTER TABLE applicants DROP INDEX {_MYSQL_FT_INDEX_OLD}"))
+            log.info("Dropped FULLTEXT index %s (built with stopwords)", _MYSQL_FT_INDEX_OLD)
+        if not _has(MYSQL_FT_INDEX):
+            # danh sách stopword áp dụng lúc tạo index (và cho truy vấn trên index đó)
+            conn.execute(text("SET SESSION innodb_ft_enable_stopword = 0"))
+            conn.execute(text(
+                f"ALTER TABLE applicants ADD FULLTEXT INDEX {MYSQL_FT_INDEX} (search_text) WITH PARSER ngram"
+            ))
+            log.info("Created FULLTEXT index %s", MYSQL_FT_INDEX)
+    return "mysql_ngram"
+
+
+def _ensure_sqlite_fts(engine: Engine) -> Optional[str]:
+    with engine.begin() as conn:
+        fresh = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type='table' AND name=:n"), {"n": SQLITE_FTS_TABLE}
+        ).first() is None
+        for ddl in _SQLITE_FTS_DDL:
+            conn.execute(text(ddl))
+        if fresh:
+            conn.execute(text(
+                f"INSERT INTO {SQLITE_FTS_TABLE}(rowid, ma_so_hv, search_text) "
+                f"SELECT CAST(ma_so_hv AS INTEGER), ma_so_hv, coalesce(search_text, '') "
+                f"FROM applicants WHERE ma_so_hv GLOB {_SQLITE_MSSV_GLOB}"
+            ))
+            log.info("Created FTS5 table %s", SQLITE_FTS_TABLE)
+    return "sqlite_trigram"
+
+
+def backfill_search_text(engine: Engine) -> int:
+    """Điền search_text cho các dòng cũ (NULL). Chạy theo lô, giữ nguyên updated_at."""
+    done = 0
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(
+                text(
+                    "SELECT ma_so_hv, ho_dem, ten, ho_ten, ma_ho_so FROM applicants "
+                    "WHERE search_text IS NULL LIMIT :n"
+                ),
+                {"n": BACKFILL_CHUNK},
+            ).all()
+            if not rows:
+                return done
+            conn.execute(
+                text("UPDATE applicants SET search_text = :s, updated_at = updated_at WHERE ma_so_hv = :m"),
+                [
+                    {"m": r.ma_so_hv, "s": build_search_text(r.ho_dem, r.ten, r.ho_ten, r.ma_ho_so, r.ma_so_hv)}
+                    for r in rows
+                ],
+            )
+            done += len(rows)
+        if len(rows) < BACKFILL_CHUNK:
+            return done
+
+
+def ensure_search_index(engine: Engine) -> Optional[str]:
+    """Gọi lúc startup: thêm cột, tạo FULLTEXT/FTS5 theo engine, backfill dữ liệu cũ."""
+    dialect = engine.dialect.name
+    try:
+        _ensure_column(engine)
+    except Exception as e:
+        log.warning("search_text column unavailable: %s", e)
+        _FTS_MODE[dialect] = None
+        return None
+
+    mode = None
+    try:
+        if dialect == "mysql":
+            mode = _ensure_mysql_fulltext(engine)
+        elif dialect == "sqlite":
+            mode = _ensure_sqlite_fts(engine)
+    except Exception as e:
+        # MySQL < 5.7.6 (không có ngram) / SQLite thiếu FTS5 -> LIKE trên search_text
+        log.warning("Full-text index unavailable on %s, fallback LIKE: %s", dialect, e)
+        mode = None
+    _FTS_MODE[dialect] = mode
+
+    n = backfill_search_text(engine)
+    if n:
+        log.info("Backfilled search_text for %d applicants", n)
+    return mode
+
+
+# ================= Truy vấn =================
+def _mysql_boolean_query(qf: str) -> Optional[str]:
+    # ngram_token_size mặc định = 2 -> bỏ token 1 ký tự (phần LIKE phía sau vẫn lọc đúng)
+    toks = [t.replace('"', "") for t in qf.split() if len(t) >= 2]
+    toks = [t for t in toks if t]
+    return " ".join(f'+"{t}"' for t in toks) or None
+
+
+def _sqlite_match_query(qf: str) -> Optional[str]:
+    # trigram cần >= 3 ký tự; cả chuỗi được xem như 1 cụm con (substring)
+    if len(qf) < 3:
+        return None
+    return '"' + qf.replace('"', '""') + '"'
+
+
+def apply_search(query: Query, db: Session, q: Optional[str]) -> Query:
+    """
+    Lọc query Applicant theo từ khoá (không phân biệt dấu/hoa thường).
+    FTS thu hẹp ứng viên bằng index, LIKE trên search_text giữ đúng ngữ nghĩa 'chứa chuỗi'.
+    """
+    qf = fold_vn(q)
+    if not qf:
+        return query
+
+    dialect = db.get_bind().dialect.name
+    mode = _FTS_MODE.get(dialect)
+
+    cond = Applicant.search_text.contains(qf, autoescape=True)
+    if mode == "mysql_ngram":
+        from sqlalchemy.dialects.mysql import match
+
+        bq = _mysql_boolean_query(qf)
+        if bq:
+            cond = and_(match(Applicant.search_text, against=bq).in_boolean_mode(), cond)
+    elif mode == "sqlite_trigram":
+        mq = _sqlite_match_query(qf)
+        if mq:
+            cond = and_(
+                Applicant.ma_so_hv.in_(
+                    text(f"SELECT ma_so_hv FROM {SQLITE_FTS_TABLE} WHERE {SQLITE_FTS_TABLE} MATCH :fts_q")
+                    .bindparams(fts_q=mq)
+                    .columns(ma_so_hv=Applicant.ma_so_hv.type)
+                ),
+                cond,
+            )
+
+    raw = (q or "").strip()
+    return query.filter(
+        or_(
+            cond,
+            # dòng chưa kịp backfill vẫn tìm được theo MSSV (không qua FTS)
+            Applicant.ma_so_hv == raw,
+        )
+    )
@@ -1,6 +1,6 @@
 # file: app/services/sendmail_service.py
 from __future__ import annotations
-from typing import List, Optional
+from typing import List, Optional, Tuple, Union
 import mimetypes
 from pathlib import Path
 
@@ -35,7 +35,7 @@ async def send_html_email(
     subject: str,
     recipients: List[str],
     html_body: str,
-    attachments: Optional[List[str]] = None,
+    attachments: Optional[List[Union[str, Tuple[str, str]]]] = None,
 ) -> None:
     """
     Gửi email HTML + file đính kèm bằng aiosmtplib.
@@ -60,6 +60,8 @@ async def send_html_email(
 
     # ---- Đính kèm file (PDF biên nhận, v.v.) ----
     for p in attachments or []:
+        # str | (đường dẫn, tên hiển thị)
+        p, shown_name = (p if isinstance(p, (tuple, list)) else (p, None))
         path = Path(str(p))
         if not path.exists():
             print(f"[EMAIL] ⚠️ File đính kèm không tồn tại: {p}")
@@ -70,7 +72,7 @@ async def send_html_email(
         maintype, subtype = ctype.split("/", 1)
         with open(path, "rb") as f:
             data = f.read()
-        msg.add_attachment(data, maintype=maintype, subtype=subtype, filename=path.name)
+        msg.add_attachment(data, maintype=maintype, subtype=subtype, filename=shown_name or path.name)
 
     # ---- Gửi qua SMTP ----
     print(f"[EMAIL] ▶ Gửi tới {recipients} | attach: {[str(a) for a in (attachments or [])]}")
@@ -0,0 +1,115 @@
+# app/services/sequence_service.py
+"""
+Cấp số thứ tự mã hồ sơ (4 chữ số) theo (khoa, dot) — O(1), nguyên tử.
+
+- MySQL : UPDATE ... SET last_value = LAST_INSERT_ID(last_value + 1) (khoá dòng tới khi commit)
+- SQLite/khác: UPDATE ... RETURNING (SQLite >= 3.35)
+Lần đầu gặp một (khoa, dot) chưa có bộ đếm -> seed từ mã hiện có (chỉ đọc cột ma_ho_so).
+Khoá 'rộng' ('' = mọi khoa/đợt) không được ghi hồ sơ đẩy lên; lúc cấp số mới đuổi kịp
+bằng MAX() trên các bộ đếm nằm trong phạm vi của nó.
+"""
+from __future__ import annotations
+
+import logging
+from typing import Optional
+
+from sqlalchemy import func, select, text, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.models.applicant import Applicant
+from app.models.sequence import MaHoSoSequence, SEQ4_RE, insert_ignore, scan_max, seq_key
+
+log = logging.getLogger("sequence")
+
+_TBL = MaHoSoSequence.__table__
+
+
+def _ensure_seeded(db: Session, khoa: str, dot: str) -> None:
+    exists = db.execute(
+        select(_TBL.c.last_value).where(_TBL.c.khoa == khoa, _TBL.c.dot == dot)
+    ).first()
+    if exists is not None:
+        return
+    dialect = db.get_bind().dialect.name
+    stmt = insert_ignore(dialect).values(khoa=khoa, dot=dot, last_value=scan_max(db, khoa, dot))
+    if dialect in ("mysql", "sqlite"):
+        db.execute(stmt)
+        return
+    # dialect khác: 2 worker cùng seed -> bên thua bỏ qua
+    try:
+        with db.begin_nested():
+            db.execute(stmt)
+    except Exception:
+        pass
+
+
+def _catch_up_wide(db: Session, khoa: str, dot: str) -> None:
+    """Khoá rộng: nâng bộ đếm lên MAX của mọi bộ đếm cùng phạm vi (đọc thường, không khoá các dòng đó)."""
+    q = select(func.max(_TBL.c.last_value))
+    if khoa:
+        q = q.where(_TBL.c.khoa == khoa)
+    if dot:
+        q = q.where(_TBL.c.dot == dot)
+    m = db.execute(q).scalar() or 0
+    db.execute(
+        update(_TBL)
+        .where(_TBL.c.khoa == khoa, _TBL.c.dot == dot, _TBL.c.last_value < m)
+        .values(last_value=m)
+    )
+
+
+def next_ma_ho_so_seq(db: Session, khoa: Optional[str], dot: Optional[str]) -> str:
+    """
+    Trả về số thứ tự kế tiếp dạng '0001'. Chạy trong transaction của request:
+    dòng bộ đếm bị khoá tới khi commit -> nhiều worker không bao giờ nhận trùng số.
+    """
+    k, d = seq_key(khoa, dot)
+    _ensure_seeded(db, k, d)
+    if not (k and d):
+        _catch_up_wide(db, k, d)
+
+    if db.get_bind().dialect.name == "mysql":
+        db.execute(text(
+            "UPDATE ma_ho_so_sequences SET last_value = LAST_INSERT_ID(last_value + 1) "
+            "WHERE khoa = :k AND dot = :d"
+        ), {"k": k, "d": d})
+        n = db.execute(text("SELECT LAST_INSERT_ID()")).scalar()
+    else:
+        n = db.execute(
+            update(_TBL)
+            .where(_TBL.c.khoa == k, _TBL.c.dot == d)
+            .values(last_value=_TBL.c.last_value + 1)
+            .returning(_TBL.c.last_value)
+        ).scalar()
+    return f"{int(n):04d}"
+
+
+def backfill_sequences(engine: Engine) -> int:
+    """
+    Startup: bảng bộ đếm còn trống -> seed 1 lần cho mọi (khoa, dot) đang có,
+    bằng 1 lượt quét (khoa, dot, ma_ho_so). Các khoá khác được seed lười khi cấp số.
+    """
+    with engine.begin() as conn:
+        if conn.execute(select(_TBL.c.khoa).limit(1)).first() is not None:
+            return 0
+        maxes: dict[tuple[str, str], int] = {}
+        rows = conn.execute(
+            select(Applicant.khoa, Applicant.dot, Applicant.ma_ho_so)
+            .where(Applicant.ma_ho_so.isnot(None))
+        )
+        for khoa, dot, code in rows:
+            m = SEQ4_RE.search(str(code or "").strip())
+            if not m:
+                continue
+            key = seq_key(khoa, dot)
+            if not (key[0] and key[1]):
+                continue  # khoá 'rộng' ('' = mọi khoa/đợt) để seed lười, đúng phạm vi quét
+            maxes[key] = max(maxes.get(key, 0), int(m.group(1)))
+        if maxes:
+            conn.execute(
+                insert_ignore(engine.dialect.name),
+                [{"khoa": k, "dot": d, "last_value": n} for (k, d), n in maxes.items()],
+            )
+        log.info("Seeded %d ma_ho_so sequences", len(maxes))
+        return len(maxes)
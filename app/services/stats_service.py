@@ -0,0 +1,178 @@
+# app/services/stats_service.py
+"""
+Thống kê hồ sơ cho dashboard: 1 câu GROUP BY trên toàn bảng applicants,
+kết quả là các 'ô' (khoa, dot, ngành, status, printed, done, docs_complete) -> count.
+Lọc theo khoá/đợt làm trên danh sách ô (vài trăm dòng), không quét lại DB.
+
+- done          : đã có mã hồ sơ (ma_ho_so khác rỗng) — giống dashboard cũ
+- docs_complete : mọi mục checklist của version hồ sơ đều có so_luong > 0
+                  (version NULL -> dùng version đang active)
+
+Facets (Khóa / Đợt / Ngành cho dropdown): GROUP BY riêng từng cột trên index,
+đợt lọc trong khoá, ngành lọc trong khoá + đợt.
+"""
+from __future__ import annotations
+
+from typing import Any, Optional
+
+from sqlalchemy import and_, case, func, select
+from sqlalchemy.orm import Session
+
+from app.models.applicant import Applicant, ApplicantDoc
+from app.models.checklist import ChecklistItem, ChecklistVersion
+from app.services.cache import TTLCache, data_version
+from app.utils.soft_delete import _soft_delete_conds
+
+NO_MAJOR = "Chưa chọn ngành"
+
+_STATS_CACHE = TTLCache(ttl=600, maxsize=8)
+_FACET_CACHE = TTLCache(ttl=600, maxsize=256)
+
+
+def _query_groups(db: Session) -> list[dict[str, Any]]:
+    active_id = (
+        select(ChecklistVersion.id)
+        .where(ChecklistVersion.active.is_(True))
+        .order_by(ChecklistVersion.id.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    ver_id = func.coalesce(Applicant.checklist_version_id, active_id)
+
+    # số mục checklist theo version
+    item_cnt = (
+        select(ChecklistItem.version_id.label("vid"), func.count(ChecklistItem.id).label("n"))
+        .group_by(ChecklistItem.version_id)
+        .subquery()
+    )
+    # số mục đã nộp (so_luong > 0) theo hồ sơ, chỉ tính mục thuộc version của hồ sơ
+    ok_cnt = (
+        select(
+            ApplicantDoc.applicant_ma_so_hv.label("mssv"),
+            func.count(func.distinct(ApplicantDoc.code)).label("n"),
+        )
+        .join(Applicant, Applicant.ma_so_hv == ApplicantDoc.applicant_ma_so_hv)
+        .join(
+            ChecklistItem,
+            and_(ChecklistItem.code == ApplicantDoc.code, ChecklistItem.version_id == ver_id),
+        )
+        .where(ApplicantDoc.so_luong > 0)
+        .group_by(ApplicantDoc.applicant_ma_so_hv)
+        .subquery()
+    )
+
+    has_code = case((func.coalesce(func.trim(Applicant.ma_ho_so), "") != "", 1), else_=0)
+    complete = case(
+        (func.coalesce(ok_cnt.c.n, 0) >= func.coalesce(item_cnt.c.n, 0), 1), else_=0
+    )
+    printed = case((Applicant.printed.is_(True), 1), else_=0)
+
+    keys = (
+        Applicant.khoa,
+        Applicant.dot,
+        Applicant.nganh_nhap_hoc,
+        Applicant.status,
+        printed.label("printed"),
+        has_code.label("done"),
+        complete.label("docs_complete"),
+    )
+    stmt = (
+        select(*keys, func.count().label("n"))
+        .select_from(Applicant)
+        .outerjoin(ok_cnt, ok_cnt.c.mssv == Applicant.ma_so_hv)
+        .outerjoin(item_cnt, item_cnt.c.vid == ver_id)
+        .where(*_soft_delete_conds(Applicant))
+        .group_by(*keys)
+    )
+
+    out = []
+    for r in db.execute(stmt):
+        out.append({
+            "khoa": (r.khoa or "").strip(),
+            "dot": (r.dot or "").strip(),
+            "nganh": (r.nganh_nhap_hoc or "").strip() or NO_MAJOR,
+            "status": r.status or "",
+            "printed": bool(r.printed),
+            "done": bool(r.done),
+            "docs_complete": bool(r.docs_complete),
+            "count": int(r.n),
+        })
+    return out
+
+
+def get_groups(db: Session) -> list[dict[str, Any]]:
+    """Danh sách ô thống kê, cache theo data_version (ghi applicants/docs/checklist là hết hạn)."""
+    key = (data_version("applicants"), data_version("checklist"))
+    return _STATS_CACHE.get_or_set(key, lambda: _query_groups(db))
+
+
+def summarize(groups: list[dict[str, Any]], khoa: Optional[str] = None, dot: Optional[str] = None) -> dict[str, Any]:
+    k = (khoa or "").strip()
+    d = (dot or "").strip()
+    rows = [g for g in groups if (not k or g["khoa"] == k) and (not d or g["dot"] == d)]
+
+    def _sum(pred=lambda g: True) -> int:
+        return sum(g["count"] for g in rows if pred(g))
+
+    by_nganh: dict[str, dict[str, int]] = {}
+    by_status: dict[str, int] = {}
+    for g in rows:
+        m = by_nganh.setdefault(g["nganh"], {"total": 0, "done": 0, "printed": 0, "docs_complete": 0})
+        m["total"] += g["count"]
+        m["done"] += g["count"] if g["done"] else 0
+        m["printed"] += g["count"] if g["printed"] else 0
+        m["docs_complete"] += g["count"] if g["docs_complete"] else 0
+        by_status[g["status"]] = by_status.get(g["status"], 0) + g["count"]
+
+    total = _sum()
+    done = _sum(lambda g: g["done"])
+    return {
+        "khoa": k or None,
+        "dot": d or None,
+        "total": total,
+        "done": done,
+        "pending": total - done,
+        "printed": _sum(lambda g: g["printed"]),
+        "docs_complete": _sum(lambda g: g["docs_complete"]),
+        "majors": len([n for n in by_nganh if n != NO_MAJOR]),
+        "by_nganh": by_nganh,
+        "by_status": by_status,
+    }
+
+
+# ================= Facets =================
+def _natural_key(v: str):
+    return (0, int(v), "") if v.isdigit() else (1, 0, v.casefold())
+
+
+def _facet_counts(db: Session, col, *conds) -> list[dict[str, Any]]:
+    stmt = (
+        select(col, func.count().label("n"))
+        .where(*_soft_delete_conds(Applicant), *conds)
+        .group_by(col)
+    )
+    counts: dict[str, int] = {}
+    for value, n in db.execute(stmt):
+        v = (value or "").strip()
+        if v:  # gộp các giá trị chỉ khác khoảng trắng đầu/cuối
+            counts[v] = counts.get(v, 0) + int(n)
+    return [{"value": v, "count": counts[v]} for v in sorted(counts, key=_natural_key)]
+
+
+def _query_facets(db: Session, khoa: Optional[str], dot: Optional[str]) -> dict[str, Any]:
+    in_khoa = [Applicant.khoa == khoa] if khoa else []
+    in_dot = [Applicant.dot == dot] if dot else []
+    return {
+        "khoa": _facet_counts(db, Applicant.khoa),
+        "dot": _facet_counts(db, Applicant.dot, *in_khoa),
+        "nganh": _facet_counts(db, Applicant.nganh_nhap_hoc, *in_khoa, *in_dot),
+    }
+
+
+def get_facets(db: Session, khoa: Optional[str] = None, dot: Optional[str] = None) -> dict[str, Any]:
+    """Giá trị khác nhau + số hồ sơ cho Khóa / Đợt (trong khoá) / Ngành (trong khoá + đợt)."""
+    k = (khoa or "").strip() or None
+    d = (dot or "").strip() or None
+    key = (k, d, data_version("applicants"))
+    facets = _FACET_CACHE.get_or_set(key, lambda: _query_facets(db, k, d))
+    return {"scope": {"khoa": k, "dot": d}, **facets}
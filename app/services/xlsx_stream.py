@@ -0,0 +1,98 @@
+# app/services/xlsx_stream.py
+"""
+Ghi Excel kiểu stream (openpyxl write_only): mỗi dòng được ghi thẳng ra file, không giữ object cell.
+
+Độ rộng cột: write_only phải khai báo <cols> trước dòng đầu tiên, nên giữ tạm SAMPLE_ROWS dòng đầu
+trong RAM, đo độ dài ký tự từng cột (header + các dòng mẫu), đặt độ rộng rồi mới ghi.
+Với lô <= SAMPLE_ROWS kết quả giống hệt cách đo toàn bộ cột trước đây; lô lớn hơn thì
+độ rộng theo mẫu (đa số cột đã chạm trần max_width).
+"""
+from __future__ import annotations
+
+from datetime import date, datetime
+from typing import IO, Iterable, List, Optional, Sequence
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment
+from openpyxl.utils import get_column_letter
+
+SAMPLE_ROWS = 1000
+
+
+class XlsxStreamWriter:
+    """
+    w = XlsxStreamWriter("Ho so", headers)
+    for row in rows: w.append(row)
+    w.save(out)           # out: đường dẫn / file object
+    """
+
+    def __init__(
+        self,
+        title: str,
+        headers: Sequence[str],
+        *,
+        date_cols: Iterable[int] = (),      # chỉ số cột (0-based) chứa date -> định dạng dd/mm/yyyy, căn giữa
+        freeze: Optional[str] = "A2",
+        min_width: int = 10,
+        max_width: int = 40,
+        sample_rows: int = SAMPLE_ROWS,
+    ):
+        self.wb = Workbook(write_only=True)
+        self.ws = self.wb.create_sheet(title)
+        if freeze:
+            self.ws.freeze_panes = freeze
+        self.headers = list(headers)
+        self.date_cols = set(date_cols)
+        self.min_width = min_width
+        self.max_width = max_width
+        self.sample_rows = sample_rows
+        self._lens = [len(str(h)) for h in self.headers]
+        self._buf: Optional[List[list]] = []
+        self.rows = 0
+
+    # ---------- đo ----------
+    def _measure(self, row: Sequence) -> None:
+        lens = self._lens
+        for i, v in enumerate(row):
+            n = 0 if v is None else len(str(v))
+            if i >= len(lens):
+                lens.append(n)
+            elif n > lens[i]:
+                lens[i] = n
+
+    def _flush_sample(self) -> None:
+        for i, n in enumerate(self._lens, start=1):
+            w = min(max(self.min_width, n + 2), self.max_width)
+            self.ws.column_dimensions[get_column_letter(i)].width = w
+        self.ws.append(self.headers)
+        buf, self._buf = self._buf, None
+        for row in buf:
+            self._write(row)
+
+    # ---------- ghi ----------
+    def _write(self, row: Sequence) -> None:
+        if self.date_cols:
+            row = list(row)
+            for i in self.date_cols:
+                if i < len(row) and isinstance(row[i], (date, datetime)):
+                    c = WriteOnlyCell(self.ws, value=row[i])
+                    c.number_format = "dd/mm/yyyy"
+                    c.alignment = Alignment(horizontal="center")
+                    row[i] = c
+        self.ws.append(row)
+
+    def append(self, row: Sequence) -> None:
+        self.rows += 1
+        if self._buf is not None:
+            self._measure(row)
+            self._buf.append(list(row))
+            if len(self._buf) >= self.sample_rows:
+                self._flush_sample()
+        else:
+            self._write(row)
+
+    def save(self, out: IO[bytes]) -> None:
+        if self._buf is not None:
+            self._flush_sample()
+        self.wb.save(out)
@@ -0,0 +1,65 @@
+# app/utils/spool.py
+"""
+File tạm cho file xuất lớn (PDF in gộp, Excel):
+- SpooledTemporaryFile: nhỏ thì nằm RAM, vượt SPOOL_MAX_MEMORY thì tự chuyển ra đĩa
+- stream về client theo từng khúc, có Content-Length, đóng file khi gửi xong / client ngắt
+=> bỏ bản sao bytes thứ 2 (getvalue() + BytesIO) và khâu gửi về client không giữ cả file trong RAM.
+
+Giới hạn: chỉ *file kết quả* được đẩy ra đĩa. Đỉnh bộ nhớ lúc dựng vẫn tăng theo kích thước lô:
+- PDF: reportlab Canvas giữ mọi trang tới save(); pypdf PdfWriter (in gộp song song) giữ trọn bản ghép.
+- Excel: openpyxl write-only ghi dần từng dòng, chỉ giữ dòng mẫu để đo độ rộng cột (xlsx_stream).
+"""
+from __future__ import annotations
+
+import os
+from tempfile import SpooledTemporaryFile
+from typing import IO, Iterator
+
+from starlette.responses import StreamingResponse
+
+from app.core.config import settings
+
+CHUNK_SIZE = 64 * 1024
+
+
+def new_spool() -> SpooledTemporaryFile:
+    max_mem = int(getattr(settings, "SPOOL_MAX_MEMORY", 8 * 1024 * 1024) or 0)
+    return SpooledTemporaryFile(max_size=max_mem, mode="w+b")
+
+
+def spool_size(fp: IO[bytes]) -> int:
+    fp.seek(0, os.SEEK_END)
+    n = fp.tell()
+    fp.seek(0)
+    return n
+
+
+def iter_file(fp: IO[bytes], chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    try:
+        fp.seek(0)
+        while True:
+            chunk = fp.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        fp.close()
+
+
+def spooled_response(
+    fp: IO[bytes],
+    *,
+    media_type: str,
+    filename: str,
+    disposition: str = "attachment",
+) -> StreamingResponse:
+    """Trả file tạm về client (StreamingResponse + Content-Length); file được đóng sau khi gửi."""
+    size = spool_size(fp)
+    return StreamingResponse(
+        iter_file(fp),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'{disposition}; filename="{filename}"',
+            "Content-Length": str(size),
+        },
+    )
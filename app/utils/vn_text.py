@@ -0,0 +1,82 @@
+# ================================
+# file: app/utils/vn_text.py
+# ================================
+from __future__ import annotations
+
+import unicodedata
+from typing import Optional
+
+
+def fold_vn(s: Optional[str]) -> str:
+    """
+    Bỏ dấu tiếng Việt + chữ thường + gộp khoảng trắng.
+    'Nguyễn  Văn Ánh' -> 'nguyen van anh'
+    """
+    if not s:
+        return ""
+    s = unicodedata.normalize("NFD", str(s))
+    s = "".join(ch for ch in s if unicodedata.category(ch) != "Mn")
+    s = s.replace("đ", "d").replace("Đ", "D")
+    return " ".join(s.lower().split())
+
+
+def build_search_text(
+    ho_dem: Optional[str],
+    ten: Optional[str],
+    ho_ten: Optional[str],
+    ma_ho_so: Optional[str],
+    ma_so_hv: Optional[str],
+) -> str:
+    """
+    Chuỗi tìm kiếm đã chuẩn hoá cho 1 hồ sơ: tên (tách đôi + ho_ten cũ) + mã HS + MSSV.
+    Dùng cho cột applicants.search_text (được đánh FULLTEXT/FTS5).
+    """
+    name = fold_vn(" ".join(x for x in ((ho_dem or "").strip(), (ten or "").strip()) if x))
+    parts = [name]
+    legacy = fold_vn(ho_ten)
+    if legacy and legacy != name:
+        parts.append(legacy)
+    parts.append(fold_vn(ma_ho_so))
+    parts.append((ma_so_hv or "").strip())
+    return " ".join(p for p in parts if p)[:512]
+
+
+# Thứ tự bảng chữ cái tiếng Việt: a ă â b c d đ e ê g h i k l m n o ô ơ p q r s t u ư v x y
+_VI_ALPHABET = [
+    "a", "ă", "â", "b", "c", "d", "đ", "e", "ê", "f", "g", "h", "i", "j", "k", "l", "m", "n",
+    "o", "ô", "ơ", "p", "q", "r", "s", "t", "u", "ư", "v", "w", "x", "y", "z",
+]
+_VI_RANK = {ch: i for i, ch in enumerate(_VI_ALPHABET)}
+# dấu thanh: không dấu < huyền < hỏi < ngã < sắc < nặng (mức so sánh phụ)
+_VI_TONES = {"̀": 1, "̉": 2, "̃": 3, "́": 4, "̣": 5}
+
+
+def vi_sort_key(s: Optional[str]) -> tuple:
+    """
+    Khoá sắp xếp theo từ điển tiếng Việt (không phân biệt hoa thường):
+    so chữ cái trước (ă/â/đ/ê/ô/ơ/ư là chữ riêng), sau đó mới tới dấu thanh.
+    """
+    if not s:
+        return ((), ())
+    primary, tones = [], []
+    for ch in " ".join(str(s).lower().split()):
+        base = unicodedata.normalize("NFD", ch)
+        tone = 0
+        letter = base[0]
+        for m in base[1:]:
+            if m in _VI_TONES:
+                tone = _VI_TONES[m]
+            else:
+                letter += m
+        letter = unicodedata.normalize("NFC", letter)
+        rank = _VI_RANK.get(letter)
+        # khoảng trắng/chữ số/ký tự khác xếp trước chữ cái (giống ICU)
+        primary.append((1, rank) if rank is not None else (0, ord(letter[0])))
+        tones.append(tone)
+    return (tuple(primary), tuple(tones))
+
+
+def vi_collate(a: Optional[str], b: Optional[str]) -> int:
+    """Hàm so sánh cho collation 'vi' của SQLite."""
+    ka, kb = vi_sort_key(a), vi_sort_key(b)
+    return (ka > kb) - (ka < kb)
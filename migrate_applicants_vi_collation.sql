@@ -0,0 +1,24 @@
+-- Sắp xếp tiếng Việt trên trang danh sách hồ sơ dùng được index (MySQL 8).
+-- App KHÔNG tự chạy: lúc khởi động chỉ dò collation (db.session.ensure_vi_sort_columns),
+-- cột nào đã là utf8mb4_vi_0900_ai_ci thì ORDER BY cột trần, chưa thì ORDER BY ... COLLATE (filesort).
+--
+-- Lưu ý trước khi chạy:
+--   * ALTER đổi collation cột có index = build lại cả bảng applicants (khoá ghi trong lúc chạy)
+--     -> chạy trong giờ bảo trì, tắt bớt worker, hoặc dùng pt-online-schema-change / gh-ost.
+--   * Đổi ngữ nghĩa so sánh của 4 cột này: '=' và LIKE không phân biệt dấu/hoa thường theo
+--     quy tắc tiếng Việt (vd ten = 'Anh' khớp cả 'ANH'; khác utf8mb4_unicode_ci ở vài ký tự có dấu).
+--   * MySQL < 8.0 / MariaDB không có utf8mb4_vi_0900_ai_ci -> bỏ qua script (app vẫn sắp xếp đúng, chỉ chậm hơn).
+--   * Kiểm tra trước: SHOW COLLATION LIKE 'utf8mb4_vi_0900_ai_ci';
+
+USE Admission_Management_System;
+
+ALTER TABLE applicants
+  MODIFY ten               VARCHAR(100) CHARACTER SET utf8mb4 COLLATE utf8mb4_vi_0900_ai_ci NULL,
+  MODIFY ho_dem            VARCHAR(255) CHARACTER SET utf8mb4 COLLATE utf8mb4_vi_0900_ai_ci NULL,
+  MODIFY nganh_nhap_hoc    VARCHAR(255) CHARACTER SET utf8mb4 COLLATE utf8mb4_vi_0900_ai_ci NULL,
+  MODIFY nguoi_nhan_ky_ten VARCHAR(255) CHARACTER SET utf8mb4 COLLATE utf8mb4_vi_0900_ai_ci NULL;
+
+-- Index 1 cột cũ trên ho_dem / ten thừa (đã có ix_applicants_ho_dem_ten, ix_applicants_ten_ho_dem).
+-- Chạy riêng từng câu; báo lỗi "check that it exists" nghĩa là DB này chưa từng có index đó.
+DROP INDEX ix_applicants_ho_dem ON applicants;
+DROP INDEX ix_applicants_ten ON applicants;
@@ -0,0 +1,211 @@
+# scripts/bench_pdf.py
+"""
+Đo tốc độ render biên nhận PDF với dữ liệu giả (không cần DB).
+
+Chạy từ thư mục gốc dự án (để tìm thấy assets/ font):
+    python scripts/bench_pdf.py                          # 1 / 100 / 2000 hồ sơ
+    python scripts/bench_pdf.py --sizes 1 100            # nhanh
+    python scripts/bench_pdf.py --save bench_baseline.json
+    python scripts/bench_pdf.py --compare bench_baseline.json --tolerance 0.2
+
+Mỗi phép đo chạy trong 1 tiến trình con riêng (spawn) để peak RSS không lẫn giữa các lần.
+--compare: pages/sec giảm hoặc dung lượng file tăng quá tolerance -> in REGRESSION, exit code 1.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+from multiprocessing import get_context
+from types import SimpleNamespace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+HO = ["Nguyễn", "Trần", "Lê", "Phạm", "Hoàng", "Huỳnh", "Phan", "Vũ", "Võ", "Đặng", "Bùi", "Đỗ", "Hồ", "Ngô", "Dương", "Lý"]
+DEM = ["Văn", "Thị", "Hữu", "Minh", "Ngọc", "Thanh", "Quốc", "Thu", "Hoàng", "Gia", "Bảo", "Đức", "Phương", "Xuân", "Kim"]
+TEN = ["An", "Bình", "Châu", "Dũng", "Giang", "Hà", "Hải", "Hạnh", "Khoa", "Linh", "Long", "Mai", "Nam", "Ngân",
+       "Phúc", "Quân", "Thảo", "Trang", "Tuấn", "Vy", "Yến", "Ánh", "Đạt", "Thư"]
+NGANH = ["Công nghệ thông tin", "Quản trị kinh doanh", "Kế toán", "Ngôn ngữ Anh", "Luật kinh tế",
+         "Tài chính - Ngân hàng", "Marketing", "Kỹ thuật phần mềm"]
+DAN_TOC = ["Kinh", "Kinh", "Kinh", "Hoa", "Khmer", "Tày", "Chăm"]
+TN = ["THPT", "Trung cấp", "Cao đẳng", "Đại học"]
+DOCS = ["Bằng tốt nghiệp THPT (bản sao công chứng)", "Học bạ THPT (bản sao công chứng)", "Giấy khai sinh (bản sao)",
+        "Căn cước công dân (bản sao công chứng)", "Ảnh 3x4", "Phiếu đăng ký xét tuyển", "Giấy khám sức khỏe",
+        "Bảng điểm Cao đẳng / Đại học", "Bằng tốt nghiệp Cao đẳng / Đại học", "Giấy chứng nhận ưu tiên",
+        "Sơ yếu lý lịch có xác nhận địa phương", "Giấy xác nhận nhân sự", "Chứng chỉ ngoại ngữ", "Chứng chỉ tin học",
+        "Giấy chuyển sinh hoạt Đoàn", "Biên lai học phí", "Bản cam kết", "Giấy chứng nhận tốt nghiệp tạm thời"]
+NOTE_WORDS = ("học viên bổ sung bản sao công chứng bằng tốt nghiệp trước ngày nhập học nộp thêm ảnh giấy khám "
+              "sức khỏe chưa đủ chữ ký xác nhận của địa phương liên hệ phòng đào tạo để được hướng dẫn").split()
+
+
+# ================= Dữ liệu giả =================
+def make_checklist(rng: random.Random, n_items: int):
+    names = [f"{DOCS[i % len(DOCS)]}" + (f" ({i // len(DOCS) + 1})" if i >= len(DOCS) else "") for i in range(n_items)]
+    return [SimpleNamespace(code=f"DOC{i:02d}", display_name=nm, order_no=i + 1) for i, nm in enumerate(names)]
+
+
+def make_applicant(rng: random.Random, i: int, version_id: int):
+    ho_dem = f"{rng.choice(HO)} {rng.choice(DEM)}" + (f" {rng.choice(DEM)}" if rng.random() < 0.3 else "")
+    ten = rng.choice(TEN)
+    note = ""
+    if rng.random() < 0.4:
+        note = " ".join(rng.choice(NOTE_WORDS) for _ in range(rng.randint(8, 90)))
+    khoa = str(rng.randint(24, 30))
+    return SimpleNamespace(
+        ma_so_hv=f"{2500000000 + i}",
+        ma_ho_so=f"HS-{khoa}-{i:04d}",
+        ngay_nhan_hs=date(2025, 8, 1) + timedelta(days=rng.randint(0, 60)),
+        ho_ten=f"{ho_dem} {ten}",
+        ho_dem=ho_dem,
+        ten=ten,
+        ngay_sinh=date(1985, 1, 1) + timedelta(days=rng.randint(0, 7000)),
+        gioi_tinh=rng.choice(["Nam", "Nữ"]),
+        dan_toc=rng.choice(DAN_TOC),
+        so_dt=f"09{rng.randint(10000000, 99999999)}",
+        email_hoc_vien=f"hv{i}@example.edu.vn",
+        nganh_nhap_hoc=rng.choice(NGANH),
+        da_tn_truoc_do=rng.choice(TN),
+        dot=str(rng.randint(1, 4)),
+        khoa=khoa,
+        ghi_chu=note,
+        nguoi_nhan_ky_ten=rng.choice(["Nguyễn Thị Thu Hà", "Trần Minh Quân", "Lê Ngọc Ánh"]),
+        checklist_version_id=version_id,
+    )
+
+
+def make_dataset(n: int, seed: int = 2025):
+    """n hồ sơ, 3 phiên bản checklist (10-30 mục), số lượng giấy tờ ngẫu nhiên."""
+    rng = random.Random(seed)
+    items_by_version = {vid: make_checklist(rng, rng.randint(10, 30)) for vid in (1, 2, 3)}
+    apps, docs_by_app = [], {}
+    for i in range(n):
+        a = make_applicant(rng, i, rng.choice((1, 2, 3)))
+        apps.append(a)
+        docs_by_app[a.ma_so_hv] = [
+            SimpleNamespace(code=it.code, so_luong=rng.choice((0, 0, 1, 1, 2)))
+            for it in items_by_version[a.checklist_version_id]
+        ]
+    return apps, items_by_version, docs_by_app
+
+
+# ================= Đo =================
+def _peak_rss_mb():
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+    except ImportError:  # Windows
+        try:
+            import psutil
+            mi = psutil.Process().memory_info()
+            return round(getattr(mi, "peak_wset", mi.rss) / (1024 * 1024), 1)
+        except ImportError:
+            return None
+
+
+def _run_case(func_name: str, n: int, seed: int) -> dict:
+    """Chạy trong tiến trình con."""
+    os.chdir(ROOT)
+    from app.services.font_registry import ensure_fonts
+    from app.services import pdf_service
+
+    ensure_fonts()
+    apps, ibv, dba = make_dataset(n, seed)
+    func = getattr(pdf_service, func_name)
+
+    t0 = time.perf_counter()
+    if func_name.startswith("render_batch"):
+        out_bytes = len(func(apps, ibv, dba))
+    else:
+        out_bytes = 0
+        for a in apps:
+            out_bytes += len(func(a, ibv[a.checklist_version_id], dba[a.ma_so_hv]))
+    sec = time.perf_counter() - t0
+
+    return {
+        "func": func_name,
+        "applicants": n,
+        "pages": n,
+        "seconds": round(sec, 4),
+        "pages_per_sec": round(n / sec, 2) if sec else None,
+        "output_bytes": out_bytes,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+CASES = ("render_single_pdf", "render_single_pdf_a5", "render_batch_pdf")
+
+
+def run(sizes, seed: int = 2025, funcs=CASES) -> list:
+    results = []
+    for func_name in funcs:
+        for n in sizes:
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as ex:
+                r = ex.submit(_run_case, func_name, n, seed).result()
+            print(f"{r['func']:<24} n={n:<6} {r['seconds']:>9.3f}s {r['pages_per_sec']:>9} pages/s "
+                  f"{r['output_bytes']:>12,} B  peak {r['peak_rss_mb']} MB")
+            results.append(r)
+    return results
+
+
+def compare(results: list, baseline: dict, tolerance: float) -> list:
+    """Trả danh sách dòng REGRESSION (rỗng = ổn)."""
+    base = {(r["func"], r["applicants"]): r for r in baseline.get("results", [])}
+    bad = []
+    for r in results:
+        b = base.get((r["func"], r["applicants"]))
+        if not b:
+            continue
+        if b.get("pages_per_sec") and r["pages_per_sec"] < b["pages_per_sec"] * (1 - tolerance):
+            bad.append(f"{r['func']} n={r['applicants']}: {r['pages_per_sec']} pages/s < baseline {b['pages_per_sec']}")
+        if b.get("output_bytes") and r["output_bytes"] > b["output_bytes"] * (1 + tolerance):
+            bad.append(f"{r['func']} n={r['applicants']}: {r['output_bytes']} B > baseline {b['output_bytes']} B")
+    return bad
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark render PDF biên nhận (dữ liệu giả).")
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1, 100, 2000])
+    ap.add_argument("--funcs", nargs="+", choices=CASES, default=list(CASES))
+    ap.add_argument("--seed", type=int, default=2025)
+    ap.add_argument("--save", help="ghi kết quả ra file JSON (baseline)")
+    ap.add_argument("--compare", help="so với file baseline JSON")
+    ap.add_argument("--tolerance", type=float, default=0.2, help="ngưỡng lệch cho phép (0.2 = 20%%)")
+    args = ap.parse_args(argv)
+
+    results = run(args.sizes, args.seed, args.funcs)
+    report = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "seed": args.seed,
+        "results": results,
+    }
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print("Saved baseline ->", args.save)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        bad = compare(results, baseline, args.tolerance)
+        for line in bad:
+            print("REGRESSION:", line)
+        if bad:
+            return 1
+        print("OK: không có regression so với", args.compare)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
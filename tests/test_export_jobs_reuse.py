@@ -0,0 +1,82 @@
+# tests/test_export_jobs_reuse.py
+"""
+Gộp job xuất: yêu cầu giống hệt -> gắn vào job sẵn có; dữ liệu đổi (kể cả từ worker khác /
+sau khi khởi động lại) hoặc sang ngày mới (A5) -> job mới.
+"""
+from datetime import datetime
+
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.models.applicant import Applicant, ApplicantDoc
+from app.models.cache_version import CacheVersion
+from app.models.checklist import ChecklistItem, ChecklistVersion
+from app.models.export_job import ExportJob
+from app.services import checklist_cache, export_jobs, pdf_service
+
+
+class _NoRun:
+    def submit(self, *a, **kw):  # chỉ kiểm tra việc gộp, không dựng file
+        return None
+
+
+def _session(tmp_path, monkeypatch):
+    monkeypatch.setattr(Applicant.__table__.c.updated_at, "server_default", None)  # cú pháp MySQL
+    eng = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(eng, tables=[
+        ChecklistVersion.__table__, ChecklistItem.__table__, Applicant.__table__,
+        ApplicantDoc.__table__, CacheVersion.__table__, ExportJob.__table__,
+    ])
+    monkeypatch.setattr(export_jobs, "_EXECUTOR", _NoRun())
+    monkeypatch.setattr(export_jobs, "_local_versions", {})
+    return sessionmaker(bind=eng, autoflush=False)()
+
+
+def _submit(db, kind, **raw):
+    job, attached, _ = export_jobs.submit_or_attach(
+        db, kind, export_jobs.normalize_params(kind, {"dot": "D1", **raw}), created_by="t"
+    )
+    return job, attached
+
+
+def test_attach_then_checklist_change_makes_new_job(tmp_path, monkeypatch):
+    db = _session(tmp_path, monkeypatch)
+    v = ChecklistVersion(version_name="v1", active=True)
+    db.add(v)
+    db.flush()
+    db.add(ChecklistItem(version_id=v.id, code="CCCD", display_name="CCCD", order_no=1))
+    db.add(Applicant(ma_so_hv="2400000001", dot="D1", khoa="K1", checklist_version_id=v.id))
+    db.commit()
+
+    job1, attached = _submit(db, "excel-dot")
+    assert job1 is not None and not attached
+    job2, attached = _submit(db, "excel-dot")
+    assert attached and job2.id == job1.id
+
+    # worker khác đổi tên mục (count/max(id) giữ nguyên); tiến trình này không biết gì
+    db.execute(update(ChecklistItem).where(ChecklistItem.code == "CCCD").values(display_name="Căn cước"))
+    checklist_cache.mark_changed(db)
+    db.commit()
+    export_jobs._local_versions.clear()  # như sau khi khởi động lại
+
+    job3, attached = _submit(db, "excel-dot")
+    assert not attached and job3.id != job1.id
+    job4, attached = _submit(db, "excel-dot")
+    assert attached and job4.id == job3.id
+
+
+def test_a5_job_not_reused_next_day(tmp_path, monkeypatch):
+    db = _session(tmp_path, monkeypatch)
+    db.add(Applicant(ma_so_hv="2400000001", dot="D1", khoa="K1"))
+    db.commit()
+
+    monkeypatch.setattr(pdf_service, "_now_vn", lambda: datetime(2025, 1, 1, 9, 0))
+    a5, _ = _submit(db, "print-dot", a5=True)
+    a4, _ = _submit(db, "print-dot")
+    assert _submit(db, "print-dot", a5=True)[0].id == a5.id
+
+    monkeypatch.setattr(pdf_service, "_now_vn", lambda: datetime(2025, 1, 2, 9, 0))
+    job, attached = _submit(db, "print-dot", a5=True)
+    assert not attached and job.id != a5.id
+    assert _submit(db, "print-dot")[0].id == a4.id  # A4 không in ngày -> vẫn dùng lại
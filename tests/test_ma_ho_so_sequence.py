@@ -0,0 +1,90 @@
+# tests/test_ma_ho_so_sequence.py
+"""
+Cấp mã hồ sơ song song (next_ma_ho_so_seq) cùng lúc với ghi mã HS nhập tay:
+không cấp trùng số, khoá rộng ('' = mọi khoa/đợt) vẫn đuổi kịp số nhập tay.
+"""
+import threading
+
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.models.applicant import Applicant
+from app.models.sequence import MaHoSoSequence
+from app.services.sequence_service import next_ma_ho_so_seq
+
+
+def _engine(tmp_path, monkeypatch):
+    # 'ON UPDATE CURRENT_TIMESTAMP' là cú pháp MySQL
+    monkeypatch.setattr(Applicant.__table__.c.updated_at, "server_default", None)
+    eng = create_engine(
+        f"sqlite:///{tmp_path / 'seq.db'}",
+        connect_args={"check_same_thread": False, "timeout": 30, "isolation_level": None},
+    )
+
+    # SQLite: BEGIN IMMEDIATE để các transaction ghi xếp hàng thay vì báo 'database is locked'
+    @event.listens_for(eng, "begin")
+    def _begin(conn):
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+    Base.metadata.create_all(eng, tables=[Applicant.__table__, MaHoSoSequence.__table__])
+    return eng
+
+
+def test_concurrent_assign_and_manual_bump(tmp_path, monkeypatch):
+    eng = _engine(tmp_path, monkeypatch)
+    Session = sessionmaker(bind=eng, autoflush=False)
+    khoa, dot = "K30", "D1"
+
+    errs = []
+    start = threading.Barrier(5)
+
+    def assign(tid):
+        start.wait()
+        try:
+            for i in range(10):
+                with Session() as db:
+                    seq = next_ma_ho_so_seq(db, khoa, dot)
+                    db.add(Applicant(ma_so_hv=f"A{tid}{i:02d}", khoa=khoa, dot=dot,
+                                     ma_ho_so=f"{khoa}{dot}{seq}"))
+                    db.commit()
+        except Exception as e:  # pragma: no cover - chỉ để báo lỗi rõ
+            errs.append(e)
+
+    def manual():
+        start.wait()
+        try:
+            with Session() as db:
+                db.add(Applicant(ma_so_hv="M0001", khoa=khoa, dot=dot, ma_ho_so=f"{khoa}{dot}0500"))
+                db.commit()
+        except Exception as e:  # pragma: no cover
+            errs.append(e)
+
+    threads = [threading.Thread(target=assign, args=(t,)) for t in range(4)]
+    threads.append(threading.Thread(target=manual))
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errs, errs
+
+    with Session() as db:
+        codes = [c for (c,) in db.execute(select(Applicant.ma_ho_so))]
+        assert len(codes) == 41
+        assert len(set(codes)) == 41
+
+        # sau mã nhập tay 0500, số kế tiếp của cả khoá hẹp lẫn khoá rộng phải vượt qua nó
+        assert int(next_ma_ho_so_seq(db, khoa, dot)) > 500
+        assert int(next_ma_ho_so_seq(db, "", dot)) > 500
+        assert int(next_ma_ho_so_seq(db, khoa, "")) > 500
+        assert int(next_ma_ho_so_seq(db, "", "")) > 500
+        db.commit()
+
+        # ghi hồ sơ chỉ đẩy bộ đếm của đúng (khoa, dot), không đụng khoá ('', '')
+        db.add(Applicant(ma_so_hv="M0002", khoa=khoa, dot=dot, ma_ho_so=f"{khoa}{dot}0900"))
+        db.commit()
+        tbl = MaHoSoSequence.__table__
+        wide = db.execute(select(tbl.c.last_value).where(tbl.c.khoa == "", tbl.c.dot == "")).scalar()
+        assert wide < 900
+        assert int(next_ma_ho_so_seq(db, "", "")) == 901
+    eng.dispose()
@@ -0,0 +1,45 @@
+# tests/test_pdf_batch_threads.py
+"""
+In gộp A4 từ nhiều luồng cùng lúc (request + worker job xuất): layout biên dịch sẵn
+dùng chung giữa các luồng không được làm lẫn nội dung giữa các canvas.
+"""
+import os
+import threading
+
+from reportlab import rl_config
+
+from app.services import pdf_service
+from app.services.font_registry import ensure_fonts
+from scripts.bench_pdf import make_dataset
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_render_batch_pdf_concurrent_threads(monkeypatch):
+    monkeypatch.chdir(ROOT)
+    monkeypatch.setattr(rl_config, "invariant", 1)  # bỏ ngày giờ / ID -> so sánh được theo byte
+    ensure_fonts()
+    apps, ibv, dba = make_dataset(40)
+    expected = pdf_service.render_batch_pdf(apps, ibv, dba)
+
+    for _ in range(5):
+        pdf_service._A4_GEOM.clear()  # các luồng cùng dựng + dùng layout mới
+        outs, errs = [], []
+        start = threading.Barrier(6)
+
+        def work():
+            start.wait()
+            try:
+                outs.append(pdf_service.render_batch_pdf(apps, ibv, dba))
+            except Exception as e:  # pragma: no cover - chỉ để báo lỗi rõ
+                errs.append(e)
+
+        threads = [threading.Thread(target=work) for _ in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert not errs, errs
+        assert len(outs) == 6
+        assert all(o == expected for o in outs)
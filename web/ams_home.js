@@ -189,16 +189,8 @@
 
   /* ================= DASHBOARD + FILTER ================= */
 
-  // Lưu toàn bộ applicants để filter lại theo khoá/đợt trên client
-  let ALL_APPLICANTS = [];
-
-  function uniqueSorted(arr) {
-    return [...new Set(arr)].sort((a, b) => {
-      const na = Number(a), nb = Number(b);
-      if (!Number.isNaN(na) && !Number.isNaN(nb)) return na - nb;
-      return String(a).localeCompare(String(b), 'vi');
-    });
-  }
+  // Các ô thống kê từ /applicants/stats (khoa, dot, nganh, done, count...) để lọc theo khoá/đợt trên client
+  let STATS_GROUPS = [];
 
   function fillSelectOptions(selectEl, values, labelAll) {
     if (!selectEl) return;
@@ -228,28 +220,33 @@
     ).toString().trim();
   }
 
-  function buildFilterOptions(rebuildKhoa = true) {
+  // Khoá / Đợt từ /applicants/facets (GROUP BY + cache trên server); đợt giới hạn trong khoá
+  async function fetchFacets(khoa) {
+    const qs = khoa ? `?khoa=${encodeURIComponent(khoa)}` : '';
+    const res = await api('/applicants/facets' + qs);
+    if (!res || !res.ok) return null;
+    const js = await res.json();
+    const vals = (arr) => (arr || []).map(f => String(f.value));
+    return { khoa: vals(js.khoa), dot: vals(js.dot) };
+  }
+
+  async function buildFilterOptions(rebuildKhoa = true) {
     const selKhoa = document.getElementById('filterKhoa');
     const selDot  = document.getElementById('filterDot');
     if (!selKhoa || !selDot) return;
 
-    const all = ALL_APPLICANTS || [];
-
     // Lưu lại lựa chọn hiện tại
     const oldKhoa = selKhoa.value;
     const oldDot  = selDot.value;
 
     // ----- 1. Build list NIÊN KHOÁ (nếu cần) -----
     if (rebuildKhoa) {
-      const listKhoa = uniqueSorted(
-        all
-          .map(a => getNienKhoa(a))
-          .filter(v => v !== '')
-      );
-      fillSelectOptions(selKhoa, listKhoa, 'Tất cả');
+      const all = await fetchFacets('');
+      if (!all) return;
+      fillSelectOptions(selKhoa, all.khoa, 'Tất cả');
 
       // cố gắng giữ lại lựa chọn cũ nếu vẫn tồn tại
-      if (oldKhoa && listKhoa.includes(oldKhoa)) {
+      if (oldKhoa && all.khoa.includes(oldKhoa)) {
         selKhoa.value = oldKhoa;
       } else {
         selKhoa.value = ""; // mặc định "Tất cả"
@@ -257,16 +254,8 @@
     }
 
     // ----- 2. Build list ĐỢT theo khoá đang chọn -----
-    const currentKhoa = selKhoa.value;
-    const filteredForDot = currentKhoa
-      ? all.filter(a => getNienKhoa(a) === currentKhoa)
-      : all;
-
-    const listDot = uniqueSorted(
-      filteredForDot
-        .map(a => getDot(a))
-        .filter(v => v !== '')
-    );
+    const scoped = await fetchFacets(selKhoa.value);
+    const listDot = scoped ? scoped.dot : [];
     fillSelectOptions(selDot, listDot, 'Tất cả');
 
     // giữ lại đợt cũ nếu còn
@@ -281,23 +270,26 @@
     const statsByMajor = {};
     let totalDone = 0;
 
-    for (const a of list) {
-      let m = (a.nganh_nhap_hoc || "").trim();
+    let total = 0;
+
+    // mỗi phần tử là 1 ô GROUP BY: { nganh, done, count, ... }
+    for (const g of list) {
+      let m = (g.nganh || "").trim();
       if (!m) m = "Chưa chọn ngành";
+      const n = Number(g.count) || 0;
 
       if (!statsByMajor[m]) {
         statsByMajor[m] = { total: 0, done: 0 };
       }
-      statsByMajor[m].total++;
+      statsByMajor[m].total += n;
+      total += n;
 
-      const hasCode = a.ma_ho_so && String(a.ma_ho_so).trim() !== "";
-      if (hasCode) {
-        statsByMajor[m].done++;
-        totalDone++;
+      if (g.done) {
+        statsByMajor[m].done += n;
+        totalDone += n;
       }
     }
 
-    const total   = list.length;
     const pending = total - totalDone;
     const majorsCount = Object.keys(statsByMajor).filter(k => k !== "Chưa chọn ngành").length;
 
@@ -312,7 +304,7 @@
     const k = selKhoa ? selKhoa.value.trim() : "";
     const d = selDot ? selDot.value.trim() : "";
 
-    let filtered = ALL_APPLICANTS;
+    let filtered = STATS_GROUPS;
     if (!Array.isArray(filtered)) filtered = [];
 
     filtered = filtered.filter(a => {
@@ -349,34 +341,16 @@
 
   async function loadDashboardStats() {
     try {
-      const PAGE_SIZE = 500;
-      let page = 1;
-      let all = [];
-
-      while (true) {
-        const res = await api(`/applicants/search?page=${page}&size=${PAGE_SIZE}`);
-        if (!res || !res.ok) {
-          console.warn('Stop fetching at page', page, 'status =', res && res.status);
-          break;
-        }
-
-        const js = await res.json();
-        const items = Array.isArray(js.items) ? js.items
-                     : Array.isArray(js.results) ? js.results
-                     : Array.isArray(js.data) ? js.data
-                     : Array.isArray(js) ? js
-                     : [];
-        if (!items.length) break;
-
-        all = all.concat(items);
-        if (items.length < PAGE_SIZE) break;
-        page++;
+      // 1 request: server GROUP BY + cache, thay cho tải toàn bộ hồ sơ về đếm
+      const res = await api('/applicants/stats');
+      if (!res || !res.ok) {
+        console.warn('Load stats failed, status =', res && res.status);
+        return;
       }
+      const js = await res.json();
+      STATS_GROUPS = Array.isArray(js.groups) ? js.groups : [];
 
-      console.log('Dashboard applicants loaded:', all.length);
-      ALL_APPLICANTS = all;
-
-      if (!ALL_APPLICANTS.length) {
+      if (!STATS_GROUPS.length) {
         updateTopCards(0, 0, 0, 0);
         renderMajorsTooltip({});
         renderDoneTooltip({});
@@ -384,7 +358,7 @@
         return;
       }
 
-      buildFilterOptions(true);  // build cả Khoa + Đợt lần đầu
+      await buildFilterOptions(true);  // build cả Khoa + Đợt lần đầu
       applyFilterAndRender();
 
     } catch (err) {
@@ -398,9 +372,9 @@
     const btnClear = document.getElementById('btnClearFilter');
 
     if (selKhoa) {
-      selKhoa.addEventListener('change', () => {
+      selKhoa.addEventListener('change', async () => {
         // chỉ cần build lại ĐỢT, giữ nguyên giá trị KHOÁ vừa chọn
-        buildFilterOptions(false);
+        await buildFilterOptions(false);
         applyFilterAndRender();
       });
     }
@@ -411,10 +385,10 @@
       });
     }
     if (btnClear) {
-      btnClear.addEventListener('click', () => {
+      btnClear.addEventListener('click', async () => {
         if (selKhoa) selKhoa.value = "";
         if (selDot)  selDot.value  = "";
-        buildFilterOptions(true);   // về lại tất cả khóa/đợt
+        await buildFilterOptions(true);   // về lại tất cả khóa/đợt
         applyFilterAndRender();
       });
     }
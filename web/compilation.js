@@ -502,11 +502,30 @@
         else { chk.checked = false; qty.disabled=true; qty.classList.add("bg-gray-100","text-gray-400"); qty.value = ""; }
       });
     };
-    if (document.querySelectorAll('#docsBody tr').length === 0) loadChecklist().then(applyDocsToTable); else applyDocsToTable();
+    if (document.querySelectorAll('#docsBody tr').length === 0) {
+      // /lookup đã trả checklist kèm theo -> khỏi gọi thêm /checklist/active
+      if (a.checklist_data && (a.checklist_data.items || []).length) { renderChecklistFromData(a.checklist_data); applyDocsToTable(); }
+      else loadChecklist().then(applyDocsToTable);
+    } else applyDocsToTable();
     try { bindNameInputs(); } catch(_){}
   }
 
   async function loadApplicantByMSHV(mshv){
+    // 1 lượt: hồ sơ + docs + checklist (MSSV 10 số hoặc mã hồ sơ)
+    const rl = await apiFetch(`/applicants/lookup/${encodeURIComponent(mshv)}`);
+    if (rl && rl.ok) {
+      const data = await rl.json();
+      const ap = { ...data.applicant, docs: data.docs || [], checklist_data: data.checklist || null };
+      if (isSoftDeleted(ap)) { showToast(`MSHV ${mshv} đã bị xóa, không thể mở!`, "warn"); throw new Error(`Hồ sơ ${mshv} đã bị xóa!`); }
+      return ap;
+    }
+    if (rl && rl.status === 410) { showToast(`MSHV ${mshv} đã bị xóa, không thể mở!`, "warn"); throw new Error(`Hồ sơ ${mshv} đã bị xóa!`); }
+    if (rl && rl.status === 404) {
+      const j = await rl.clone().json().catch(()=>null);
+      // 404 của chính endpoint (không phải server cũ chưa có /lookup)
+      if (j && j.detail && j.detail !== 'Not Found') { showToast(`Không tìm thấy MSHV ${mshv}`, "warn"); throw new Error(`Không tìm thấy hồ sơ ${mshv}`); }
+    }
+
     let r = await apiFetch(`/applicants/by-mshv/${encodeURIComponent(mshv)}`);
     if (r && r.ok) {
       const data = await r.json();
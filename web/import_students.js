@@ -196,6 +196,10 @@ function addResult(type, idx, data, msg){
     results.push({type, idx, data, msg});
     renderResults();
 }
+// thêm kết quả không render lại ngay (dùng khi nhận cả lô từ /applicants/bulk)
+function addResultQuiet(type, idx, data, msg){
+    results.push({type, idx, data, msg});
+}
 $('btnClearLog')?.addEventListener('click', ()=>{ results.splice(0, results.length); renderResults(); });
 
 function setBar(done, total){
@@ -460,7 +464,46 @@ $('btnUpload').onclick = async ()=> {
     const total = parsedRows.length; let done=0;
     setBar(0,total);
 
-    for (let i=0;i<parsedRows.length;i++){
+    // Gửi theo lô qua /applicants/bulk (server kiểm tra + insert hàng loạt)
+    const BULK_SIZE = 500;
+    let bulkOk = true;
+    for (let start=0; start<parsedRows.length && bulkOk; start+=BULK_SIZE){
+    if (stopFlag) break;
+    const bodies = [];
+    for (let i=start; i<Math.min(start+BULK_SIZE, parsedRows.length); i++){
+        const body = await makeApplicantPayload(parsedRows[i], m);
+        if (body.ma_ho_so === "") delete body.ma_ho_so;
+        bodies.push(body);
+    }
+    try{
+        const r = await apiFetch("/applicants/bulk", {
+        method:"POST", headers:{"Content-Type":"application/json"},
+        body: JSON.stringify({ rows: bodies, start_index: start+1 })
+        });
+        if (r.status === 404 || r.status === 405) { bulkOk = false; break; }  // server cũ -> gửi từng dòng
+        if (!r.ok){
+        const t = await r.text();
+        bodies.forEach((b, k) => addResultQuiet('ERR', start+k+1, b, `HTTP ${r.status} ${t}`));
+        } else {
+        const j = await r.json();
+        (j.results || []).forEach(res => {
+            const b = bodies[res.idx - start - 1] || {};
+            if (res.ma_ho_so && !b.ma_ho_so) b.ma_ho_so = res.ma_ho_so;
+            addResultQuiet(res.status, res.idx, b, res.msg);
+        });
+        }
+    }catch(e){
+        bodies.forEach((b, k) => addResultQuiet('ERR', start+k+1, b, e.message));
+    }finally{
+        // 404/405: lô này chưa gửi -> không tính, gửi từng dòng từ chỗ dừng (i=done)
+        if (bulkOk){
+        done += bodies.length; setBar(done,total);
+        renderResults();
+        }
+    }
+    }
+
+    for (let i=done; !bulkOk && i<parsedRows.length; i++){
     if (stopFlag) break;
     const body = await makeApplicantPayload(parsedRows[i], m);
     if (body.ma_ho_so === "") delete body.ma_ho_so;
@@ -508,6 +551,83 @@ $('btnUpload').onclick = async ()=> {
 };
 $('btnStop').onclick = ()=>{ stopFlag = true; };
 
+/* ===== Import trên máy chủ (job nền: đóng tab vẫn chạy) ===== */
+const IMPORT_JOB_KEY = 'ams_import_job_id';
+let jobPollTimer = null;
+
+function renderJob(job){
+    const total = job.total_rows || job.processed || 0;
+    setBar(job.processed || 0, total);
+    $('okCount').textContent = job.ok || 0;
+    $('errCount').textContent = job.err || 0;
+    $('skipCount').textContent = job.skip || 0;
+    const label = {queued:'Đang xếp hàng', running:'Đang chạy', cancelling:'Đang dừng',
+                   done:'Hoàn tất', failed:'Lỗi', cancelled:'Đã dừng'}[job.status] || job.status;
+    $('stats').textContent = `[Máy chủ] ${label}: ${job.processed || 0}${job.total_rows ? '/' + job.total_rows : ''} dòng`;
+}
+
+async function pollImportJob(jobId){
+    clearTimeout(jobPollTimer);
+    let job = null;
+    try {
+    const r = await apiFetch(`/imports/${encodeURIComponent(jobId)}`);
+    if (r.status === 404) { localStorage.removeItem(IMPORT_JOB_KEY); return; }
+    if (r.ok) job = await r.json();
+    } catch(_){}
+    if (!job) { jobPollTimer = setTimeout(()=>pollImportJob(jobId), 3000); return; }
+
+    renderJob(job);
+    if (['queued','running','cancelling'].includes(job.status)) {
+    $('btnStop').classList.remove('hidden');
+    $('btnStop').onclick = async ()=>{
+        await apiFetch(`/imports/${encodeURIComponent(jobId)}/cancel`, {method:'POST'}).catch(()=>null);
+    };
+    jobPollTimer = setTimeout(()=>pollImportJob(jobId), 1500);
+    return;
+    }
+
+    // kết thúc
+    localStorage.removeItem(IMPORT_JOB_KEY);
+    $('btnStop').classList.add('hidden');
+    $('btnStop').onclick = ()=>{ stopFlag = true; };
+    if ($('btnUploadServer')) $('btnUploadServer').disabled = false;
+    const summary = `Xong import trên máy chủ: <b>${job.ok||0}</b> thành công • <b>${job.err||0}</b> lỗi • <b>${job.skip||0}</b> bỏ qua.`;
+    showToast(job.status === 'failed' ? ('Import lỗi: ' + (job.error_message || '')) : summary,
+              job.status === 'failed' ? 'error' : (job.err ? 'warn' : 'success'), 7000);
+    if (job.has_report) {
+    window.open(makeUrl(`/imports/${encodeURIComponent(jobId)}/errors.csv`), '_blank');
+    }
+}
+
+$('btnUploadServer')?.addEventListener('click', async ()=>{
+    const f = fileInput.files && fileInput.files[0];
+    if (!f) { alert("Chưa chọn tệp"); return; }
+    if (!/\.(xlsx|csv)$/i.test(f.name)) { alert("Import trên máy chủ chỉ hỗ trợ .xlsx hoặc .csv"); return; }
+    if (!$('defaultNgayNhan').value) { alert("Vui lòng chọn 'Ngày nhận HS (mặc định)' trước khi import."); return; }
+    const m = getMappingFromUI();
+    if (!requireMappings(m)) return;
+    await detectPrefix();
+
+    const fd = new FormData();
+    fd.append('file', f);
+    fd.append('mapping', JSON.stringify(m));
+    fd.append('ngay_nhan_hs', parseDateFlexible($('defaultNgayNhan').value) || $('defaultNgayNhan').value);
+    if (ACTIVE_CHECKLIST?.version_name) fd.append('checklist_version_name', ACTIVE_CHECKLIST.version_name);
+
+    $('btnUploadServer').disabled = true;
+    try {
+    const r = await apiFetch('/imports', { method:'POST', body: fd });
+    if (!r.ok) throw new Error(`HTTP ${r.status} ${await r.text()}`);
+    const job = await r.json();
+    localStorage.setItem(IMPORT_JOB_KEY, job.id);
+    showToast('Đã gửi file lên máy chủ. Có thể đóng tab, tiến độ vẫn được lưu.', 'info', 4000);
+    pollImportJob(job.id);
+    } catch (e) {
+    $('btnUploadServer').disabled = false;
+    showToast('Không tạo được job import: ' + e.message, 'error', 6000);
+    }
+});
+
 async function ensureNguoiNhanFromSession(){
     try{
     await detectPrefix();
@@ -528,6 +648,7 @@ async function ensureNguoiNhanFromSession(){
         $('meStatus').textContent = `Đã gắn tự động: ${name} (${me.role})`;
         $('btnUpload').disabled = false;
         $('btnPreview').disabled = false;
+        if ($('btnUploadServer')) $('btnUploadServer').disabled = false;
     } else {
         $('meStatus').innerHTML = `Tài khoản <b>${name}</b> (${me.role}) không có quyền import.`;
         $('btnUpload').disabled = true;
@@ -651,6 +772,13 @@ window.addEventListener("load", async () => {
     await ensureNguoiNhanFromSession();
     await fetchActiveChecklist();
 
+    // job import trên máy chủ đang chạy từ lần mở trước -> tiếp tục theo dõi
+    const pendingJob = localStorage.getItem(IMPORT_JOB_KEY);
+    if (pendingJob) {
+    if ($('btnUploadServer')) $('btnUploadServer').disabled = true;
+    pollImportJob(pendingJob);
+    }
+
     const params = new URLSearchParams(location.search);
     const byQuery = params.get('expired') === '1';
     const byCookie = document.cookie.split(';').some(c => c.trim().startsWith('__session_expired=1'));
@@ -124,9 +124,7 @@
       page: 1,
       size: 10,
       total: 0,
-      cachedAllForFilter: [],
-      sort: { key: null, dir: 'asc' },
-      cacheAll: []
+      sort: { key: null, dir: 'asc' }
     };
     function pagesTotal(){ return Math.max(1, Math.ceil(state.total / state.size)); }
 
@@ -693,49 +691,11 @@
       });
     }
 
-    // sắp xếp client-side (trên toàn tập)
-    function applySort(list) {
+    // sắp xếp phía server: data-sort của header -> tham số sort của /applicants/search
+    function sortParams() {
       const { key, dir } = state.sort;
-      if (!key) return list;
-
-      const getVal = (it) => {
-        switch (key) {
-          case 'ho_dem': return (it.ho_dem || "").toString();
-          case 'ten': return (it.ten || "").toString();
-          case 'ma_so_hv': return (it.ma_so_hv || "").toString();
-          case 'ngay_nhan_hs': {
-            const v = it.ngay_nhan_hs;
-            // chuẩn ISO -> số để sort ổn định; fallback về 0
-            const t = v ? Date.parse(v) : 0;
-            return isNaN(t) ? 0 : t;
-          }
-          case 'nganh': {
-            const ng = it.nganh_nhap_hoc ?? it.nganh ?? "";
-            return ng.toString();
-          }
-          case 'dot': {
-            const d = it.dot ?? it.dot_tuyen ?? "";
-            return d.toString();
-          }
-          case 'khoa': {
-            const k = it.khoa ?? it.khoa_hoc ?? it.khoahoc ?? "";
-            return k.toString();
-          }
-          case 'nguoi_nhan': {
-            const n = it.nguoi_nhan_ky_ten ?? it.nguoi_nhan ?? it.nguoi_ky ?? "";
-            return n.toString();
-          }
-          default: return "";
-        }
-      };
-
-      const collator = new Intl.Collator('vi', { numeric: true, sensitivity: 'base' });
-      const arr = list.slice().sort((a, b) => {
-        const A = getVal(a), B = getVal(b);
-        if (typeof A === 'number' && typeof B === 'number') return A - B;
-        return collator.compare(String(A), String(B));
-      });
-      return dir === 'asc' ? arr : arr.reverse();
+      if (!key) return "";
+      return `&sort=${encodeURIComponent(key)}&dir=${dir === 'desc' ? 'desc' : 'asc'}`;
     }
 
     function setAriaSort(){
@@ -852,94 +812,80 @@
       return { items: [], total: 0, page: 1, size: size };
     }
 
-    // lấy nhiều trang (để sort/loc client)
-    async function fetchUpTo(limit=5000){
-      const out = [];
-      let page = 1;
-      const size = 200;
-      for(;;){
-        const data = await fetchPageServer(state.q, page, size);
-        (data.items||[]).forEach(x => { if (notDeleted(x)) out.push(x); });
-        const total = data.total ?? out.length;
-        if (out.length >= total || out.length >= limit || (data.items||[]).length === 0 || (data.items||[]).length < size) break;
-        page += 1;
-      }
-      return out.slice(0, limit);
+    // Bộ lọc Đợt/Khóa -> tham số server (so khớp chính xác)
+    function filterParams(){
+      const dot  = ($("filterDot")?.value || "").trim();
+      const khoa = ($("filterKhoa")?.value || "").trim();
+      return (dot ? `&dot=${encodeURIComponent(dot)}` : "") + (khoa ? `&khoa=${encodeURIComponent(khoa)}` : "");
     }
 
-    function applyClientFilters(list){
-      const dot  = $("filterDot").value.trim().toLowerCase();
-      const khoa = $("filterKhoa").value.trim().toLowerCase();
-      return (list||[]).filter(it=>{
-        const _dot  = String(it.dot ?? it.dot_tuyen ?? "").toLowerCase();
-        const _khoa = String(it.khoa ?? it.khoa_hoc ?? it.khoahoc ?? "").toLowerCase();
-        const okDot  = !dot  || _dot.includes(dot);
-        const okKhoa = !khoa || _khoa === khoa || _khoa.includes(khoa);
-        return okDot && okKhoa;
-      });
-    }
-
-    async function buildSourceFull(){
-      state.cacheAll = (await fetchUpTo(5000)).filter(notDeleted);
-
-      // 🔹 Lần đầu có dữ liệu thì build dropdown Đợt/Khóa
-      if (!filterOptionsBuilt) {
-        buildFilterOptions(state.cacheAll);
-      }
-
-      const wantFilter = $("filterDot").value.trim() !== "" || $("filterKhoa").value.trim() !== "";
-      let list = wantFilter ? applyClientFilters(state.cacheAll) : state.cacheAll.slice();
-      list = applySort(list);
-      return list;
+    // lấy đúng 1 trang: lọc + sắp xếp + tổng đều do server làm
+    async function fetchListPage(){
+      const qs = state.q ? `q=${encodeURIComponent(state.q)}&` : "";
+      const j = await tryJson(`/applicants/search?${qs}page=${state.page}&size=${state.size}${filterParams()}${sortParams()}`);
+      if (!j) return fetchPageServer(state.q, state.page, state.size); // server cũ
+      const norm = normalizePaged(j);
+      clearDeletedIfExists(norm.items);
+      norm.items = (norm.items || []).filter(notDeleted);
+      return norm;
     }
 
     let filterOptionsBuilt = false;
 
-    // Tạo options cho các dropdown Đợt / Khóa từ danh sách hồ sơ
-    function buildFilterOptions(list) {
-      const dotSet  = new Set();
-      const khoaSet = new Set();
+    const buildOpts = (arr, firstLabel) =>
+      `<option value="">${firstLabel}</option>` +
+      arr.map(v => `<option value="${v}">${v}</option>`).join('');
 
-      (list || []).forEach(it => {
-        const dot  = (it.dot ?? it.dot_tuyen ?? '').toString().trim();
-        const khoa = (it.khoa ?? it.khoa_hoc ?? it.khoahoc ?? '').toString().trim();
-        if (dot)  dotSet.add(dot);
-        if (khoa) khoaSet.add(khoa);
-      });
+    // Giá trị Đợt / Khóa từ /applicants/facets (server GROUP BY + cache); đợt giới hạn trong khoá
+    async function fetchFacets(khoa){
+      const qs = khoa ? `?khoa=${encodeURIComponent(khoa)}` : "";
+      const j = await tryJson(`/applicants/facets${qs}`);
+      const vals = (arr) => (arr || []).map(f => String(f.value));
+      return { khoa: vals(j && j.khoa), dot: vals(j && j.dot) };
+    }
 
+    async function loadFilterOptions() {
       const filterDotSel   = document.getElementById('filterDot');   // lọc trên danh sách
       const filterKhoaSel  = document.getElementById('filterKhoa');  // lọc trên danh sách
       const dotSel         = document.getElementById('dot');         // xuất theo đợt
       const dotKhoaSel     = document.getElementById('dotKhoa');     // xuất theo khóa
 
-      const dots  = Array.from(dotSet).sort();
-      const khoas = Array.from(khoaSet).sort();
-
-      const buildOpts = (arr, firstLabel) =>
-        `<option value="">${firstLabel}</option>` +
-        arr.map(v => `<option value="${v}">${v}</option>`).join('');
+      const f = await fetchFacets("");
+      if (filterDotSel)  filterDotSel.innerHTML  = buildOpts(f.dot,  'Tất cả đợt');
+      if (dotSel)        dotSel.innerHTML        = buildOpts(f.dot,  '-- Chọn đợt --');
 
-      if (filterDotSel)  filterDotSel.innerHTML  = buildOpts(dots,  'Tất cả đợt');
-      if (dotSel)        dotSel.innerHTML        = buildOpts(dots,  '-- Chọn đợt --');
-
-      if (filterKhoaSel) filterKhoaSel.innerHTML = buildOpts(khoas, 'Tất cả khóa');
-      if (dotKhoaSel)    dotKhoaSel.innerHTML    = buildOpts(khoas, '-- Chọn khóa --');
+      if (filterKhoaSel) filterKhoaSel.innerHTML = buildOpts(f.khoa, 'Tất cả khóa');
+      if (dotKhoaSel)    dotKhoaSel.innerHTML    = buildOpts(f.khoa, '-- Chọn khóa --');
 
       filterOptionsBuilt = true;
     }
 
+    // Đổi khoá -> chỉ hiện các đợt có trong khoá đó (giữ đợt đang chọn nếu còn)
+    async function refreshDotOptions() {
+      const filterDotSel = document.getElementById('filterDot');
+      if (!filterDotSel) return;
+      const old = filterDotSel.value;
+      const f = await fetchFacets(($("filterKhoa")?.value || "").trim());
+      filterDotSel.innerHTML = buildOpts(f.dot, 'Tất cả đợt');
+      filterDotSel.value = f.dot.includes(old) ? old : "";
+    }
+
     async function runSearch(){
       setState({loading:true});
       try{
-        const full = await buildSourceFull(); // Lấy dữ liệu đã lọc
-        clearDeletedIfExists(full);
-        state.total = full.length;
+        if (!filterOptionsBuilt) await loadFilterOptions();
 
+        let data = await fetchListPage();
+        state.total = Number(data.total || 0);
+
+        // trang hiện tại vượt quá (vd. sau khi xoá/lọc) -> lùi về trang cuối
         const totalPages = Math.max(1, Math.ceil(state.total / state.size));
-        if (state.page > totalPages) state.page = totalPages;
+        if (state.page > totalPages) {
+          state.page = totalPages;
+          data = await fetchListPage();
+        }
 
-        const start = (state.page - 1) * state.size;
-        renderRows(full.slice(start, start + state.size)); // Hiển thị các kết quả
+        renderRows(data.items || []);
         updatePagerUI(state.total, state.page, state.size);
         setState({loading:false, empty: state.total === 0});
       }catch(e){
@@ -1054,6 +1000,33 @@
       setTimeout(()=>URL.revokeObjectURL(u), 60000);
     }
 
+    // Job xuất chạy nền (theo đợt): tạo job -> long-poll tới khi xong -> trả job (null nếu lỗi)
+    // Nhiều người bấm cùng lúc với cùng bộ lọc -> BE gắn vào chung 1 job, file chỉ dựng 1 lần.
+    async function runExportJob(body, type = "excel"){
+      const fail = (msg) => {
+        if (typeof showToast === 'function') showToast(msg, 'error', 2800); else alert(msg);
+        return null;
+      };
+      let resp = await fetch(makeUrl('/exports'), {
+        method: 'POST',
+        credentials: 'include',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(body),
+      });
+      let job;
+      try { job = await resp.json(); } catch(_) { job = null; }
+      if (!resp.ok || !job?.id){
+        return fail(job?.detail || `Không thể ${type === 'pdf' ? 'in' : 'xuất'} (HTTP ${resp.status}).`);
+      }
+      while (job.status === 'queued' || job.status === 'running'){
+        resp = await fetch(makeUrl(`/exports/${job.id}?wait=25`), { credentials: 'include' });
+        if (!resp.ok) return fail(`Không thể ${type === 'pdf' ? 'in' : 'xuất'} (HTTP ${resp.status}).`);
+        job = await resp.json();
+      }
+      if (job.status !== 'done') return fail(job.error_message || 'Job xuất bị lỗi, vui lòng thử lại.');
+      return job;
+    }
+
     // ===== Export/In ấn theo ngày/đợt =====
     // ---- Theo NGÀY
     const dayEl = $("day");
@@ -1120,6 +1093,30 @@
         await openPdfOrAlert(url);
         hideLoading(); 
       });
+
+      // Nút In A5 theo ngày (2 biên nhận / tờ A4)
+      $("btnPrintDayA5")?.addEventListener("click", async () => {
+        const day = dayEl.value.trim();
+        if (!day) {
+          alert("Anh chọn ngày trước đã.");
+          return;
+        }
+        showLoading("Đang tải dữ liệu in, vui lòng đợi...");
+
+        await journalTrack({
+          action: "PRINT_IN",
+          detail: {
+            scope: "DAY",
+            filters: { day, size: "A5" },
+            name_mode: "default",
+            count: null
+          }
+        });
+
+        const url = `/batch/print-a5?day=${encodeURIComponent(day)}&two_up=true`;
+        await openPdfOrAlert(url);
+        hideLoading();
+      });
     }
 
     // ---- Theo đợt/khóa
@@ -1132,9 +1129,8 @@
         showLoading("Đang tải dữ liệu in, vui lòng đợi...");
 
         await journalTrack({ action:'EXPORT', detail:{ scope:'DOT', filters:{ dot, ...(khoa?{khoa}:{}) }, name_mode:'split', count:null }});
-        let url = `/export/excel-dot?dot=${encodeURIComponent(dot)}&name=split`;
-        if (khoa) url += `&khoa=${encodeURIComponent(khoa)}`;
-        await fetchFileOrAlert(url, `tong_dot_${dot}${khoa?`_khoa_${khoa}`:""}.xlsx`, "excel");
+        const job = await runExportJob({ kind:'excel-dot', dot, khoa, name:'split' }, "excel");
+        if (job) await fetchFileOrAlert(job.download_url, `tong_dot_${dot}${khoa?`_khoa_${khoa}`:""}.xlsx`, "excel");
         hideLoading(); 
       });
 
@@ -1145,11 +1141,22 @@
         showLoading("Đang tải dữ liệu xuất, vui lòng đợi...");
 
         await journalTrack({ action:'PRINT_IN', detail:{ scope:'DOT', filters:{ dot, ...(khoa?{khoa}:{}) }, name_mode:'default', count:null }});
-        let url = `/batch/print-dot?dot=${encodeURIComponent(dot)}`;
-        if (khoa) url += `&khoa=${encodeURIComponent(khoa)}`;
-        await openPdfOrAlert(url);
+        const job = await runExportJob({ kind:'print-dot', dot, khoa }, "pdf");
+        if (job) await openPdfOrAlert(job.download_url);
         hideLoading(); 
       });
+
+      $("btnPrintDotA5")?.addEventListener("click", async () => {
+        const dot  = $("dot").value.trim();
+        const khoa = $("dotKhoa")?.value.trim() || "";
+        if (!dot){ alert("Nhập tên đợt trước đã"); return; }
+        showLoading("Đang tải dữ liệu in, vui lòng đợi...");
+
+        await journalTrack({ action:'PRINT_IN', detail:{ scope:'DOT', filters:{ dot, ...(khoa?{khoa}:{}), size:'A5' }, name_mode:'default', count:null }});
+        const job = await runExportJob({ kind:'print-dot', dot, khoa, a5:true, two_up:true }, "pdf");
+        if (job) await openPdfOrAlert(job.download_url);
+        hideLoading();
+      });
     }
 
     // ===== Sort header bindings =====
@@ -1180,10 +1187,11 @@
     }
     document.querySelectorAll('.pager').forEach(bindPager);
 
-    // Lọc client theo đợt/khóa (debounce)
+    // Lọc theo đợt/khóa (server-side)
     ["filterDot","filterKhoa"].forEach(id=>{
       $(id).addEventListener("change", async ()=>{
         state.page = 1;
+        if (id === "filterKhoa") await refreshDotOptions();
         await runSearch();
       });
     });